@@ -8,4 +8,46 @@ REDIS_URL = os.getenv("REDIS_URL", "")
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 USE_CELERY = bool(REDIS_URL)
+MAPPING_CODEGEN = os.getenv("MAPPING_CODEGEN", "false").lower() == "true"
+MAPPING_BATCH_MAX_RECORDS = int(os.getenv("MAPPING_BATCH_MAX_RECORDS", "50000"))
+MAPPING_BATCH_PROCESSES = int(os.getenv("MAPPING_BATCH_PROCESSES", "0"))
 
+MAPPING_RESULT_CACHE_SIZE = int(os.getenv("MAPPING_RESULT_CACHE_SIZE", "0"))
+MAPPING_RESULT_CACHE_TTL_SEC = float(os.getenv("MAPPING_RESULT_CACHE_TTL_SEC", "300"))
+EVENT_ROUTING_TTL_SEC = float(os.getenv("EVENT_ROUTING_TTL_SEC", "0"))
+WEBHOOK_INGEST_MODE = os.getenv("WEBHOOK_INGEST_MODE", "inline").lower()  # inline|queue|wal
+WEBHOOK_QUEUE_MAXSIZE = int(os.getenv("WEBHOOK_QUEUE_MAXSIZE", "1000"))
+WEBHOOK_QUEUE_WORKERS = int(os.getenv("WEBHOOK_QUEUE_WORKERS", "4"))
+WEBHOOK_QUEUE_RETRY_AFTER_SEC = float(os.getenv("WEBHOOK_QUEUE_RETRY_AFTER_SEC", "1"))
+WEBHOOK_QUEUE_DRAIN_TIMEOUT_SEC = float(os.getenv("WEBHOOK_QUEUE_DRAIN_TIMEOUT_SEC", "10"))
+INGEST_LOG_DIR = os.getenv("INGEST_LOG_DIR", "./ingest_log")
+INGEST_LOG_SEGMENT_BYTES = int(os.getenv("INGEST_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+INGEST_LOG_FSYNC_INTERVAL_MS = float(os.getenv("INGEST_LOG_FSYNC_INTERVAL_MS", "2"))
+INGEST_LOG_FSYNC = os.getenv("INGEST_LOG_FSYNC", "true").lower() == "true"
+WEBHOOK_BULK_CONCURRENCY = int(os.getenv("WEBHOOK_BULK_CONCURRENCY", "8"))
+WEBHOOK_BULK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_BULK_MAX_CONCURRENCY", "64"))
+WEBHOOK_BULK_MAX_LINE_BYTES = int(os.getenv("WEBHOOK_BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY_SEC = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY_SEC", "30"))
+HTTP_POOL_HTTP2 = os.getenv("HTTP_POOL_HTTP2", "false").lower() == "true"
+HTTP_POOL_TIMEOUT_SEC = float(os.getenv("HTTP_POOL_TIMEOUT_SEC", "15"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_WINDOW_SEC = float(os.getenv("RETRY_BUDGET_WINDOW_SEC", "10"))
+RETRY_BUDGET_MIN_RETRIES = int(os.getenv("RETRY_BUDGET_MIN_RETRIES", "10"))
+HEDGE_BUDGET_RATIO = float(os.getenv("HEDGE_BUDGET_RATIO", "0.1"))
+HEDGE_BUDGET_MIN_HEDGES = int(os.getenv("HEDGE_BUDGET_MIN_HEDGES", "2"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+# Where circuit-breaker and rate-limit state lives: local (per process) | shm (one host) | redis (all hosts).
+STATE_BACKEND = os.getenv("STATE_BACKEND", "local").lower()
+STATE_SHM_PATH = os.getenv("STATE_SHM_PATH", "/dev/shm/synapseops-state")
+STATE_SHM_SLOTS = int(os.getenv("STATE_SHM_SLOTS", "4096"))
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", REDIS_URL)
+CIRCUIT_SYNC_INTERVAL_SEC = float(os.getenv("CIRCUIT_SYNC_INTERVAL_SEC", "0.5"))
+OAUTH_REFRESH_AHEAD_RATIO = float(os.getenv("OAUTH_REFRESH_AHEAD_RATIO", "0.8"))
+# Optional encrypted OAuth2 token cache shared across workers and restarts: "" (off) | file | redis.
+TOKEN_CACHE_BACKEND = os.getenv("TOKEN_CACHE_BACKEND", "").lower()
+TOKEN_CACHE_DIR = os.getenv("TOKEN_CACHE_DIR", "./token_cache")
+# Required when TOKEN_CACHE_BACKEND is set; there is deliberately no fallback to SECRET_KEY.
+TOKEN_CACHE_SECRET = os.getenv("TOKEN_CACHE_SECRET", "")
+TOKEN_CACHE_REDIS_URL = os.getenv("TOKEN_CACHE_REDIS_URL", REDIS_URL)
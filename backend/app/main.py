@@ -9,9 +9,18 @@ from app.integration_routes import projects_router, blueprints_router
 from app.database import engine, Base, SessionLocal
 from app.services.api_integration.api.v1.router import router as api_integration_router
 from app.services.api_integration.seed import seed_local_demo_flow
+from app.services.api_integration.services.transforms import load_lookup_tables
+from app.services.api_integration.services.mapping_engine import shutdown_batch_pool
+from app.services.api_integration.services.event_router import event_routing_index
+from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.connectors.http_pool import http_client_pool
+from app.config import WEBHOOK_INGEST_MODE, WEBHOOK_QUEUE_DRAIN_TIMEOUT_SEC
 from app.services.api_integration import models as api_integration_models  # noqa: F401
+from app.services.api_integration.models import LookupTable
+from app.services.api_integration.models.migrations import upgrade_schema
 
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
 app = FastAPI(title="SynapseOps", version="1.0.0")
 
@@ -38,11 +47,14 @@ async def request_id_middleware(request: Request, call_next):
     return response
 
 
-def _error_response(request: Request, status_code: int, code: str, message: str) -> JSONResponse:
+def _error_response(
+    request: Request, status_code: int, code: str, message: str, headers: dict[str, str] | None = None
+) -> JSONResponse:
     request_id = getattr(request.state, "request_id", str(uuid.uuid4()))
     return JSONResponse(
         status_code=status_code,
         content={"error": {"code": code, "message": message, "request_id": request_id}},
+        headers=headers,
     )
 
 
@@ -56,7 +68,7 @@ async def handle_http_exception(request: Request, exc: HTTPException):
         code = "http_error"
         message = str(detail)
 
-    return _error_response(request, exc.status_code, code, message)
+    return _error_response(request, exc.status_code, code, message, exc.headers)
 
 
 @app.exception_handler(RequestValidationError)
@@ -84,5 +96,29 @@ def startup_seed():
     db = SessionLocal()
     try:
         seed_local_demo_flow(db)
+        load_lookup_tables(db.query(LookupTable).all())
     finally:
         db.close()
+    event_routing_index.rebuild()
+
+
+@app.on_event("startup")
+async def start_run_queue():
+    http_client_pool.open()
+    flow_runner.queue.start()
+    if WEBHOOK_INGEST_MODE == "wal":
+        flow_runner.replay_ingest_log()
+    db = SessionLocal()
+    try:
+        flow_runner.requeue_pending(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+async def stop_run_queue():
+    await flow_runner.queue.stop(drain_timeout_sec=WEBHOOK_QUEUE_DRAIN_TIMEOUT_SEC)
+    await flow_runner.batcher.flush_all()
+    await http_client_pool.aclose()
+    await flow_runner.ingest_log.close()
+    shutdown_batch_pool()
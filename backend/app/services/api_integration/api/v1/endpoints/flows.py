@@ -2,7 +2,9 @@ from fastapi import APIRouter, Body, Depends, Request
 from sqlalchemy.orm import Session
 from app.services.api_integration.models import Flow, Run, get_db
 from app.services.api_integration.errors import api_error
+from app.config import MAPPING_BATCH_MAX_RECORDS, MAPPING_BATCH_PROCESSES, MAPPING_CODEGEN
 from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.mapping_engine import apply_mapping_batch
 from app.services.api_integration.context import get_request_id
 
 router = APIRouter()
@@ -24,6 +26,24 @@ def list_flows(db: Session = Depends(get_db)):
                 "max_attempts": flow.retry_max_attempts,
                 "base_delay_sec": flow.retry_base_delay_sec,
                 "max_delay_sec": flow.retry_max_delay_sec,
+                "jitter": flow.retry_jitter,
+            },
+            "circuit": {
+                "mode": flow.circuit_mode,
+                "failure_threshold": flow.circuit_failure_threshold,
+                "recovery_timeout_sec": flow.circuit_recovery_timeout_sec,
+                "half_open_probes": flow.circuit_half_open_probes,
+                "window_type": flow.circuit_window_type,
+                "window_size": flow.circuit_window_size,
+                "min_calls": flow.circuit_min_calls,
+                "failure_rate": flow.circuit_failure_rate,
+                "slow_call_ms": flow.circuit_slow_call_ms,
+                "slow_call_rate": flow.circuit_slow_call_rate,
+            },
+            "batch": {
+                "max_items": flow.batch_max_items,
+                "max_bytes": flow.batch_max_bytes,
+                "linger_ms": flow.batch_linger_ms,
             },
         }
         for flow in flows
@@ -114,3 +134,48 @@ async def run_flow(
         raise api_error(502, "flow_execution_failed", str(exc))
 
     return {"run_id": run.id, "status": run.status, "flow_id": run.flow_id}
+
+
+@router.post("/flows/{flow_id}/dry-run-map")
+def dry_run_map(
+    flow_id: str,
+    payloads: list[dict] = Body(..., embed=True),
+    db: Session = Depends(get_db),
+):
+    flow = db.query(Flow).filter(Flow.id == flow_id).first()
+    if not flow:
+        raise api_error(404, "flow_not_found", "Flow not found")
+    if len(payloads) > MAPPING_BATCH_MAX_RECORDS:
+        raise api_error(
+            413,
+            "batch_too_large",
+            f"Dry-run map accepts at most {MAPPING_BATCH_MAX_RECORDS} payloads per request",
+        )
+
+    try:
+        mapped = apply_mapping_batch(
+            payloads,
+            flow.mapping.rules,
+            processes=MAPPING_BATCH_PROCESSES,
+            return_exceptions=True,
+            codegen=MAPPING_CODEGEN,
+        )
+    except ValueError as exc:
+        # Per-record errors come back in the results; this is a rule that fails to compile.
+        raise api_error(422, "invalid_mapping", str(exc))
+    results = [
+        {"index": index, "mapped_payload": None, "error": str(item)}
+        if isinstance(item, Exception)
+        else {"index": index, "mapped_payload": item, "error": None}
+        for index, item in enumerate(mapped)
+    ]
+    failed = sum(1 for item in results if item["error"] is not None)
+
+    return {
+        "flow_id": flow.id,
+        "mapping_id": flow.mapping.id,
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
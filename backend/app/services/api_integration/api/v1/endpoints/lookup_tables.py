@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Body, Depends
+from sqlalchemy.orm import Session
+from app.services.api_integration.models import LookupTable, get_db
+from app.services.api_integration.errors import api_error
+from app.services.api_integration.services.transforms import (
+    LOOKUP_ON_MISSING,
+    load_lookup_table,
+    load_lookup_tables,
+    lookup_table,
+)
+
+router = APIRouter()
+
+
+def _serialize(record: LookupTable) -> dict:
+    table = lookup_table(record.name)
+    return {
+        "id": record.id,
+        "name": record.name,
+        "entry_count": len(record.entries),
+        "on_missing": record.on_missing,
+        "loaded": table.loaded,
+        "version": table.version,
+        "updated_at": record.updated_at,
+    }
+
+
+@router.get("/lookup-tables")
+def list_lookup_tables(db: Session = Depends(get_db)):
+    records = db.query(LookupTable).order_by(LookupTable.name.asc()).all()
+    return [_serialize(record) for record in records]
+
+
+@router.put("/lookup-tables/{name}")
+def put_lookup_table(
+    name: str,
+    entries: dict = Body(..., embed=True),
+    on_missing: str = Body("error", embed=True),
+    db: Session = Depends(get_db),
+):
+    if on_missing not in LOOKUP_ON_MISSING:
+        raise api_error(422, "invalid_lookup_table", f"on_missing must be one of {', '.join(LOOKUP_ON_MISSING)}")
+
+    record = db.query(LookupTable).filter(LookupTable.name == name).first()
+    if record is None:
+        record = LookupTable(name=name)
+        db.add(record)
+    record.entries = entries
+    record.on_missing = on_missing
+    db.commit()
+    db.refresh(record)
+
+    load_lookup_table(record.name, record.entries, record.on_missing)
+    return _serialize(record)
+
+
+@router.post("/lookup-tables/reload")
+def reload_lookup_tables(db: Session = Depends(get_db)):
+    return {"reloaded": load_lookup_tables(db.query(LookupTable).all())}
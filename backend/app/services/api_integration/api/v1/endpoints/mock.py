@@ -13,3 +13,20 @@ def mock_erp_create_order(payload: dict):
         "received_at": datetime.now(timezone.utc).isoformat(),
         "received_payload": payload,
     }
+
+
+@router.post("/mock/erp/orders/bulk", status_code=201)
+def mock_erp_create_orders(payload: list[dict]):
+    received_at = datetime.now(timezone.utc).isoformat()
+    return {
+        "status": "accepted",
+        "results": [
+            {
+                "status": "accepted",
+                "erp_order_id": f"ERP-{uuid.uuid4().hex[:10].upper()}",
+                "received_at": received_at,
+                "received_payload": item,
+            }
+            for item in payload
+        ],
+    }
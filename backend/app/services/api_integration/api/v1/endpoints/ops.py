@@ -3,6 +3,9 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.services.api_integration.models import Run, DeadLetter, get_db
 from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.mapping_cache import mapping_result_cache
+from app.services.api_integration.services.event_router import event_routing_index
+from app.services.api_integration.connectors.http_pool import http_client_pool
 from app.services.api_integration.errors import api_error
 from app.services.api_integration.context import get_request_id
 
@@ -41,6 +44,7 @@ def get_run(run_id: str, db: Session = Depends(get_db)):
         "flow_id": run.flow_id,
         "status": run.status,
         "attempt_count": run.attempt_count,
+        "hedge_won": run.hedge_won,
         "http_status": run.http_status,
         "error_message": run.error_message,
         "duration_ms": run.duration_ms,
@@ -109,3 +113,69 @@ def get_metrics(db: Session = Depends(get_db)):
         "pending_dead_letters": pending_dlq,
         "success_rate": round(success_rate, 4),
     }
+
+
+@router.get("/ops/mapping-cache")
+def get_mapping_cache_stats():
+    return mapping_result_cache.stats()
+
+
+@router.delete("/ops/mapping-cache")
+def clear_mapping_cache(mapping_id: str | None = None):
+    return {"invalidated": mapping_result_cache.invalidate(mapping_id)}
+
+
+@router.get("/ops/routing")
+def get_routing_stats():
+    return event_routing_index.stats()
+
+
+@router.post("/ops/routing/rebuild")
+def rebuild_routing_index():
+    event_routing_index.rebuild()
+    return event_routing_index.stats()
+
+
+@router.get("/ops/run-queue")
+def get_run_queue_stats():
+    return flow_runner.queue.stats()
+
+
+@router.get("/ops/http-pool")
+def get_http_pool_stats():
+    return http_client_pool.stats()
+
+
+@router.get("/ops/rate-limits")
+def get_rate_limit_stats():
+    return flow_runner.rate_limiters.stats()
+
+
+@router.get("/ops/retry-budget")
+def get_retry_budget_stats():
+    return flow_runner.retry_budget.stats()
+
+
+@router.get("/ops/auth-tokens")
+def get_auth_token_stats():
+    return flow_runner.auth_manager.stats()
+
+
+@router.get("/ops/circuits")
+def get_circuit_stats():
+    return flow_runner.circuit_breaker.stats()
+
+
+@router.get("/ops/hedging")
+def get_hedging_stats():
+    return flow_runner.hedger.stats()
+
+
+@router.get("/ops/batching")
+def get_batching_stats():
+    return flow_runner.batcher.stats()
+
+
+@router.get("/ops/ingest-log")
+def get_ingest_log_stats():
+    return flow_runner.ingest_log.stats()
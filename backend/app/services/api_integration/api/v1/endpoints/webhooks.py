@@ -1,13 +1,32 @@
-from fastapi import APIRouter, Depends, Header, Request
+import json
+import math
+from collections.abc import AsyncIterator
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.config import (
+    WEBHOOK_BULK_CONCURRENCY,
+    WEBHOOK_BULK_MAX_CONCURRENCY,
+    WEBHOOK_BULK_MAX_LINE_BYTES,
+    WEBHOOK_INGEST_MODE,
+)
 from app.services.api_integration.models import get_db
-from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.flow_runner import BulkLineOutcome, flow_runner
+from app.services.api_integration.services.mapping_stream import JsonStreamError
+from app.services.api_integration.services.ndjson import NdjsonError, aiter_ndjson, spool_chunks
+from app.services.api_integration.services.run_queue import RunQueueFullError
 from app.services.api_integration.errors import api_error
 from app.services.api_integration.context import get_request_id
 
 router = APIRouter()
 
 
+def _queue_full_error(exc: RunQueueFullError) -> HTTPException:
+    error = api_error(429, "queue_full", str(exc))
+    error.headers = {"Retry-After": str(max(1, math.ceil(exc.retry_after_sec)))}
+    return error
+
+
 @router.post("/webhooks/{flow_id}", status_code=202)
 async def webhook_by_flow_id(
     flow_id: str,
@@ -17,6 +36,24 @@ async def webhook_by_flow_id(
 ):
     request_id = get_request_id(request)
 
+    if WEBHOOK_INGEST_MODE == "wal":
+        try:
+            entry = await flow_runner.ingest_by_id(db, flow_id=flow_id, source_payload=payload, request_id=request_id)
+        except RunQueueFullError as exc:
+            raise _queue_full_error(exc)
+        except ValueError as exc:
+            raise api_error(404, "flow_not_found", str(exc))
+        return {"run_id": entry.run_id(entry.target), "status": "ACCEPTED", "flow_id": entry.target, "ingest_seq": entry.seq}
+
+    if WEBHOOK_INGEST_MODE == "queue":
+        try:
+            run = flow_runner.enqueue_by_id(db, flow_id=flow_id, source_payload=payload, request_id=request_id)
+        except RunQueueFullError as exc:
+            raise _queue_full_error(exc)
+        except ValueError as exc:
+            raise api_error(404, "flow_not_found", str(exc))
+        return {"run_id": run.id, "status": run.status, "flow_id": run.flow_id}
+
     try:
         run = await flow_runner.run_by_id(db, flow_id=flow_id, source_payload=payload, request_id=request_id)
     except ValueError as exc:
@@ -27,6 +64,109 @@ async def webhook_by_flow_id(
     return {"run_id": run.id, "status": run.status, "flow_id": run.flow_id}
 
 
+@router.post("/webhooks/{flow_id}/stream", status_code=202)
+async def webhook_by_flow_id_streamed(
+    flow_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    request_id = get_request_id(request)
+
+    try:
+        run = await flow_runner.run_by_id_streamed(db, flow_id=flow_id, chunks=request.stream(), request_id=request_id)
+    except JsonStreamError as exc:
+        raise api_error(400, "invalid_json", str(exc))
+    except ValueError as exc:
+        raise api_error(404, "flow_not_found", str(exc))
+    except Exception as exc:
+        raise api_error(502, "flow_execution_failed", str(exc))
+
+    return {"run_id": run.id, "status": run.status, "flow_id": run.flow_id}
+
+
+def _bulk_counts(counts: dict[str, int]) -> dict:
+    return {
+        "total": sum(counts.values()),
+        "succeeded": counts.get("SUCCEEDED", 0),
+        "failed": counts.get("FAILED", 0),
+        "invalid": counts.get("INVALID", 0),
+    }
+
+
+def _outcome_dict(outcome: BulkLineOutcome) -> dict:
+    return {
+        "line": outcome.line,
+        "run_id": outcome.run_id,
+        "status": outcome.status,
+        "error_message": outcome.error_message,
+    }
+
+
+async def _stream_bulk_results(flow_id: str, outcomes: AsyncIterator[BulkLineOutcome]) -> AsyncIterator[bytes]:
+    counts: dict[str, int] = {}
+    try:
+        async for outcome in outcomes:
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+            yield json.dumps(_outcome_dict(outcome)).encode() + b"\n"
+    except NdjsonError as exc:
+        # Headers are already sent, so the error travels as the last line instead of a status code.
+        yield json.dumps({"error": {"code": "invalid_ndjson", "message": str(exc)}}).encode() + b"\n"
+    yield json.dumps({"summary": {"flow_id": flow_id, **_bulk_counts(counts)}}).encode() + b"\n"
+
+
+@router.post("/webhooks/{flow_id}/bulk")
+async def webhook_bulk(
+    flow_id: str,
+    request: Request,
+    stream: bool = False,
+    concurrency: int = Query(default=WEBHOOK_BULK_CONCURRENCY, ge=1, le=WEBHOOK_BULK_MAX_CONCURRENCY),
+    content_encoding: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Run one source event per NDJSON line (optionally gzip-encoded) and report a result per line.
+
+    With ``stream=true`` the body is spooled to disk first and results are streamed back as NDJSON
+    in completion order, followed by a ``summary`` line; otherwise lines run while the body is
+    still uploading and a single summary with results in line order is returned.
+    """
+    request_id = get_request_id(request)
+    chunks = await spool_chunks(request.stream()) if stream else request.stream()
+    lines = aiter_ndjson(
+        chunks,
+        gzip=(content_encoding or "").strip().lower() == "gzip",
+        max_line_bytes=WEBHOOK_BULK_MAX_LINE_BYTES,
+    )
+
+    try:
+        outcomes = flow_runner.run_bulk_by_id(
+            db, flow_id=flow_id, lines=lines, request_id=request_id, concurrency=concurrency
+        )
+    except ValueError as exc:
+        raise api_error(404, "flow_not_found", str(exc))
+
+    if stream:
+        return StreamingResponse(_stream_bulk_results(flow_id, outcomes), media_type="application/x-ndjson")
+
+    results: list[BulkLineOutcome] = []
+    counts: dict[str, int] = {}
+    body_error: NdjsonError | None = None
+    try:
+        async for outcome in outcomes:
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+            results.append(outcome)
+    except NdjsonError as exc:
+        if not results:
+            raise api_error(400, "invalid_ndjson", str(exc))
+        # Earlier lines already ran: report them, plus where the body stopped being readable.
+        body_error = exc
+
+    results.sort(key=lambda outcome: outcome.line)
+    response = {"flow_id": flow_id, **_bulk_counts(counts), "results": [_outcome_dict(o) for o in results]}
+    if body_error is not None:
+        response["error"] = {"code": "invalid_ndjson", "message": str(body_error)}
+    return response
+
+
 @router.post("/webhooks/shopify/orders-create", status_code=202)
 async def shopify_orders_create(
     payload: dict,
@@ -37,11 +177,54 @@ async def shopify_orders_create(
     event_name = (x_shopify_topic or "orders/create").strip() or "orders/create"
     request_id = get_request_id(request)
 
+    if WEBHOOK_INGEST_MODE == "wal":
+        try:
+            entry = await flow_runner.ingest_by_event(event_name=event_name, source_payload=payload, request_id=request_id)
+        except RunQueueFullError as exc:
+            raise _queue_full_error(exc)
+        except ValueError as exc:
+            raise api_error(404, "flow_not_found", str(exc))
+        return {"status": "ACCEPTED", "event_name": event_name, "ingest_seq": entry.seq}
+
+    if WEBHOOK_INGEST_MODE == "queue":
+        try:
+            runs = flow_runner.enqueue_by_event(db, event_name=event_name, source_payload=payload, request_id=request_id)
+        except RunQueueFullError as exc:
+            raise _queue_full_error(exc)
+        except ValueError as exc:
+            raise api_error(404, "flow_not_found", str(exc))
+        return {
+            "run_id": runs[0].id,
+            "status": "QUEUED",
+            "flow_id": runs[0].flow_id,
+            "event_name": event_name,
+            "total": len(runs),
+            "runs": [{"flow_id": run.flow_id, "run_id": run.id, "status": run.status} for run in runs],
+        }
+
     try:
-        run = await flow_runner.run_by_event(db, event_name=event_name, source_payload=payload, request_id=request_id)
+        outcomes = await flow_runner.run_by_event(event_name=event_name, source_payload=payload, request_id=request_id)
     except ValueError as exc:
         raise api_error(404, "flow_not_found", str(exc))
     except Exception as exc:
         raise api_error(502, "flow_execution_failed", str(exc))
 
-    return {"run_id": run.id, "status": run.status, "flow_id": run.flow_id}
+    succeeded = sum(1 for outcome in outcomes if outcome.status == "SUCCEEDED")
+    # Failed flows are already dead-lettered; only ask the sender to retry when nothing went through.
+    if not succeeded:
+        raise api_error(502, "flow_execution_failed", "; ".join(o.error_message or "failed" for o in outcomes))
+
+    first = outcomes[0]
+    return {
+        "run_id": first.run_id,
+        "status": "SUCCEEDED" if succeeded == len(outcomes) else "PARTIAL",
+        "flow_id": first.flow_id,
+        "event_name": event_name,
+        "total": len(outcomes),
+        "succeeded": succeeded,
+        "failed": len(outcomes) - succeeded,
+        "runs": [
+            {"flow_id": o.flow_id, "run_id": o.run_id, "status": o.status, "error_message": o.error_message}
+            for o in outcomes
+        ],
+    }
@@ -4,6 +4,7 @@ from app.services.api_integration.api.v1.endpoints.webhooks import router as web
 from app.services.api_integration.api.v1.endpoints.flows import router as flows_router
 from app.services.api_integration.api.v1.endpoints.ops import router as ops_router
 from app.services.api_integration.api.v1.endpoints.mock import router as mock_router
+from app.services.api_integration.api.v1.endpoints.lookup_tables import router as lookup_tables_router
 
 router = APIRouter(prefix="/api/v1/api-integration", tags=["api-integration"])
 router.include_router(use_cases_router)
@@ -11,3 +12,4 @@ router.include_router(webhooks_router)
 router.include_router(flows_router)
 router.include_router(ops_router)
 router.include_router(mock_router)
+router.include_router(lookup_tables_router)
@@ -1,3 +1,4 @@
 from .rest_client import RestClient, RestCallResult
+from .http_pool import HttpClientPool, http_client_pool
 
-__all__ = ["RestClient", "RestCallResult"]
+__all__ = ["RestClient", "RestCallResult", "HttpClientPool", "http_client_pool"]
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.config import (
+    HTTP_POOL_HTTP2,
+    HTTP_POOL_KEEPALIVE_EXPIRY_SEC,
+    HTTP_POOL_MAX_CONNECTIONS,
+    HTTP_POOL_MAX_KEEPALIVE,
+    HTTP_POOL_TIMEOUT_SEC,
+)
+
+logger = logging.getLogger("synapseops.http_pool")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientPool:
+    """Long-lived ``httpx.AsyncClient`` per connector, so attempts and runs reuse TCP/TLS connections.
+
+    Clients are created on first use and bound to the running event loop; clients left over from
+    another loop are closed on that loop if it still runs (logged and dropped otherwise), never
+    reused. ``aclose`` closes every client (app shutdown).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_sec: float = 30.0,
+        http2: bool = False,
+        timeout_sec: float = 15.0,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_sec,
+        )
+        self.http2 = http2
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            self.http2 = False
+        self.timeout_sec = timeout_sec
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._requests: dict[str, int] = {}
+        self._created_at: dict[str, float] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.clients_created = 0
+
+    def open(self) -> None:
+        self._bind_loop()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            stale, old_loop = self._clients, self._loop
+            self._clients = {}
+            self._loop = loop
+            if stale:
+                self._discard(stale, old_loop)
+
+    @staticmethod
+    def _discard(
+        clients: dict[str, httpx.AsyncClient], loop: asyncio.AbstractEventLoop | None
+    ) -> None:
+        # A client's connections belong to the loop that opened them; only that loop can close them.
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            for client in clients.values():
+                loop.call_soon_threadsafe(loop.create_task, client.aclose())
+            return
+        logger.warning(
+            "Discarded %d HTTP client(s) from a stopped event loop; sockets are released on GC",
+            len(clients),
+        )
+
+    def client(self, key: str) -> httpx.AsyncClient:
+        self._bind_loop()
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=self.timeout_sec, limits=self.limits, http2=self.http2)
+            self._clients[key] = client
+            self._created_at[key] = time.time()
+            self.clients_created += 1
+        self._requests[key] = self._requests.get(key, 0) + 1
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
+        self._loop = None
+
+    def stats(self) -> dict:
+        connectors = {}
+        for key, client in self._clients.items():
+            # httpcore's pool is not part of httpx's public API, so connection counts are best-effort.
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+            idle = sum(1 for connection in connections if connection.is_idle())
+            connectors[key] = {
+                "requests": self._requests.get(key, 0),
+                "connections": len(connections),
+                "idle_connections": idle,
+                "active_connections": len(connections) - idle,
+                "created_at": self._created_at.get(key),
+            }
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_sec": self.limits.keepalive_expiry,
+            "clients_created": self.clients_created,
+            "connectors": connectors,
+        }
+
+
+http_client_pool = HttpClientPool(
+    max_connections=HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+    keepalive_expiry_sec=HTTP_POOL_KEEPALIVE_EXPIRY_SEC,
+    http2=HTTP_POOL_HTTP2,
+    timeout_sec=HTTP_POOL_TIMEOUT_SEC,
+)
@@ -1,80 +1,168 @@
 import asyncio
 import json
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
 import httpx
 from pydantic import BaseModel
 from app.services.api_integration.models import Endpoint
-from app.services.api_integration.recovery.policy import RetryPolicy, backoff_seconds, should_retry_status, RetryExhaustedError
-from app.services.api_integration.recovery.circuit import CircuitBreaker, CircuitOpenError
+from app.services.api_integration.connectors.http_pool import HttpClientPool, http_client_pool
+from app.services.api_integration.recovery.policy import (
+    RetryExhaustedError,
+    RetryPolicy,
+    backoff_seconds,
+    retry_after_seconds,
+    should_retry_status,
+)
+from app.services.api_integration.recovery.circuit import CircuitBreaker, CircuitOpenError, CircuitPolicy
+from app.services.api_integration.recovery.limiter import RateLimiterRegistry
+from app.services.api_integration.recovery.budget import RetryBudget, RetryBudgetExhaustedError
+from app.services.api_integration.recovery.hedging import RequestHedger
+
+# Signs one outgoing body: (method, path, body) -> extra headers. See services.request_signing.HmacSigner.
+RequestSigner = Callable[[str, str, bytes], Iterable[tuple[str, str]]]
 
 
 class RestCallResult(BaseModel):
     status_code: int
-    payload: dict | str | None
+    payload: dict | list | str | None
     attempt_count: int
+    hedge_won: bool | None = None  # None: no hedge was sent
 
 
 class RestClient:
-    def __init__(self, circuit_breaker: CircuitBreaker) -> None:
+    def __init__(
+        self,
+        circuit_breaker: CircuitBreaker,
+        http_pool: HttpClientPool = http_client_pool,
+        limiters: RateLimiterRegistry | None = None,
+        retry_budget: RetryBudget | None = None,
+        hedger: RequestHedger | None = None,
+    ) -> None:
         self._circuit = circuit_breaker
+        self._http_pool = http_pool
+        self.limiters = limiters or RateLimiterRegistry()
+        self._retry_budget = retry_budget
+        self._hedger = hedger
 
     async def request(
         self,
         endpoint: Endpoint,
         base_url: str,
-        payload: dict,
-        headers: dict[str, str],
+        payload: dict | list | None,
+        headers: dict[str, str] | Iterable[tuple[str, str]],
         retry_policy: RetryPolicy,
-        failure_threshold: int,
-        recovery_timeout_sec: float,
-        request_id: str,
+        failure_threshold: int = 3,
+        recovery_timeout_sec: float = 5.0,
+        request_id: str = "",
+        content: Callable[[], AsyncIterator[bytes]] | None = None,
+        circuit_policy: CircuitPolicy | None = None,
+        signer: RequestSigner | None = None,
     ) -> RestCallResult:
-        url = f"{base_url.rstrip('/')}/{endpoint.path.lstrip('/')}"
         circuit_key = endpoint.id
+        circuit_policy = circuit_policy or CircuitPolicy(
+            failure_threshold=failure_threshold, recovery_timeout_sec=recovery_timeout_sec
+        )
+        url = f"{base_url.rstrip('/')}/{endpoint.path.lstrip('/')}"
         attempts = 0
         last_error: str | None = None
+        delay: float | None = None
+        signed_body: bytes | None = None
 
         for attempt in range(1, retry_policy.max_attempts + 1):
             attempts = attempt
-            if not self._circuit.allow_request(circuit_key, recovery_timeout_sec):
+            retry_after: float | None = None
+            # Before any header or body work, so a rejected call costs next to nothing.
+            if not self._circuit.allow_request(circuit_key, circuit_policy):
                 raise CircuitOpenError("Circuit is open")
+            if attempt == 1 and self._retry_budget is not None:
+                self._retry_budget.record_attempt(circuit_key)
 
+            sent_at = [time.monotonic()]
             try:
                 merged_headers = dict(headers)
                 merged_headers["X-Request-Id"] = request_id
+                if content is not None or signer is not None:
+                    merged_headers["Content-Type"] = "application/json"
+                if signer is not None and signed_body is None:
+                    # The signature covers the exact bytes sent, so the body is serialized (or buffered) once.
+                    signed_body = await _body_bytes(payload, content)
+                client = self._http_pool.client(endpoint.connector.id)
+                limiters: list = []
 
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    response = await client.request(
-                        endpoint.method.upper(),
-                        url,
-                        json=payload,
-                        headers=merged_headers,
-                    )
+                async def send() -> httpx.Response:
+                    send_headers = merged_headers
+                    if signed_body is not None:
+                        # Signed per send, so every retry and hedge carries a fresh timestamp.
+                        body = {"content": signed_body}
+                        send_headers = {
+                            **merged_headers,
+                            **dict(signer(endpoint.method.upper(), httpx.URL(url).raw_path.decode(), signed_body)),
+                        }
+                    elif content is not None:
+                        # A streamed body is re-opened for every send, so retries and hedges resend it from the start.
+                        body = {"content": content()}
+                    else:
+                        body = {"json": payload}
+                    # Waiting here, in order, is what keeps a burst of runs from turning into a burst of 429s.
+                    async with self.limiters.slot(endpoint) as acquired:
+                        limiters[:] = acquired
+                        # Slow-call timing starts once the limiters let us through, not while queued behind them.
+                        sent_at[0] = time.monotonic()
+                        return await client.request(endpoint.method.upper(), url, headers=send_headers, **body)
+
+                if self._hedger is not None:
+                    response, hedge_won = await self._hedger.call(endpoint, send)
+                else:
+                    response, hedge_won = await send(), None
 
                 if response.status_code < 400:
-                    self._circuit.record_success(circuit_key)
+                    self._circuit.record_success(circuit_key, circuit_policy, time.monotonic() - sent_at[0])
                     return RestCallResult(
                         status_code=response.status_code,
                         payload=_response_payload(response),
                         attempt_count=attempts,
+                        hedge_won=hedge_won,
                     )
 
                 last_error = f"HTTP {response.status_code}"
-                self._circuit.record_failure(circuit_key, failure_threshold)
+                self._circuit.record_failure(circuit_key, circuit_policy, time.monotonic() - sent_at[0])
+                if response.status_code in (429, 503):
+                    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                    if retry_after is not None and retry_after > retry_policy.max_retry_after_sec:
+                        last_error = f"HTTP {response.status_code} (Retry-After {retry_after:g}s)"
+                        break
+                if response.status_code == 429:
+                    pushback = retry_after if retry_after is not None else backoff_seconds(retry_policy, attempt)
+                    for limiter in limiters:
+                        limiter.throttle(pushback)
                 if not should_retry_status(response.status_code) or attempt == retry_policy.max_attempts:
                     break
 
             except Exception as exc:
                 last_error = str(exc)
-                self._circuit.record_failure(circuit_key, failure_threshold)
+                self._circuit.record_failure(circuit_key, circuit_policy, time.monotonic() - sent_at[0])
                 if attempt == retry_policy.max_attempts:
                     break
 
-            await asyncio.sleep(backoff_seconds(retry_policy, attempt))
+            if self._retry_budget is not None and not self._retry_budget.try_retry(circuit_key):
+                # Too many retries against this target lately: fail now and let the dead-letter queue hold it.
+                raise RetryBudgetExhaustedError(f"{last_error or 'Request failed'} (retry budget exhausted)")
+
+            delay = backoff_seconds(retry_policy, attempt, delay)
+            await asyncio.sleep(delay if retry_after is None else max(delay, retry_after))
 
         raise RetryExhaustedError(last_error or "Request failed")
 
 
-def _response_payload(response: httpx.Response) -> dict | str | None:
+async def _body_bytes(
+    payload: dict | list | None, content: Callable[[], AsyncIterator[bytes]] | None
+) -> bytes:
+    if content is not None:
+        return b"".join([chunk async for chunk in content()])
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _response_payload(response: httpx.Response) -> dict | list | str | None:
     if not response.content:
         return None
     try:
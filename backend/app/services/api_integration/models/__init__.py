@@ -6,6 +6,7 @@ from .mapping import Mapping
 from .flow import Flow
 from .run import Run
 from .dead_letter import DeadLetter
+from .lookup_table import LookupTable
 
 __all__ = [
     "Base",
@@ -18,4 +19,5 @@ __all__ = [
     "Flow",
     "Run",
     "DeadLetter",
+    "LookupTable",
 ]
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, Boolean
+from sqlalchemy import String, DateTime, Boolean, Integer, Float
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -13,6 +13,10 @@ class Connector(Base):
     protocol: Mapped[str] = mapped_column(String(40), nullable=False)
     base_url: Mapped[str | None] = mapped_column(String(512), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Outbound limits shared by every endpoint of this connector; 0 = unlimited.
+    max_concurrency: Mapped[int] = mapped_column(Integer, default=0)
+    rate_limit_per_sec: Mapped[float] = mapped_column(Float, default=0.0)
+    rate_limit_burst: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, Boolean, ForeignKey
+from sqlalchemy import String, DateTime, Boolean, ForeignKey, Integer, Float
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -16,6 +16,12 @@ class Endpoint(Base):
     path: Mapped[str] = mapped_column(String(255), nullable=False)
     event_name: Mapped[str | None] = mapped_column(String(120), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Outbound limits for this endpoint alone, applied on top of the connector's; 0 = unlimited.
+    max_concurrency: Mapped[int] = mapped_column(Integer, default=0)
+    rate_limit_per_sec: Mapped[float] = mapped_column(Float, default=0.0)
+    rate_limit_burst: Mapped[int] = mapped_column(Integer, default=0)
+    # Send a second copy of requests still pending at the observed p95; only honored for idempotent methods.
+    hedge_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     connector: Mapped["Connector"] = relationship(back_populates="endpoints")
@@ -19,8 +19,23 @@ class Flow(Base):
     retry_max_attempts: Mapped[int] = mapped_column(Integer, default=3)
     retry_base_delay_sec: Mapped[float] = mapped_column(Float, default=0.25)
     retry_max_delay_sec: Mapped[float] = mapped_column(Float, default=2.0)
+    retry_jitter: Mapped[str] = mapped_column(String(20), default="full")  # none|full|decorrelated
     circuit_failure_threshold: Mapped[int] = mapped_column(Integer, default=3)
     circuit_recovery_timeout_sec: Mapped[float] = mapped_column(Float, default=5.0)
+    circuit_mode: Mapped[str] = mapped_column(String(20), default="consecutive")  # consecutive|rate
+    circuit_half_open_probes: Mapped[int] = mapped_column(Integer, default=1)
+    # Rate mode: open once min_calls are in the window and either rate crosses its threshold.
+    circuit_window_type: Mapped[str] = mapped_column(String(10), default="count")  # count|time
+    circuit_window_size: Mapped[int] = mapped_column(Integer, default=20)  # calls, or seconds for time windows
+    circuit_min_calls: Mapped[int] = mapped_column(Integer, default=10)
+    circuit_failure_rate: Mapped[float] = mapped_column(Float, default=0.5)
+    circuit_slow_call_ms: Mapped[int] = mapped_column(Integer, default=0)  # 0 = slow calls not tracked
+    circuit_slow_call_rate: Mapped[float] = mapped_column(Float, default=0.5)
+
+    # Target-side micro-batching; batch_max_items <= 1 sends every run on its own.
+    batch_max_items: Mapped[int] = mapped_column(Integer, default=1)
+    batch_max_bytes: Mapped[int] = mapped_column(Integer, default=0)  # 0 = no byte limit
+    batch_linger_ms: Mapped[int] = mapped_column(Integer, default=0)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(
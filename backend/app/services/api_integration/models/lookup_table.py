@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+
+class LookupTable(Base):
+    __tablename__ = "ai_lookup_tables"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name: Mapped[str] = mapped_column(String(120), nullable=False, unique=True)
+    entries: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    on_missing: Mapped[str] = mapped_column(String(20), default="error", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
@@ -0,0 +1,65 @@
+import logging
+from sqlalchemy import Column, Engine, inspect, literal, text
+from .base import Base
+
+logger = logging.getLogger("synapseops.migrations")
+
+# Columns added to tables that databases from earlier releases already have. ``create_all`` only
+# creates missing tables, so each of these is added by ``upgrade_schema`` when it is absent.
+# Append new columns here in the same change that adds them to a model.
+ADDED_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("ai_flows", "batch_max_items"),
+    ("ai_flows", "batch_max_bytes"),
+    ("ai_flows", "batch_linger_ms"),
+    ("ai_connectors", "max_concurrency"),
+    ("ai_connectors", "rate_limit_per_sec"),
+    ("ai_connectors", "rate_limit_burst"),
+    ("ai_endpoints", "max_concurrency"),
+    ("ai_endpoints", "rate_limit_per_sec"),
+    ("ai_endpoints", "rate_limit_burst"),
+    ("ai_flows", "retry_jitter"),
+    ("ai_endpoints", "hedge_enabled"),
+    ("ai_runs", "hedge_won"),
+    ("ai_flows", "circuit_mode"),
+    ("ai_flows", "circuit_half_open_probes"),
+    ("ai_flows", "circuit_window_type"),
+    ("ai_flows", "circuit_window_size"),
+    ("ai_flows", "circuit_min_calls"),
+    ("ai_flows", "circuit_failure_rate"),
+    ("ai_flows", "circuit_slow_call_ms"),
+    ("ai_flows", "circuit_slow_call_rate"),
+)
+
+
+def _column_ddl(column: Column, engine: Engine) -> str:
+    dialect = engine.dialect
+    ddl = f"{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        rendered = literal(default, column.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {rendered}"
+    if not column.nullable:
+        if default is None:
+            raise RuntimeError(f"{column.table.name}.{column.name} is NOT NULL without a scalar default")
+        ddl += " NOT NULL"
+    return ddl
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """Add every ``ADDED_COLUMNS`` entry the database is missing; returns the ``table.column`` names added."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {table: {column["name"] for column in inspector.get_columns(table)} for table in tables}
+
+    added = []
+    with engine.begin() as connection:
+        for table_name, column_name in ADDED_COLUMNS:
+            if table_name not in tables or column_name in existing[table_name]:
+                continue
+            column = Base.metadata.tables[table_name].columns[column_name]
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {_column_ddl(column, engine)}"))
+            existing[table_name].add(column_name)
+            added.append(f"{table_name}.{column_name}")
+    for name in added:
+        logger.info("Added missing column %s", name)
+    return added
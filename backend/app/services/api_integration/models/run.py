@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, JSON, Integer, Text
+from sqlalchemy import String, DateTime, ForeignKey, JSON, Integer, Text, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -17,6 +17,7 @@ class Run(Base):
     target_response: Mapped[dict | str | None] = mapped_column(JSON, nullable=True)
     http_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
     attempt_count: Mapped[int] = mapped_column(Integer, default=0)
+    hedge_won: Mapped[bool | None] = mapped_column(Boolean, nullable=True)  # None: no hedge was sent
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
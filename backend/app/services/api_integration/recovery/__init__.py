@@ -1,11 +1,28 @@
-from .policy import RetryPolicy, RetryExhaustedError, backoff_seconds, should_retry_status
-from .circuit import CircuitBreaker, CircuitOpenError
+from .policy import RetryPolicy, RetryExhaustedError, backoff_seconds, retry_after_seconds, should_retry_status
+from .circuit import CircuitBreaker, CircuitOpenError, CircuitPolicy
+from .limiter import RateLimiterRegistry, TargetLimiter
+from .budget import RetryBudget, RetryBudgetExhaustedError
+from .hedging import IDEMPOTENT_METHODS, LatencyTracker, RequestHedger
+from .state import RedisStateBackend, SharedMemoryStateBackend, StateBackend, build_state_backend
 
 __all__ = [
     "RetryPolicy",
     "RetryExhaustedError",
     "backoff_seconds",
+    "retry_after_seconds",
     "should_retry_status",
     "CircuitBreaker",
     "CircuitOpenError",
+    "CircuitPolicy",
+    "RateLimiterRegistry",
+    "RetryBudget",
+    "RetryBudgetExhaustedError",
+    "TargetLimiter",
+    "IDEMPOTENT_METHODS",
+    "LatencyTracker",
+    "RequestHedger",
+    "StateBackend",
+    "SharedMemoryStateBackend",
+    "RedisStateBackend",
+    "build_state_backend",
 ]
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from .policy import RetryExhaustedError
+
+
+class RetryBudgetExhaustedError(RetryExhaustedError):
+    pass
+
+
+@dataclass
+class _Window:
+    # [bucket index, first attempts, retries], oldest first
+    buckets: deque = field(default_factory=deque)
+    first_attempts: int = 0
+    retries: int = 0
+    rejected: int = 0
+
+
+class RetryBudget:
+    """Per-target cap on retries relative to recent first attempts, over a sliding window.
+
+    A retry is allowed while ``retries < ratio * first_attempts + min_retries`` within the last
+    ``window_sec``. ``min_retries`` keeps quiet targets retryable; ``ratio`` keeps a struggling
+    busy target from receiving (1 + max_attempts) times its normal load.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        window_sec: float = 10.0,
+        min_retries: int = 10,
+        buckets: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ratio = ratio
+        self.window_sec = window_sec
+        self.min_retries = min_retries
+        self._bucket_sec = window_sec / max(1, buckets)
+        self._buckets = max(1, buckets)
+        self._clock = clock
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, key: str) -> _Window:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+        bucket = int(self._clock() / self._bucket_sec)
+        while window.buckets and window.buckets[0][0] <= bucket - self._buckets:
+            _, first_attempts, retries = window.buckets.popleft()
+            window.first_attempts -= first_attempts
+            window.retries -= retries
+        if not window.buckets or window.buckets[-1][0] != bucket:
+            window.buckets.append([bucket, 0, 0])
+        return window
+
+    def _allowance(self, window: _Window) -> float:
+        return self.ratio * window.first_attempts + self.min_retries
+
+    def record_attempt(self, key: str) -> None:
+        with self._lock:
+            window = self._window(key)
+            window.buckets[-1][1] += 1
+            window.first_attempts += 1
+
+    def try_retry(self, key: str) -> bool:
+        """Spend one retry from the budget; False (and nothing spent) when it is exhausted."""
+        with self._lock:
+            window = self._window(key)
+            if window.retries + 1 > self._allowance(window):
+                window.rejected += 1
+                return False
+            window.buckets[-1][2] += 1
+            window.retries += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            targets = {}
+            for key in list(self._windows):
+                window = self._window(key)
+                allowance = self._allowance(window)
+                targets[key] = {
+                    "first_attempts": window.first_attempts,
+                    "retries": window.retries,
+                    "allowance": round(allowance, 2),
+                    "utilization": round(window.retries / allowance, 4) if allowance else 0.0,
+                    "rejected_total": window.rejected,
+                }
+        return {
+            "ratio": self.ratio,
+            "window_sec": self.window_sec,
+            "min_retries": self.min_retries,
+            "targets": targets,
+        }
@@ -1,50 +1,337 @@
+import asyncio
+import logging
+import math
 import time
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from .state import StateBackend
+
+logger = logging.getLogger("synapseops.circuit")
+
+CIRCUIT_MODES = ("consecutive", "rate")
+CIRCUIT_WINDOW_TYPES = ("count", "time")
+
+_FAILED = 1
+_SLOW = 2
+_RECORDED = 4
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
 
 
 class CircuitOpenError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class CircuitPolicy:
+    # consecutive: open after failure_threshold failures in a row; rate: open on the window's failure/slow rates.
+    mode: str = "consecutive"
+    failure_threshold: int = 3
+    recovery_timeout_sec: float = 5.0
+    # Requests admitted at once while HALF_OPEN; that many successful probes close the circuit again.
+    half_open_probes: int = 1
+    window_type: str = "count"
+    window_size: int = 20  # calls (count) or seconds (time)
+    min_calls: int = 10
+    failure_rate_threshold: float = 0.5
+    slow_call_sec: float = 0.0  # 0 = slow calls are not tracked
+    slow_call_rate_threshold: float = 0.5
+
+    def __post_init__(self) -> None:
+        if self.mode not in CIRCUIT_MODES:
+            raise ValueError(f"Unsupported circuit mode: {self.mode}")
+        if self.window_type not in CIRCUIT_WINDOW_TYPES:
+            raise ValueError(f"Unsupported circuit window type: {self.window_type}")
+
+
+class _CountWindow:
+    """Outcomes of the last ``size`` calls in a ring buffer, with running totals."""
+
+    def __init__(self, size: int) -> None:
+        self._outcomes = bytearray(max(1, size))
+        self._next = 0
+        self.calls = self.failures = self.slow = 0
+
+    def record(self, outcome: int, now: float) -> None:
+        old = self._outcomes[self._next]
+        if old:
+            self.calls -= 1
+            self.failures -= bool(old & _FAILED)
+            self.slow -= bool(old & _SLOW)
+        self._outcomes[self._next] = outcome | _RECORDED
+        self._next = (self._next + 1) % len(self._outcomes)
+        self.calls += 1
+        self.failures += bool(outcome & _FAILED)
+        self.slow += bool(outcome & _SLOW)
+
+    def totals(self, now: float) -> tuple[int, int, int]:
+        return self.calls, self.failures, self.slow
+
+
+class _TimeWindow:
+    """Outcomes of the last ``size`` seconds in a ring of one-second buckets."""
+
+    def __init__(self, size: int) -> None:
+        # [second, calls, failures, slow]
+        self._buckets = [[-1, 0, 0, 0] for _ in range(max(1, size))]
+
+    def record(self, outcome: int, now: float) -> None:
+        second = int(now)
+        bucket = self._buckets[second % len(self._buckets)]
+        if bucket[0] != second:
+            bucket[:] = [second, 0, 0, 0]
+        bucket[1] += 1
+        bucket[2] += bool(outcome & _FAILED)
+        bucket[3] += bool(outcome & _SLOW)
+
+    def totals(self, now: float) -> tuple[int, int, int]:
+        oldest = int(now) - len(self._buckets)
+        calls = failures = slow = 0
+        for second, bucket_calls, bucket_failures, bucket_slow in self._buckets:
+            if second > oldest:
+                calls += bucket_calls
+                failures += bucket_failures
+                slow += bucket_slow
+        return calls, failures, slow
+
+
 @dataclass
 class CircuitState:
     failure_count: int = 0
     opened_at: float | None = None
     state: str = "CLOSED"  # CLOSED | OPEN | HALF_OPEN
+    half_opened_at: float = 0.0
+    probes_in_flight: int = 0
+    probe_successes: int = 0
+    # One window per (type, size) asked for by the flows targeting this key; outcomes go to all.
+    windows: dict[tuple[str, int], _CountWindow | _TimeWindow] = field(
+        default_factory=dict, repr=False
+    )
+    window_shape: tuple[str, int] | None = None  # shape of the last window evaluated
+    changed_at: float = 0.0  # wall clock of the last OPEN/CLOSED transition, comparable across processes
+    synced_at: float = -math.inf
 
 
 class CircuitBreaker:
-    def __init__(self) -> None:
+    """Per-target breaker: CLOSED -> OPEN on failures, OPEN -> HALF_OPEN after the recovery timeout.
+
+    HALF_OPEN admits at most ``half_open_probes`` requests at a time; everyone else keeps failing
+    fast, so a recovering target sees a trickle instead of the whole backlog at once.
+
+    With a shared ``backend``, OPEN and CLOSED transitions are published to it and adopted from it
+    by every worker process. Reads of the shared state happen at most once per ``sync_interval_sec``
+    per target, so the hot path stays a local dict lookup; windows and probes stay per process.
+    For a ``blocking`` backend (Redis) both run in a worker thread and a read is adopted when it
+    lands, so the event loop never waits on the network.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        backend: StateBackend | None = None,
+        sync_interval_sec: float = 0.5,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
         self._states: dict[str, CircuitState] = {}
+        self._clock = clock
+        self._backend = backend
+        self._sync_interval_sec = sync_interval_sec
+        self._wall_clock = wall_clock
 
     def _get_state(self, key: str) -> CircuitState:
         if key not in self._states:
             self._states[key] = CircuitState()
         return self._states[key]
 
-    def allow_request(self, key: str, recovery_timeout_sec: float) -> bool:
-        state = self._get_state(key)
-        if state.state != "OPEN":
-            return True
+    def _window(self, state: CircuitState, policy: CircuitPolicy) -> _CountWindow | _TimeWindow:
+        shape = (policy.window_type, policy.window_size)
+        window = state.windows.get(shape)
+        if window is None:
+            window_type = _CountWindow if policy.window_type == "count" else _TimeWindow
+            window = state.windows[shape] = window_type(policy.window_size)
+        state.window_shape = shape
+        return window
 
-        if state.opened_at is None:
+    def _sync(self, key: str, state: CircuitState) -> None:
+        now = self._clock()
+        if now - state.synced_at < self._sync_interval_sec:
+            return
+        state.synced_at = now
+        loop = _running_loop() if self._backend.blocking else None
+        if loop is None:
+            self._adopt(key, state, self._backend.load_circuit(key))
+            return
+
+        def _loaded(future: asyncio.Future) -> None:
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                logger.warning("Reading circuit state for %s failed: %s", key, future.exception())
+                return
+            self._adopt(key, state, future.result())
+
+        loop.run_in_executor(None, self._backend.load_circuit, key).add_done_callback(_loaded)
+
+    def _adopt(self, key: str, state: CircuitState, shared: tuple[str, float] | None) -> None:
+        if shared is None or shared[1] <= state.changed_at:
+            return
+        now = self._clock()
+        # Another worker saw the newer transition: take it over, aging opened_at by how long ago it happened.
+        shared_state, changed_at = shared
+        if shared_state == "OPEN":
+            self._open(key, state, publish=False)
+            state.opened_at = now - max(0.0, self._wall_clock() - changed_at)
+        elif shared_state == "CLOSED" and state.state != "CLOSED":
+            self._close(key, state, publish=False)
+        state.changed_at = changed_at
+
+    def is_open(self, key: str, policy: CircuitPolicy) -> bool:
+        """True when a request would be rejected right now; never blocks and never admits a probe.
+
+        With a shared backend this may start a refresh of ``key``'s state from it (see ``_sync``).
+        """
+        state = self._states.get(key)
+        if self._backend is not None:
+            state = self._get_state(key)
+            self._sync(key, state)
+        if state is None or state.state == "CLOSED":
             return False
+        now = self._clock()
+        if state.state == "OPEN":
+            return state.opened_at is None or now - state.opened_at < policy.recovery_timeout_sec
+        return (
+            state.probes_in_flight >= max(1, policy.half_open_probes)
+            and now - state.half_opened_at < policy.recovery_timeout_sec
+        )
 
-        elapsed = time.monotonic() - state.opened_at
-        if elapsed >= recovery_timeout_sec:
-            state.state = "HALF_OPEN"
+    def allow_request(self, key: str, policy: CircuitPolicy) -> bool:
+        state = self._get_state(key)
+        if self._backend is not None:
+            self._sync(key, state)
+        if state.state == "CLOSED":
             return True
-        return False
 
-    def record_success(self, key: str) -> None:
+        now = self._clock()
+        if state.state == "OPEN":
+            if state.opened_at is None or now - state.opened_at < policy.recovery_timeout_sec:
+                return False
+            self._half_open(state, now)
+        elif now - state.half_opened_at >= policy.recovery_timeout_sec:
+            # Probes that never reported back (cancelled runs) must not hold the circuit half-open forever.
+            self._half_open(state, now)
+
+        if state.probes_in_flight >= max(1, policy.half_open_probes):
+            return False
+        state.probes_in_flight += 1
+        return True
+
+    def record_success(self, key: str, policy: CircuitPolicy | None = None, duration_sec: float = 0.0) -> None:
+        policy = policy or CircuitPolicy()
         state = self._get_state(key)
+        slow = policy.mode == "rate" and 0 < policy.slow_call_sec <= duration_sec
+        if state.state == "HALF_OPEN":
+            state.probes_in_flight = max(0, state.probes_in_flight - 1)
+            if slow:
+                self._open(key, state)
+                return
+            state.probe_successes += 1
+            if state.probe_successes >= max(1, policy.half_open_probes):
+                self._close(key, state)
+            return
+        if state.state == "OPEN":
+            return
+
         state.failure_count = 0
-        state.opened_at = None
-        state.state = "CLOSED"
+        if policy.mode == "rate":
+            self._record_outcome(key, state, policy, _SLOW if slow else 0)
 
-    def record_failure(self, key: str, failure_threshold: int) -> None:
+    def record_failure(self, key: str, policy: CircuitPolicy | None = None, duration_sec: float = 0.0) -> None:
+        policy = policy or CircuitPolicy()
         state = self._get_state(key)
+        if state.state == "HALF_OPEN":
+            state.probes_in_flight = max(0, state.probes_in_flight - 1)
+            self._open(key, state)
+            return
+        if state.state == "OPEN":
+            return
+
         state.failure_count += 1
-        if state.failure_count >= failure_threshold:
-            state.state = "OPEN"
-            state.opened_at = time.monotonic()
+        if policy.mode == "rate":
+            slow = 0 < policy.slow_call_sec <= duration_sec
+            self._record_outcome(key, state, policy, _FAILED | (_SLOW if slow else 0))
+        elif state.failure_count >= max(1, policy.failure_threshold):
+            self._open(key, state)
+
+    def _record_outcome(self, key: str, state: CircuitState, policy: CircuitPolicy, outcome: int) -> None:
+        now = self._clock()
+        window = self._window(state, policy)
+        for each in state.windows.values():
+            each.record(outcome, now)
+        calls, failures, slow = window.totals(now)
+        if calls < max(1, policy.min_calls):
+            return
+        if failures / calls >= policy.failure_rate_threshold or (
+            policy.slow_call_sec > 0 and slow / calls >= policy.slow_call_rate_threshold
+        ):
+            self._open(key, state)
+
+    def _open(self, key: str, state: CircuitState, publish: bool = True) -> None:
+        state.state = "OPEN"
+        state.opened_at = self._clock()
+        state.probes_in_flight = 0
+        state.probe_successes = 0
+        if publish:
+            self._publish(key, state)
+
+    def _half_open(self, state: CircuitState, now: float) -> None:
+        state.state = "HALF_OPEN"
+        state.half_opened_at = now
+        state.probes_in_flight = 0
+        state.probe_successes = 0
+
+    def _close(self, key: str, state: CircuitState, publish: bool = True) -> None:
+        state.state = "CLOSED"
+        state.failure_count = 0
+        state.opened_at = None
+        state.probe_successes = 0
+        state.windows.clear()
+        if publish:
+            self._publish(key, state)
+
+    def _publish(self, key: str, state: CircuitState) -> None:
+        if self._backend is None:
+            return
+        state.changed_at = self._wall_clock()
+        loop = _running_loop() if self._backend.blocking else None
+        if loop is None:
+            self._backend.store_circuit(key, state.state, state.changed_at)
+            return
+
+        def _stored(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning("Publishing circuit state %s failed: %s", key, future.exception())
+
+        args = (key, state.state, state.changed_at)
+        loop.run_in_executor(None, self._backend.store_circuit, *args).add_done_callback(_stored)
+
+    def stats(self) -> dict:
+        now = self._clock()
+        targets = {}
+        for key, state in self._states.items():
+            window = state.windows.get(state.window_shape)
+            calls, failures, slow = window.totals(now) if window is not None else (0, 0, 0)
+            targets[key] = {
+                "state": state.state,
+                "consecutive_failures": state.failure_count,
+                "window_calls": calls,
+                "failure_rate": round(failures / calls, 4) if calls else 0.0,
+                "slow_call_rate": round(slow / calls, 4) if calls else 0.0,
+                "probes_in_flight": state.probes_in_flight,
+            }
+        return {"backend": self._backend.name if self._backend is not None else "local", "targets": targets}
@@ -0,0 +1,120 @@
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from .budget import RetryBudget
+
+T = TypeVar("T")
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class LatencyTracker:
+    """Latencies of the last ``size`` successful calls to one target."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class RequestHedger:
+    """Sends a second copy of a slow idempotent request and keeps whichever answers first.
+
+    The hedge fires once the first attempt has been outstanding longer than the target's
+    observed p95 (so roughly 5% of calls at most), and only while the hedge budget allows
+    it, which bounds the extra load a slow target receives.
+    """
+
+    def __init__(
+        self,
+        budget: RetryBudget,
+        min_samples: int = 20,
+        window: int = 200,
+        percentile: float = 0.95,
+    ) -> None:
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.percentile = percentile
+        self._latencies: dict[str, LatencyTracker] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        tracker = self._latencies.get(key)
+        if tracker is None:
+            tracker = self._latencies[key] = LatencyTracker(self.window)
+        return tracker
+
+    def _count(self, key: str, name: str) -> None:
+        counters = self._counters.setdefault(key, {"requests": 0, "hedges": 0, "hedges_won": 0, "denied": 0})
+        counters[name] += 1
+
+    def hedgeable(self, endpoint: Any) -> bool:
+        return bool(getattr(endpoint, "hedge_enabled", False)) and endpoint.method.upper() in IDEMPOTENT_METHODS
+
+    async def call(self, endpoint: Any, send: Callable[[], Awaitable[T]]) -> tuple[T, bool | None]:
+        """Return the first successful result and whether it came from the hedge (None: no hedge was sent)."""
+        if not self.hedgeable(endpoint):
+            return await send(), None
+
+        key = endpoint.id
+        tracker = self._tracker(key)
+        self._count(key, "requests")
+        self.budget.record_attempt(key)
+        # Until enough latencies are known there is no p95 to hedge at; just learn from this call.
+        delay = tracker.percentile(self.percentile) if len(tracker) >= self.min_samples else None
+        started = time.monotonic()
+        primary = asyncio.ensure_future(send())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.budget.try_retry(key):
+                self._count(key, "hedges")
+                tasks.append(asyncio.ensure_future(send()))
+            elif not done:
+                self._count(key, "denied")
+
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary if both landed in the same tick; a failure waits for the other copy.
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None:
+                        tracker.record(time.monotonic() - started)
+                        hedge_won = None if len(tasks) == 1 else task is not primary
+                        if hedge_won:
+                            self._count(key, "hedges_won")
+                        return task.result(), hedge_won
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        targets = {}
+        for key, counters in self._counters.items():
+            tracker = self._tracker(key)
+            p95 = tracker.percentile(self.percentile)
+            targets[key] = {
+                **counters,
+                "samples": len(tracker),
+                "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            }
+        return {"min_samples": self.min_samples, "budget": self.budget.stats(), "targets": targets}
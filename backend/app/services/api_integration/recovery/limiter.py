@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from .state import StateBackend
+
+logger = logging.getLogger("synapseops.limiter")
+
+
+class TargetLimiter:
+    """Concurrency cap plus token bucket for one target, granted strictly first-come first-served.
+
+    A caller is only admitted once it is at the head of the queue *and* both a slot and a token
+    are free, so a burst of runs waits in order instead of racing (and retrying) past each other.
+    ``max_concurrency`` or ``rate_per_sec`` of 0 disables that half of the limit.
+
+    With a shared ``backend`` the token bucket and any 429 pushback live there under ``key``, so
+    the rate holds across all worker processes; the concurrency cap stays per process. Against a
+    ``blocking`` backend (Redis) the head of the queue reserves its token in a worker thread, one
+    reservation at a time, and is admitted when it comes back.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 0,
+        rate_per_sec: float = 0.0,
+        burst: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        backend: StateBackend | None = None,
+        key: str = "",
+    ) -> None:
+        self.requested = (max_concurrency, rate_per_sec, burst)
+        self.max_concurrency = max(0, max_concurrency)
+        self.rate_per_sec = max(0.0, rate_per_sec)
+        self.burst = max(1, burst or math.ceil(self.rate_per_sec) or 1)
+        self._clock = clock
+        self._backend = backend
+        self._key = key
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+        self._reservation: asyncio.Future | None = None
+        self._reserved = False  # a shared token was spent for a caller not admitted yet
+        self.granted = 0
+        self.queued = 0
+        self.throttled = 0
+        self.wait_sec_total = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate_per_sec:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_sec)
+        self._refilled_at = now
+
+    def _delay_until_ready(self, now: float) -> float:
+        """0 when a caller can be admitted now, the wait until a token frees up, or inf when waiting on a slot."""
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            return math.inf
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self.rate_per_sec and self._backend is not None:
+            if self._backend.blocking:
+                return 0.0  # the shared token is reserved off the loop, see _needs_token
+            # Spends the shared token when it returns 0; _admit always follows.
+            return self._backend.reserve(self._key, self.rate_per_sec, self.burst)
+        if self.rate_per_sec:
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate_per_sec
+        return 0.0
+
+    def _needs_token(self) -> bool:
+        shared = self._backend is not None and self._backend.blocking
+        return bool(self.rate_per_sec) and shared and not self._reserved
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        if self.rate_per_sec and self._backend is None:
+            self._tokens -= 1
+        self._reserved = False
+        self.granted += 1
+
+    def _idle(self) -> bool:
+        return self._timer is None and self._reservation is None
+
+    def _reserve_shared(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._reservation = loop.run_in_executor(
+            None, self._backend.reserve, self._key, self.rate_per_sec, self.burst
+        )
+        self._reservation.add_done_callback(self._reserved_token)
+
+    def _reserved_token(self, reservation: asyncio.Future) -> None:
+        self._reservation = None
+        if reservation.cancelled():
+            return
+        error = reservation.exception()
+        if error is not None:
+            # Fail the caller that asked, as a synchronous reserve() would; the rest keep waiting.
+            logger.warning("Reserving a shared token for %s failed: %s", self._key, error)
+            while self._waiters:
+                head = self._waiters.popleft()
+                if not head.done():
+                    head.set_exception(error)
+                    break
+        elif (wait := reservation.result()) > 0:
+            self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+            return
+        else:
+            self._reserved = True
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        if self._reservation is not None:
+            return
+        while self._waiters:
+            head = self._waiters[0]
+            if head.done():
+                self._waiters.popleft()
+                continue
+            delay = self._delay_until_ready(self._clock())
+            if delay == math.inf:
+                return
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            if self._needs_token():
+                self._reserve_shared()
+                return
+            self._waiters.popleft()
+            self._admit()
+            head.set_result(None)
+
+    async def acquire(self) -> None:
+        ready = not self._waiters and self._delay_until_ready(self._clock()) == 0
+        if ready and not self._needs_token():
+            self._admit()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        started = self._clock()
+        if self._idle():
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted in the same tick the caller gave up: hand the slot to the next waiter.
+                self.release()
+            raise
+        finally:
+            self.wait_sec_total += self._clock() - started
+
+    def release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        if self._waiters and self._idle():
+            self._dispatch()
+
+    def throttle(self, seconds: float) -> None:
+        """Admit nobody for ``seconds`` (the target pushed back, e.g. with a 429)."""
+        self.throttled += 1
+        self._blocked_until = max(self._blocked_until, self._clock() + max(0.0, seconds))
+        self._tokens = min(self._tokens, 0.0)
+        if self._backend is None:
+            return
+        if not self._backend.blocking:
+            self._backend.block(self._key, seconds)
+            return
+
+        def _blocked(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning("Sharing pushback on %s failed: %s", self._key, future.exception())
+
+        pushback = asyncio.get_running_loop().run_in_executor(
+            None, self._backend.block, self._key, seconds
+        )
+        pushback.add_done_callback(_blocked)
+
+    def stats(self) -> dict:
+        self._refill(self._clock())
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_per_sec": self.rate_per_sec,
+            "burst": self.burst,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.done()),
+            "tokens": round(self._tokens, 3) if self.rate_per_sec and self._backend is None else None,
+            "shared": self._backend is not None,
+            "granted": self.granted,
+            "queued": self.queued,
+            "throttled": self.throttled,
+            "wait_sec_total": round(self.wait_sec_total, 3),
+        }
+
+
+def _limits_of(target: Any) -> tuple[int, float, int]:
+    return (
+        getattr(target, "max_concurrency", 0) or 0,
+        getattr(target, "rate_limit_per_sec", 0.0) or 0.0,
+        getattr(target, "rate_limit_burst", 0) or 0,
+    )
+
+
+class RateLimiterRegistry:
+    """Per-connector and per-endpoint ``TargetLimiter``s, built from the limits configured on those rows."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, backend: StateBackend | None = None) -> None:
+        self._clock = clock
+        self._backend = backend
+        self._limiters: dict[str, TargetLimiter] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def limiter(self, key: str, max_concurrency: int, rate_per_sec: float, burst: int) -> TargetLimiter | None:
+        if not max_concurrency and not rate_per_sec:
+            self._limiters.pop(key, None)
+            return None
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._limiters = {}
+            self._loop = loop
+        limiter = self._limiters.get(key)
+        if limiter is None or limiter.requested != (max_concurrency, rate_per_sec, burst):
+            # Changed limits take effect for new callers; the old limiter drains its own waiters.
+            limiter = self._limiters[key] = TargetLimiter(
+                max_concurrency, rate_per_sec, burst, clock=self._clock, backend=self._backend, key=key
+            )
+        return limiter
+
+    def limiters_for(self, endpoint: Any) -> list[TargetLimiter]:
+        connector = endpoint.connector
+        limiters = [
+            self.limiter(f"connector:{connector.id}", *_limits_of(connector)),
+            self.limiter(f"endpoint:{endpoint.id}", *_limits_of(endpoint)),
+        ]
+        return [limiter for limiter in limiters if limiter is not None]
+
+    @asynccontextmanager
+    async def slot(self, endpoint: Any) -> AsyncIterator[list[TargetLimiter]]:
+        """Hold a connector slot and then an endpoint slot (always in that order) for one request."""
+        acquired: list[TargetLimiter] = []
+        try:
+            for limiter in self.limiters_for(endpoint):
+                await limiter.acquire()
+                acquired.append(limiter)
+            yield acquired
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def stats(self) -> dict:
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
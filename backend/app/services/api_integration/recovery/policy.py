@@ -1,4 +1,9 @@
+import random
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+JITTER_STRATEGIES = ("none", "full", "decorrelated")
 
 
 @dataclass
@@ -6,15 +11,51 @@ class RetryPolicy:
     max_attempts: int = 3
     base_delay_sec: float = 0.25
     max_delay_sec: float = 2.0
+    # none: deterministic exponential; full: uniform(0, exponential); decorrelated: uniform(base, 3 * previous).
+    jitter: str = "full"
+    # A target asking us to come back later than this is treated as a final failure instead of a retry.
+    max_retry_after_sec: float = 30.0
+
+    def __post_init__(self) -> None:
+        if self.jitter not in JITTER_STRATEGIES:
+            raise ValueError(f"Unsupported retry jitter: {self.jitter}")
 
 
 class RetryExhaustedError(RuntimeError):
     pass
 
 
-def backoff_seconds(policy: RetryPolicy, attempt: int) -> float:
-    delay = policy.base_delay_sec * (2 ** max(0, attempt - 1))
-    return min(delay, policy.max_delay_sec)
+def backoff_seconds(
+    policy: RetryPolicy,
+    attempt: int,
+    previous_delay: float | None = None,
+    rng: random.Random | None = None,
+) -> float:
+    """Delay before retrying after ``attempt`` failed; ``previous_delay`` feeds decorrelated jitter."""
+    ceiling = min(policy.base_delay_sec * (2 ** max(0, attempt - 1)), policy.max_delay_sec)
+    if policy.jitter == "none":
+        return ceiling
+    rng = rng or random
+    if policy.jitter == "full":
+        return rng.uniform(0, ceiling)
+    previous = previous_delay if previous_delay is not None else policy.base_delay_sec
+    return min(policy.max_delay_sec, rng.uniform(policy.base_delay_sec, max(policy.base_delay_sec, previous * 3)))
+
+
+def retry_after_seconds(value: str | None, now: datetime | None = None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date); None when absent or unparseable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
 
 
 def should_retry_status(status_code: int) -> bool:
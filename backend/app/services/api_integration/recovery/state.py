@@ -0,0 +1,286 @@
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+logger = logging.getLogger("synapseops.state")
+
+STATE_BACKENDS = ("local", "shm", "redis")
+
+
+class StateBackend(ABC):
+    """State that ``CircuitBreaker`` and ``TargetLimiter`` share with the other worker processes.
+
+    Circuit transitions are stored as ``(state, changed_at)`` with a wall-clock timestamp, so any
+    process can tell which side saw the newer transition. ``reserve`` spends one token from a
+    shared bucket and returns 0, or returns how long to wait (spending nothing).
+
+    ``blocking`` backends do network I/O on every call; their callers run them in a worker thread
+    instead of on the event loop.
+    """
+
+    name = "base"
+    blocking = False
+
+    @abstractmethod
+    def load_circuit(self, key: str) -> tuple[str, float] | None: ...
+
+    @abstractmethod
+    def store_circuit(self, key: str, state: str, changed_at: float) -> None: ...
+
+    @abstractmethod
+    def reserve(self, key: str, rate_per_sec: float, burst: int) -> float: ...
+
+    @abstractmethod
+    def block(self, key: str, seconds: float) -> None:
+        """Admit nobody on ``key`` for ``seconds``, in every process."""
+
+    def close(self) -> None:
+        pass
+
+
+_CIRCUIT_CODES = {"CLOSED": 1, "OPEN": 2, "HALF_OPEN": 3}
+_CIRCUIT_NAMES = {code: name for name, code in _CIRCUIT_CODES.items()}
+_MAGIC = b"SYNSTAT1"
+_HEADER = struct.Struct("<8sQ")
+# key hash, seqlock version, circuit state, circuit changed_at, tokens, refilled_at, blocked_until
+# (one cache line)
+_SLOT = struct.Struct("<QQqdddd8x")
+_U64 = struct.Struct("<Q")
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") | 1
+
+
+class SharedMemoryStateBackend(StateBackend):
+    """Fixed-size hash table in an mmap'd file (``/dev/shm`` by default) shared by a host's workers.
+
+    Writers serialize on ``flock``; readers of circuit state take no lock and instead retry while a
+    slot's seqlock version is odd or changes under them, so the hot path never waits on a writer.
+    """
+
+    name = "shm"
+
+    def __init__(
+        self, path: str, slots: int = 4096, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < _HEADER.size:
+                os.ftruncate(self._fd, _HEADER.size + max(1, slots) * _SLOT.size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, max(1, slots)), 0)
+            magic, self.slots = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if magic != _MAGIC:
+            os.close(self._fd)
+            raise ValueError(f"{path} is not a SynapseOps state file")
+        self._mm = mmap.mmap(self._fd, _HEADER.size + self.slots * _SLOT.size)
+        self._offsets: dict[str, int] = {}
+        self._warned_full = False
+
+    def _find(self, key: str) -> int | None:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        wanted = _key_hash(key)
+        start = wanted % self.slots
+        for probe in range(self.slots):
+            offset = _HEADER.size + ((start + probe) % self.slots) * _SLOT.size
+            found = _U64.unpack_from(self._mm, offset)[0]
+            if found == wanted:
+                self._offsets[key] = offset
+                return offset
+            if found == 0:
+                return None
+        return None
+
+    def _claim(self, key: str) -> int | None:
+        """Find or insert ``key``'s slot; the caller holds the write lock."""
+        wanted = _key_hash(key)
+        start = wanted % self.slots
+        for probe in range(self.slots):
+            offset = _HEADER.size + ((start + probe) % self.slots) * _SLOT.size
+            found = _U64.unpack_from(self._mm, offset)[0]
+            if found in (0, wanted):
+                if found == 0:
+                    _SLOT.pack_into(self._mm, offset, wanted, 0, 0, 0.0, 0.0, 0.0, 0.0)
+                self._offsets[key] = offset
+                return offset
+        if not self._warned_full:
+            logger.warning(
+                "Shared state table %s is full (%d slots); new keys stay process-local",
+                self.path,
+                self.slots,
+            )
+            self._warned_full = True
+        return None
+
+    def _read(self, offset: int) -> tuple:
+        for _ in range(100):
+            before = _U64.unpack_from(self._mm, offset + 8)[0]
+            if before % 2 == 0:
+                fields = _SLOT.unpack_from(self._mm, offset)
+                if _U64.unpack_from(self._mm, offset + 8)[0] == before:
+                    return fields
+        with self._write_lock():
+            return _SLOT.unpack_from(self._mm, offset)
+
+    def _write(self, offset: int, fields: tuple) -> None:
+        seq = _U64.unpack_from(self._mm, offset + 8)[0]
+        _U64.pack_into(self._mm, offset + 8, seq + 1)
+        _SLOT.pack_into(self._mm, offset, fields[0], seq + 1, *fields[2:])
+        _U64.pack_into(self._mm, offset + 8, seq + 2)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        # flock excludes other processes; the thread lock covers threads sharing this descriptor.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def load_circuit(self, key: str) -> tuple[str, float] | None:
+        offset = self._find(f"circuit:{key}")
+        if offset is None:
+            return None
+        _, _, code, changed_at, *_ = self._read(offset)
+        return (_CIRCUIT_NAMES[code], changed_at) if code in _CIRCUIT_NAMES else None
+
+    def store_circuit(self, key: str, state: str, changed_at: float) -> None:
+        with self._write_lock():
+            offset = self._claim(f"circuit:{key}")
+            if offset is None:
+                return
+            fields = _SLOT.unpack_from(self._mm, offset)
+            if fields[3] > changed_at:
+                return  # another process already stored a newer transition
+            self._write(offset, (fields[0], 0, _CIRCUIT_CODES[state], changed_at, *fields[4:]))
+
+    def reserve(self, key: str, rate_per_sec: float, burst: int) -> float:
+        with self._write_lock():
+            offset = self._claim(f"rate:{key}")
+            if offset is None:
+                return 0.0
+            fields = _SLOT.unpack_from(self._mm, offset)
+            key_hash, _, code, changed_at, tokens, refilled_at, blocked_until = fields
+            now = self._clock()
+            if now < blocked_until:
+                return blocked_until - now
+            if refilled_at == 0:
+                tokens = float(burst)
+            else:
+                tokens = min(burst, tokens + (now - refilled_at) * rate_per_sec)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate_per_sec
+            if not wait:
+                tokens -= 1
+            self._write(offset, (key_hash, 0, code, changed_at, tokens, now, blocked_until))
+            return wait
+
+    def block(self, key: str, seconds: float) -> None:
+        with self._write_lock():
+            offset = self._claim(f"rate:{key}")
+            if offset is None:
+                return
+            fields = _SLOT.unpack_from(self._mm, offset)
+            key_hash, _, code, changed_at, tokens, refilled_at, blocked_until = fields
+            now = self._clock()
+            blocked_until = max(blocked_until, now + max(0.0, seconds))
+            tokens, refilled_at = min(tokens, 0.0), refilled_at or now
+            self._write(offset, (key_hash, 0, code, changed_at, tokens, refilled_at, blocked_until))
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+class RedisStateBackend(StateBackend):
+    """State kept in Redis, shared by every worker on every host pointed at it.
+
+    Uses only GET/SET/INCR/EXPIRE, so any Redis-compatible server (or an in-memory fake) works.
+    Rate limits become fixed windows of ``burst / rate_per_sec`` seconds admitting ``burst`` calls,
+    which is the same long-run rate as the local token bucket without needing server-side scripts.
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(
+        self, client: Any, prefix: str = "synapseops:", clock: Callable[[], float] = time.time
+    ) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._clock = clock
+
+    @staticmethod
+    def _text(value: Any) -> str | None:
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def load_circuit(self, key: str) -> tuple[str, float] | None:
+        value = self._text(self._client.get(f"{self._prefix}circuit:{key}"))
+        if not value:
+            return None
+        state, _, changed_at = value.partition(":")
+        return state, float(changed_at)
+
+    def store_circuit(self, key: str, state: str, changed_at: float) -> None:
+        self._client.set(f"{self._prefix}circuit:{key}", f"{state}:{changed_at!r}")
+
+    def reserve(self, key: str, rate_per_sec: float, burst: int) -> float:
+        now = self._clock()
+        blocked_until = self._text(self._client.get(f"{self._prefix}block:{key}"))
+        if blocked_until and float(blocked_until) > now:
+            return float(blocked_until) - now
+
+        burst = max(1, burst)
+        window_sec = burst / rate_per_sec
+        window = int(now / window_sec)
+        counter = f"{self._prefix}rate:{key}:{window}"
+        count = self._client.incr(counter)
+        if count == 1:
+            self._client.expire(counter, max(1, math.ceil(2 * window_sec)))
+        if count <= burst:
+            return 0.0
+        return (window + 1) * window_sec - now
+
+    def block(self, key: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        until = self._clock() + seconds
+        px = max(1, math.ceil(seconds * 1000))
+        self._client.set(f"{self._prefix}block:{key}", repr(until), px=px)
+
+
+def build_state_backend(
+    kind: str, shm_path: str = "", shm_slots: int = 4096, redis_url: str = ""
+) -> StateBackend | None:
+    """Backend named by ``STATE_BACKEND``; None for ``local`` (each process keeps its own state)."""
+    if kind == "local":
+        return None
+    if kind == "shm":
+        return SharedMemoryStateBackend(shm_path, slots=shm_slots)
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("STATE_BACKEND=redis needs the redis package installed") from exc
+        return RedisStateBackend(redis.Redis.from_url(redis_url))
+    raise ValueError(f"Unsupported state backend: {kind}")
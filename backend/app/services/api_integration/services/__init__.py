@@ -1,5 +1,21 @@
 from .flow_runner import flow_runner
-from .mapping_engine import apply_mapping
+from .mapping_engine import apply_mapping, apply_mapping_batch, compile_mapping, get_compiled_mapping, CompiledMapping
+from .mapping_cache import mapping_result_cache
 from .auth_manager import AuthManager
+from .request_signing import HmacSigner
+from .transforms import get_transform, load_lookup_table, register_transform
 
-__all__ = ["flow_runner", "apply_mapping", "AuthManager"]
+__all__ = [
+    "flow_runner",
+    "apply_mapping",
+    "apply_mapping_batch",
+    "compile_mapping",
+    "get_compiled_mapping",
+    "CompiledMapping",
+    "mapping_result_cache",
+    "AuthManager",
+    "HmacSigner",
+    "get_transform",
+    "load_lookup_table",
+    "register_transform",
+]
@@ -1,48 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-import httpx
+from app.config import OAUTH_REFRESH_AHEAD_RATIO
 from app.services.api_integration.models import Credential
+from app.services.api_integration.connectors.http_pool import HttpClientPool, http_client_pool
+from app.services.api_integration.services.request_signing import HmacSigner
+from app.services.api_integration.services.token_cache import TokenCache
 
+logger = logging.getLogger("synapseops.auth_manager")
 
-def _expired(expiry: datetime | None) -> bool:
-    if expiry is None:
-        return True
-    return datetime.now(timezone.utc) >= expiry
+Headers = tuple[tuple[str, str], ...]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def config_fingerprint(config: dict) -> str:
+    """Stable digest of an auth_config; any edit to the credential yields a new one."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+@dataclass
+class _Token:
+    access_token: str
+    expires_at: datetime
+    refresh_at: datetime  # past this, the next use starts a background refresh
+    headers: Headers = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.headers = (("Authorization", f"Bearer {self.access_token}"),)
+
+    def to_dict(self) -> dict:
+        return {
+            "access_token": self.access_token,
+            "expires_at": self.expires_at.timestamp(),
+            "refresh_at": self.refresh_at.timestamp(),
+        }
+
+    @classmethod
+    def from_dict(cls, value: dict) -> "_Token":
+        return cls(
+            access_token=value["access_token"],
+            expires_at=datetime.fromtimestamp(value["expires_at"], timezone.utc),
+            refresh_at=datetime.fromtimestamp(value["refresh_at"], timezone.utc),
+        )
+
+
+@dataclass(frozen=True)
+class _AuthPlan:
+    """Everything derived from one version of a credential's auth_config, built once and reused by every run."""
+
+    auth_type: str
+    fingerprint: str
+    headers: Headers = ()
+    config: dict = field(default_factory=dict, repr=False)
+    signer: HmacSigner | None = None
+
+
+def _compile_plan(auth_type: str, config: dict, fingerprint: str) -> _AuthPlan:
+    if auth_type == "api_key":
+        header_name = config.get("header_name", "X-API-Key")
+        api_key = config.get("api_key")
+        if not api_key:
+            raise ValueError("api_key credential is missing api_key")
+        return _AuthPlan(auth_type, fingerprint, headers=((header_name, str(api_key)),))
+
+    if auth_type == "bearer_token":
+        token = config.get("token")
+        if not token:
+            raise ValueError("bearer_token credential is missing token")
+        return _AuthPlan(auth_type, fingerprint, headers=(("Authorization", f"Bearer {token}"),))
+
+    if auth_type == "oauth2_client_credentials":
+        return _AuthPlan(auth_type, fingerprint, config=dict(config))
+
+    if auth_type == "hmac_signature":
+        return _AuthPlan(auth_type, fingerprint, signer=HmacSigner.from_config(config))
+
+    raise ValueError(f"Unsupported auth_type: {auth_type}")
 
 
 class AuthManager:
-    def __init__(self) -> None:
-        self._token_cache: dict[str, tuple[str, datetime]] = {}
+    """Builds auth headers for a credential; OAuth2 tokens are cached, fetched single-flight and refreshed ahead.
+
+    Concurrent runs that find no usable token share one token request per credential. Once a token
+    is ``refresh_ahead_ratio`` of the way through its lifetime, the next run starts a background
+    refresh and keeps using the still-valid token, so in steady state no run waits on a fetch.
+
+    Each credential version (its ``updated_at``, or a fingerprint of auth_config when there is none)
+    is compiled once into immutable header tuples and, for ``hmac_signature``, a pre-keyed signer;
+    a run then costs a dict lookup. Tokens are keyed by credential id plus the config fingerprint,
+    so editing a credential drops its token. With a ``shared_cache`` every fetch first looks there,
+    letting worker processes and restarts reuse a token another process already paid for; its
+    file or network I/O runs in a worker thread so it never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        http_pool: HttpClientPool = http_client_pool,
+        refresh_ahead_ratio: float = OAUTH_REFRESH_AHEAD_RATIO,
+        clock: Callable[[], datetime] = _utcnow,
+        shared_cache: TokenCache | None = None,
+    ) -> None:
+        self._http_pool = http_pool
+        self.shared_cache = shared_cache
+        self._plans: dict[str, tuple[datetime | None, _AuthPlan]] = {}
+        self.refresh_ahead_ratio = refresh_ahead_ratio
+        self._clock = clock
+        self._token_cache: dict[str, _Token] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._stale_shared: list[str] = []  # shared keys of edited credentials, dropped off-loop
+        self.fetches = 0
+        self.coalesced = 0
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+        self.shared_hits = 0
 
     async def build_headers(self, credential: Credential | None) -> dict[str, str]:
+        return dict(await self.header_items(credential))
+
+    async def header_items(self, credential: Credential | None) -> Headers:
+        """Auth headers for one run as an immutable tuple of pairs, shared between runs."""
         if credential is None:
-            return {}
+            return ()
+        plan = self._plan(credential)
+        if self._stale_shared:
+            stale, self._stale_shared = self._stale_shared, []
+            await asyncio.to_thread(self._drop_shared, stale)
+        if plan.auth_type == "oauth2_client_credentials":
+            key = f"{credential.id}:{plan.fingerprint}"
+            return await self._oauth2_client_credentials(key, plan.config, credential.connector_id)
+        return plan.headers
+
+    def request_signer(self, credential: Credential | None) -> HmacSigner | None:
+        return None if credential is None else self._plan(credential).signer
+
+    def _plan(self, credential: Credential) -> _AuthPlan:
+        version = getattr(credential, "updated_at", None)
+        entry = self._plans.get(credential.id)
+        if entry is not None and version is not None and entry[0] == version:
+            return entry[1]
 
-        auth_type = credential.auth_type
         config = credential.auth_config or {}
+        fingerprint = config_fingerprint(config)
+        previous = entry[1] if entry is not None else None
+        if previous is not None and previous.fingerprint == fingerprint and previous.auth_type == credential.auth_type:
+            plan = previous
+        else:
+            plan = _compile_plan(credential.auth_type, config, fingerprint)
+            if previous is not None and previous.fingerprint != fingerprint:
+                # auth_config changed: the token issued for the old client/scope must not be used again.
+                stale_key = f"{credential.id}:{previous.fingerprint}"
+                self._token_cache.pop(stale_key, None)
+                if self.shared_cache is not None:
+                    self._stale_shared.append(stale_key)
+        self._plans[credential.id] = (version, plan)
+        return plan
+
+    async def _oauth2_client_credentials(self, key: str, config: dict, connector_id: str) -> Headers:
+        cached = self._token_cache.get(key)
+        if cached is None and self.shared_cache is not None:
+            cached = await self._load_shared(key)
+        now = self._clock()
+        if cached and now < cached.expires_at:
+            if now >= cached.refresh_at and self._running_fetch(key) is None:
+                self.background_refreshes += 1
+                self._start_fetch(key, config, connector_id, background=True)
+            return cached.headers
+
+        fetch = self._running_fetch(key)
+        if fetch is None:
+            fetch = self._start_fetch(key, config, connector_id)
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled run does not cancel the fetch the other runs are waiting on.
+        token = await asyncio.shield(fetch)
+        return token.headers
+
+    def _running_fetch(self, key: str) -> asyncio.Task | None:
+        fetch = self._inflight.get(key)
+        if fetch is None or fetch.done() or fetch.get_loop() is not asyncio.get_running_loop():
+            return None
+        return fetch
 
-        if auth_type == "api_key":
-            header_name = config.get("header_name", "X-API-Key")
-            api_key = config.get("api_key")
-            if not api_key:
-                raise ValueError("api_key credential is missing api_key")
-            return {header_name: str(api_key)}
+    def _start_fetch(self, key: str, config: dict, connector_id: str, background: bool = False) -> asyncio.Task:
+        fetch = asyncio.ensure_future(self._fetch_token(key, config, connector_id))
+        self._inflight[key] = fetch
 
-        if auth_type == "bearer_token":
-            token = config.get("token")
-            if not token:
-                raise ValueError("bearer_token credential is missing token")
-            return {"Authorization": f"Bearer {token}"}
+        def _done(task: asyncio.Task) -> None:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if task.cancelled() or task.exception() is None:
+                return
+            if background:
+                self.refresh_failures += 1
+                credential_id = key.partition(":")[0]
+                logger.warning("Background token refresh for credential %s failed: %s", credential_id, task.exception())
+                cached = self._token_cache.get(key)
+                if cached is not None:
+                    # Retry halfway to expiry instead of on every run until then.
+                    now = self._clock()
+                    cached.refresh_at = now + (cached.expires_at - now) / 2
 
-        if auth_type == "oauth2_client_credentials":
-            token = await self._oauth2_client_credentials(credential.id, config)
-            return {"Authorization": f"Bearer {token}"}
+        fetch.add_done_callback(_done)
+        return fetch
 
-        raise ValueError(f"Unsupported auth_type: {auth_type}")
+    def _drop_shared(self, keys: list[str]) -> None:
+        for key in keys:
+            self.shared_cache.delete(key)
 
-    async def _oauth2_client_credentials(self, credential_id: str, config: dict) -> str:
-        cached = self._token_cache.get(credential_id)
-        if cached and not _expired(cached[1]):
-            return cached[0]
+    async def _load_shared(self, key: str) -> _Token | None:
+        shared = await asyncio.to_thread(self.shared_cache.get, key)
+        if shared is None:
+            return None
+        self.shared_hits += 1
+        token = self._token_cache[key] = _Token.from_dict(shared)
+        return token
+
+    async def _fetch_token(self, key: str, config: dict, connector_id: str) -> _Token:
+        if self.shared_cache is not None:
+            token = await self._load_shared(key)
+            if token is not None and self._clock() < token.refresh_at:
+                # Another worker (or this one before a restart) already fetched a fresh token.
+                return token
 
         token_url = config.get("token_url")
         client_id = config.get("client_id")
@@ -60,8 +245,9 @@ class AuthManager:
         if scope:
             payload["scope"] = scope
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.request("POST", token_url, data=payload)
+        self.fetches += 1
+        client = self._http_pool.client(connector_id)
+        response = await client.request("POST", token_url, data=payload, timeout=10.0)
 
         if response.status_code >= 400:
             raise ValueError(f"oauth2 token request failed with status {response.status_code}")
@@ -73,6 +259,35 @@ class AuthManager:
         if not access_token:
             raise ValueError("oauth2 token response missing access_token")
 
-        expiry = datetime.now(timezone.utc) + timedelta(seconds=max(30, expires_in - 30))
-        self._token_cache[credential_id] = (access_token, expiry)
-        return access_token
+        fetched_at = self._clock()
+        lifetime = timedelta(seconds=max(30, expires_in - 30))
+        token = _Token(
+            access_token=access_token,
+            expires_at=fetched_at + lifetime,
+            refresh_at=fetched_at + lifetime * self.refresh_ahead_ratio,
+        )
+        self._token_cache[key] = token
+        if self.shared_cache is not None:
+            await asyncio.to_thread(self.shared_cache.put, key, token.to_dict())
+        return token
+
+    def stats(self) -> dict:
+        now = self._clock()
+        return {
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "background_refreshes": self.background_refreshes,
+            "refresh_failures": self.refresh_failures,
+            "shared_cache": self.shared_cache.name if self.shared_cache is not None else None,
+            "shared_hits": self.shared_hits,
+            "credential_plans": len(self._plans),
+            "in_flight": sum(1 for fetch in self._inflight.values() if not fetch.done()),
+            # Keyed by credential id only: the config fingerprint is derived from the client secret.
+            "tokens": {
+                key.partition(":")[0]: {
+                    "expires_in_sec": round((token.expires_at - now).total_seconds(), 1),
+                    "refresh_in_sec": round((token.refresh_at - now).total_seconds(), 1),
+                }
+                for key, token in self._token_cache.items()
+            },
+        }
@@ -0,0 +1,249 @@
+import copy
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from app.config import EVENT_ROUTING_TTL_SEC
+from app.services.api_integration.models import Connector, Credential, Endpoint, Flow, Mapping, SessionLocal
+
+# Rows whose changes can alter which flow handles an event or how it is delivered.
+_ROUTING_MODELS = (Flow, Endpoint, Mapping, Credential, Connector)
+
+
+@dataclass(frozen=True)
+class ConnectorRoute:
+    id: str
+    name: str
+    base_url: str | None
+    max_concurrency: int = 0
+    rate_limit_per_sec: float = 0.0
+    rate_limit_burst: int = 0
+
+
+@dataclass(frozen=True)
+class EndpointRoute:
+    id: str
+    name: str
+    method: str
+    path: str
+    event_name: str | None
+    is_active: bool
+    connector: ConnectorRoute
+    max_concurrency: int = 0
+    rate_limit_per_sec: float = 0.0
+    rate_limit_burst: int = 0
+    hedge_enabled: bool = False
+
+
+@dataclass(frozen=True)
+class MappingRoute:
+    id: str
+    name: str
+    rules: list
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class CredentialRoute:
+    id: str
+    connector_id: str
+    name: str
+    auth_type: str
+    auth_config: dict
+    is_active: bool
+    updated_at: datetime | None = None  # the credential version AuthManager caches its header plan under
+
+
+@dataclass(frozen=True)
+class FlowRoute:
+    """Detached, read-only copy of a ``Flow`` with everything ``FlowRunner.run_flow`` reads."""
+
+    id: str
+    name: str
+    is_enabled: bool
+    source_endpoint: EndpointRoute
+    target_endpoint: EndpointRoute
+    mapping: MappingRoute
+    credential: CredentialRoute | None
+    retry_max_attempts: int
+    retry_base_delay_sec: float
+    retry_max_delay_sec: float
+    retry_jitter: str
+    circuit_failure_threshold: int
+    circuit_recovery_timeout_sec: float
+    circuit_mode: str
+    circuit_half_open_probes: int
+    circuit_window_type: str
+    circuit_window_size: int
+    circuit_min_calls: int
+    circuit_failure_rate: float
+    circuit_slow_call_ms: int
+    circuit_slow_call_rate: float
+    batch_max_items: int
+    batch_max_bytes: int
+    batch_linger_ms: int
+    created_at: datetime
+
+
+def _endpoint_route(endpoint: Endpoint) -> EndpointRoute:
+    connector = endpoint.connector
+    return EndpointRoute(
+        id=endpoint.id,
+        name=endpoint.name,
+        method=endpoint.method,
+        path=endpoint.path,
+        event_name=endpoint.event_name,
+        is_active=endpoint.is_active,
+        connector=ConnectorRoute(
+            id=connector.id,
+            name=connector.name,
+            base_url=connector.base_url,
+            max_concurrency=connector.max_concurrency,
+            rate_limit_per_sec=connector.rate_limit_per_sec,
+            rate_limit_burst=connector.rate_limit_burst,
+        ),
+        max_concurrency=endpoint.max_concurrency,
+        rate_limit_per_sec=endpoint.rate_limit_per_sec,
+        rate_limit_burst=endpoint.rate_limit_burst,
+        hedge_enabled=endpoint.hedge_enabled,
+    )
+
+
+def flow_route(flow: Flow) -> FlowRoute:
+    credential = flow.credential
+    return FlowRoute(
+        id=flow.id,
+        name=flow.name,
+        is_enabled=flow.is_enabled,
+        source_endpoint=_endpoint_route(flow.source_endpoint),
+        target_endpoint=_endpoint_route(flow.target_endpoint),
+        mapping=MappingRoute(
+            id=flow.mapping.id,
+            name=flow.mapping.name,
+            rules=copy.deepcopy(flow.mapping.rules),
+            created_at=flow.mapping.created_at,
+        ),
+        credential=None
+        if credential is None
+        else CredentialRoute(
+            id=credential.id,
+            connector_id=credential.connector_id,
+            name=credential.name,
+            auth_type=credential.auth_type,
+            auth_config=copy.deepcopy(credential.auth_config),
+            is_active=credential.is_active,
+            updated_at=credential.updated_at,
+        ),
+        retry_max_attempts=flow.retry_max_attempts,
+        retry_base_delay_sec=flow.retry_base_delay_sec,
+        retry_max_delay_sec=flow.retry_max_delay_sec,
+        retry_jitter=flow.retry_jitter,
+        circuit_failure_threshold=flow.circuit_failure_threshold,
+        circuit_recovery_timeout_sec=flow.circuit_recovery_timeout_sec,
+        circuit_mode=flow.circuit_mode,
+        circuit_half_open_probes=flow.circuit_half_open_probes,
+        circuit_window_type=flow.circuit_window_type,
+        circuit_window_size=flow.circuit_window_size,
+        circuit_min_calls=flow.circuit_min_calls,
+        circuit_failure_rate=flow.circuit_failure_rate,
+        circuit_slow_call_ms=flow.circuit_slow_call_ms,
+        circuit_slow_call_rate=flow.circuit_slow_call_rate,
+        batch_max_items=flow.batch_max_items,
+        batch_max_bytes=flow.batch_max_bytes,
+        batch_linger_ms=flow.batch_linger_ms,
+        created_at=flow.created_at,
+    )
+
+
+class EventRoutingIndex:
+    """event_name -> enabled flows (oldest first), resolved once and rebuilt after routing rows change.
+
+    Changes committed through any ORM session invalidate the index in this process. Other
+    worker processes only notice after ``ttl_sec`` (0 disables expiry) or an explicit rebuild.
+    """
+
+    def __init__(self, ttl_sec: float = 0.0) -> None:
+        self.ttl_sec = ttl_sec
+        self._routes: dict[str, tuple[FlowRoute, ...]] | None = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._routes = None
+
+    def rebuild(self) -> dict[str, tuple[FlowRoute, ...]]:
+        with self._lock:
+            generation = self._generation
+            db = SessionLocal()
+            try:
+                routes = self._load(db)
+            finally:
+                db.close()
+            # An invalidation that raced with the load means these rows may already be stale.
+            if generation == self._generation:
+                self._routes = routes
+                self._built_at = time.monotonic()
+            self.builds += 1
+            return routes
+
+    def _load(self, db: Session) -> dict[str, tuple[FlowRoute, ...]]:
+        flows = (
+            db.query(Flow)
+            .join(Endpoint, Flow.source_endpoint_id == Endpoint.id)
+            .filter(Flow.is_enabled.is_(True), Endpoint.is_active.is_(True), Endpoint.event_name.is_not(None))
+            .options(
+                joinedload(Flow.source_endpoint).joinedload(Endpoint.connector),
+                joinedload(Flow.target_endpoint).joinedload(Endpoint.connector),
+                joinedload(Flow.mapping),
+                joinedload(Flow.credential),
+            )
+            .order_by(Flow.created_at.asc())
+            .all()
+        )
+        routes: dict[str, list[FlowRoute]] = {}
+        for flow in flows:
+            routes.setdefault(flow.source_endpoint.event_name, []).append(flow_route(flow))
+        return {event_name: tuple(items) for event_name, items in routes.items()}
+
+    def routes(self, event_name: str) -> tuple[FlowRoute, ...]:
+        routes = self._routes
+        if routes is None or (self.ttl_sec and time.monotonic() - self._built_at > self.ttl_sec):
+            routes = self.rebuild()
+        return routes.get(event_name, ())
+
+    def stats(self) -> dict:
+        routes = self._routes
+        return {
+            "built": routes is not None,
+            "builds": self.builds,
+            "events": len(routes) if routes is not None else 0,
+            "flows": sum(len(items) for items in routes.values()) if routes is not None else 0,
+        }
+
+
+event_routing_index = EventRoutingIndex(EVENT_ROUTING_TTL_SEC)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_routing_changes(session: Session, flush_context) -> None:
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _ROUTING_MODELS):
+            session.info["routing_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    # Invalidating only once the change is committed keeps a concurrent rebuild from caching pre-commit rows.
+    if session.info.pop("routing_changed", False):
+        event_routing_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop("routing_changed", None)
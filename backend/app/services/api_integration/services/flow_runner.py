@@ -1,48 +1,490 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from app.services.api_integration.models import Flow, Run, DeadLetter, Endpoint
-from app.services.api_integration.services.mapping_engine import apply_mapping
+from app.config import (
+    CIRCUIT_SYNC_INTERVAL_SEC,
+    HEDGE_BUDGET_MIN_HEDGES,
+    HEDGE_BUDGET_RATIO,
+    HEDGE_MIN_SAMPLES,
+    INGEST_LOG_DIR,
+    INGEST_LOG_FSYNC,
+    INGEST_LOG_FSYNC_INTERVAL_MS,
+    INGEST_LOG_SEGMENT_BYTES,
+    RETRY_BUDGET_MIN_RETRIES,
+    RETRY_BUDGET_RATIO,
+    RETRY_BUDGET_WINDOW_SEC,
+    STATE_BACKEND,
+    STATE_REDIS_URL,
+    STATE_SHM_PATH,
+    STATE_SHM_SLOTS,
+    TOKEN_CACHE_BACKEND,
+    TOKEN_CACHE_DIR,
+    TOKEN_CACHE_REDIS_URL,
+    TOKEN_CACHE_SECRET,
+    WEBHOOK_QUEUE_MAXSIZE,
+    WEBHOOK_QUEUE_RETRY_AFTER_SEC,
+    WEBHOOK_QUEUE_WORKERS,
+)
+from app.services.api_integration.models import Flow, Run, DeadLetter, SessionLocal
+from app.services.api_integration.services.event_router import FlowRoute, event_routing_index, flow_route
+from app.services.api_integration.services.mapping_engine import get_compiled_mapping
 from app.services.api_integration.services.auth_manager import AuthManager
-from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.services.mapping_cache import mapping_result_cache
+from app.services.api_integration.services.mapping_stream import amap_json_stream
+from app.services.api_integration.services.ndjson import NdjsonError, NdjsonLine
+from app.services.api_integration.services.run_queue import RunQueue
+from app.services.api_integration.services.ingest_log import IngestEntry, IngestLog
+from app.services.api_integration.services.target_batcher import TargetBatcher
+from app.services.api_integration.services.token_cache import build_token_cache
+from app.services.api_integration.connectors.rest_client import RestClient, RestCallResult
 from app.services.api_integration.recovery.policy import RetryPolicy
-from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.circuit import CircuitBreaker, CircuitOpenError, CircuitPolicy
+from app.services.api_integration.recovery.limiter import RateLimiterRegistry
+from app.services.api_integration.recovery.budget import RetryBudget
+from app.services.api_integration.recovery.hedging import RequestHedger
+from app.services.api_integration.recovery.state import build_state_backend
 
 
-_circuit_breaker = CircuitBreaker()
-_auth_manager = AuthManager()
-_rest_client = RestClient(_circuit_breaker)
+logger = logging.getLogger("synapseops.flow_runner")
+
+# Marks the summary a streamed run stores in place of its source payload. Namespaced so that it
+# cannot collide with a key of a real webhook body.
+STREAMED_SOURCE_MARKER = "__synapseops_streamed__"
+
+# Shared with the other worker processes unless STATE_BACKEND is local, so they all see a dead target at once.
+_state_backend = build_state_backend(
+    STATE_BACKEND, shm_path=STATE_SHM_PATH, shm_slots=STATE_SHM_SLOTS, redis_url=STATE_REDIS_URL
+)
+_circuit_breaker = CircuitBreaker(backend=_state_backend, sync_interval_sec=CIRCUIT_SYNC_INTERVAL_SEC)
+_auth_manager = AuthManager(
+    shared_cache=build_token_cache(
+        TOKEN_CACHE_BACKEND, directory=TOKEN_CACHE_DIR, secret=TOKEN_CACHE_SECRET, redis_url=TOKEN_CACHE_REDIS_URL
+    )
+)
+_rate_limiters = RateLimiterRegistry(backend=_state_backend)
+_retry_budget = RetryBudget(
+    ratio=RETRY_BUDGET_RATIO, window_sec=RETRY_BUDGET_WINDOW_SEC, min_retries=RETRY_BUDGET_MIN_RETRIES
+)
+_hedger = RequestHedger(
+    RetryBudget(ratio=HEDGE_BUDGET_RATIO, window_sec=RETRY_BUDGET_WINDOW_SEC, min_retries=HEDGE_BUDGET_MIN_HEDGES),
+    min_samples=HEDGE_MIN_SAMPLES,
+)
+_rest_client = RestClient(_circuit_breaker, limiters=_rate_limiters, retry_budget=_retry_budget, hedger=_hedger)
+
+
+def _circuit_policy(flow: Flow | FlowRoute) -> CircuitPolicy:
+    return CircuitPolicy(
+        mode=flow.circuit_mode or "consecutive",
+        failure_threshold=max(1, flow.circuit_failure_threshold),
+        recovery_timeout_sec=max(0.1, flow.circuit_recovery_timeout_sec),
+        half_open_probes=max(1, flow.circuit_half_open_probes or 1),
+        window_type=flow.circuit_window_type or "count",
+        window_size=max(1, flow.circuit_window_size or 1),
+        min_calls=max(1, flow.circuit_min_calls or 1),
+        failure_rate_threshold=flow.circuit_failure_rate,
+        slow_call_sec=max(0, flow.circuit_slow_call_ms or 0) / 1000,
+        slow_call_rate_threshold=flow.circuit_slow_call_rate,
+    )
+
+
+def _reject_if_circuit_open(flow: Flow | FlowRoute) -> None:
+    # Runs before mapping and auth so a run against an open circuit does no work at all.
+    if _circuit_breaker.is_open(flow.target_endpoint.id, _circuit_policy(flow)):
+        raise CircuitOpenError("Circuit is open")
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+@dataclass
+class FlowRunOutcome:
+    flow_id: str
+    run_id: str | None
+    status: str
+    error_message: str | None = None
+
+
+@dataclass
+class BulkLineOutcome:
+    line: int
+    run_id: str | None
+    status: str
+    error_message: str | None = None
+
+
 class FlowRunner:
-    async def run_by_event(self, db: Session, event_name: str, source_payload: dict, request_id: str) -> Run:
-        flow = (
-            db.query(Flow)
-            .join(Endpoint, Flow.source_endpoint_id == Endpoint.id)
-            .filter(Flow.is_enabled.is_(True), Endpoint.event_name == event_name, Endpoint.is_active.is_(True))
-            .order_by(Flow.created_at.asc())
-            .first()
+    def __init__(self) -> None:
+        self.ingest_log = IngestLog(
+            INGEST_LOG_DIR,
+            segment_max_bytes=INGEST_LOG_SEGMENT_BYTES,
+            fsync_interval_sec=INGEST_LOG_FSYNC_INTERVAL_MS / 1000,
+            fsync=INGEST_LOG_FSYNC,
         )
-        if not flow:
+        self._replay_task: asyncio.Task | None = None
+        self._requeue_task: asyncio.Task | None = None
+        self._detached_runs: set[asyncio.Task] = set()
+        self.batcher = TargetBatcher(self._deliver_now)
+        self.rate_limiters = _rate_limiters
+        self.retry_budget = _retry_budget
+        self.hedger = _hedger
+        self.circuit_breaker = _circuit_breaker
+        self.auth_manager = _auth_manager
+        self.queue = RunQueue(
+            self._process_queue_item,
+            maxsize=WEBHOOK_QUEUE_MAXSIZE,
+            workers=WEBHOOK_QUEUE_WORKERS,
+            retry_after_sec=WEBHOOK_QUEUE_RETRY_AFTER_SEC,
+        )
+
+    def enqueue_by_id(self, db: Session, flow_id: str, source_payload: dict, request_id: str) -> Run:
+        flow = self._get_runnable_flow(db, flow_id)
+        self.queue.reserve(1)
+        run = self._queue_run(db, flow, source_payload, request_id)
+        self.queue.submit(run.id)
+        return run
+
+    def enqueue_by_event(self, db: Session, event_name: str, source_payload: dict, request_id: str) -> list[Run]:
+        routes = event_routing_index.routes(event_name)
+        if not routes:
             raise ValueError(f"No active flow found for event '{event_name}'")
 
-        return await self.run_flow(db, flow, source_payload, request_id)
+        # Reserve room for every flow first so an event is either queued whole or rejected.
+        self.queue.reserve(len(routes))
+        runs = [self._queue_run(db, route, source_payload, request_id) for route in routes]
+        for run in runs:
+            self.queue.submit(run.id)
+        return runs
+
+    async def ingest_by_id(self, db: Session, flow_id: str, source_payload: dict, request_id: str) -> IngestEntry:
+        """Durably log the webhook, then hand it to the workers; no Run row is written before the ack."""
+        flow = self._get_runnable_flow(db, flow_id)
+        self.queue.reserve(1)
+        entry = await self.ingest_log.append("flow", flow.id, source_payload, request_id)
+        await self.queue.put(entry)
+        return entry
+
+    async def ingest_by_event(self, event_name: str, source_payload: dict, request_id: str) -> IngestEntry:
+        if not event_routing_index.routes(event_name):
+            raise ValueError(f"No active flow found for event '{event_name}'")
+        self.queue.reserve(1)
+        entry = await self.ingest_log.append("event", event_name, source_payload, request_id)
+        await self.queue.put(entry)
+        return entry
+
+    def replay_ingest_log(self) -> int:
+        """Open the ingest log and queue, in the background, every entry a previous process accepted but never finished."""
+        entries = self.ingest_log.open()
+        if entries:
+            self._replay_task = asyncio.get_running_loop().create_task(self._replay(entries))
+        return len(entries)
+
+    async def _replay(self, items: list[IngestEntry] | list[str]) -> None:
+        for item in items:
+            await self.queue.put(item)
+
+    def requeue_pending(self, db: Session) -> int:
+        """Queue, in the background and oldest first, every run left QUEUED by a previous process.
+
+        Each run is fed in as a slot frees up. Other workers may requeue the same rows at startup;
+        ``run_queued`` claims a run atomically, so each one is still delivered once.
+        """
+        pending = [
+            run_id for (run_id,) in db.query(Run.id).filter(Run.status == "QUEUED").order_by(Run.started_at.asc())
+        ]
+        if pending:
+            self._requeue_task = asyncio.get_running_loop().create_task(self._replay(pending))
+        return len(pending)
+
+    def _queue_run(self, db: Session, flow: Flow | FlowRoute, source_payload: dict, request_id: str) -> Run:
+        run = Run(
+            flow_id=flow.id,
+            status="QUEUED",
+            request_id=request_id,
+            source_payload=source_payload,
+            attempt_count=0,
+            started_at=_now(),
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        return run
+
+    async def _process_queue_item(self, item: str | IngestEntry) -> None:
+        if isinstance(item, IngestEntry):
+            await self._process_ingest_entry(item)
+        else:
+            await self._process_queued_run(item)
+
+    async def _process_ingest_entry(self, entry: IngestEntry) -> None:
+        if entry.kind == "event":
+            routes: list[FlowRoute | None] = list(event_routing_index.routes(entry.target))
+            flow_ids = [route.id for route in routes]
+        else:
+            routes, flow_ids = [None], [entry.target]
+
+        results = await asyncio.gather(
+            *(self._run_ingested(entry, flow_id, route) for flow_id, route in zip(flow_ids, routes)),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            # Leave the entry uncommitted so the next startup replays it.
+            raise errors[0]
+        self.ingest_log.commit(entry.seq)
+
+    async def _run_ingested(self, entry: IngestEntry, flow_id: str, route: FlowRoute | None) -> None:
+        db = SessionLocal()
+        try:
+            run_id = entry.run_id(flow_id)
+            run = db.query(Run).filter(Run.id == run_id).first()
+            if run is not None and run.status in ("SUCCEEDED", "FAILED"):
+                return
+
+            flow = route
+            if flow is None:
+                flow = db.query(Flow).filter(Flow.id == flow_id).first()
+                if flow is None:
+                    logger.warning("Dropping ingest entry %s: flow %s no longer exists", entry.seq, flow_id)
+                    return
+
+            started = _now()
+            if run is None:
+                run = self._start_run(db, flow, entry.payload, entry.request_id, started, run_id=run_id)
+            else:
+                # Interrupted by a crash mid-run: execute it again in place.
+                run.status = "RUNNING"
+                run.started_at = started
+                run.error_message = None
+                db.commit()
+            await self._execute_run(
+                db, flow, run, entry.payload, entry.request_id, started, raise_on_failure=False
+            )
+        finally:
+            db.close()
+
+    async def _process_queued_run(self, run_id: str) -> None:
+        db = SessionLocal()
+        try:
+            await self.run_queued(db, run_id)
+        finally:
+            db.close()
+
+    async def run_queued(self, db: Session, run_id: str) -> Run | None:
+        started = _now()
+        # Claim the run with a conditional UPDATE: of several workers handed the same run id, only
+        # the one that flips it from QUEUED delivers it.
+        claimed = (
+            db.query(Run)
+            .filter(Run.id == run_id, Run.status == "QUEUED")
+            .update({Run.status: "RUNNING", Run.started_at: started}, synchronize_session=False)
+        )
+        db.commit()
+        run = db.query(Run).filter(Run.id == run_id).first()
+        if run is None or claimed != 1:
+            return run
+
+        flow = db.query(Flow).filter(Flow.id == run.flow_id).first()
+        if flow is None or not flow.is_enabled:
+            run.status = "FAILED"
+            run.error_message = "Flow was removed or disabled while the run was queued"
+            run.finished_at = started
+            run.duration_ms = 0
+            db.commit()
+            return run
+
+        db.commit()
+        return await self._execute_run(
+            db, flow, run, run.source_payload, run.request_id, started, raise_on_failure=False
+        )
+
+    async def run_by_event(self, event_name: str, source_payload: dict, request_id: str) -> list[FlowRunOutcome]:
+        """Run every enabled flow subscribed to the event concurrently, one Run (and DB session) per flow."""
+        routes = event_routing_index.routes(event_name)
+        if not routes:
+            raise ValueError(f"No active flow found for event '{event_name}'")
+
+        results = await asyncio.gather(
+            *(self._run_route(route, source_payload, request_id) for route in routes),
+            return_exceptions=True,
+        )
+        return [
+            result if isinstance(result, FlowRunOutcome) else FlowRunOutcome(route.id, None, "FAILED", str(result))
+            for route, result in zip(routes, results)
+        ]
+
+    async def _run_route(self, route: FlowRoute, source_payload: dict, request_id: str) -> FlowRunOutcome:
+        db = SessionLocal()
+        try:
+            run = await self.run_flow(db, route, source_payload, request_id, raise_on_failure=False)
+            return FlowRunOutcome(route.id, run.id, run.status, run.error_message)
+        finally:
+            db.close()
 
     async def run_by_id(self, db: Session, flow_id: str, source_payload: dict, request_id: str) -> Run:
+        flow = self._get_runnable_flow(db, flow_id)
+        return await self.run_flow(db, flow, source_payload, request_id)
+
+    def run_bulk_by_id(
+        self, db: Session, flow_id: str, lines: AsyncIterable[NdjsonLine], request_id: str, concurrency: int
+    ) -> AsyncIterator[BulkLineOutcome]:
+        """Resolve the flow up front (so a missing flow fails before any line is read), then run the lines."""
+        flow = self._get_runnable_flow(db, flow_id)
+        return self.run_bulk(flow_route(flow), lines, request_id, concurrency)
+
+    async def run_bulk(
+        self, flow: FlowRoute, lines: AsyncIterable[NdjsonLine], request_id: str, concurrency: int
+    ) -> AsyncIterator[BulkLineOutcome]:
+        """Run one Run per line with at most ``concurrency`` in flight, yielding outcomes as they finish.
+
+        Lines are pulled from the body only when a slot frees up, so a large upload is never buffered.
+        A body that turns unreadable part-way raises ``NdjsonError`` only after the runs already
+        started have reported. Runs still in flight when the caller goes away keep running to
+        completion, since their lines were accepted.
+        """
+        pending: set[asyncio.Task] = set()
+        body_error: NdjsonError | None = None
+        try:
+            try:
+                async for line in lines:
+                    if line.error is not None:
+                        yield BulkLineOutcome(line.number, None, "INVALID", line.error)
+                        continue
+                    while len(pending) >= concurrency:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            yield task.result()
+                    pending.add(asyncio.create_task(self._run_line(flow, line, f"{request_id}:{line.number}")))
+            except NdjsonError as exc:
+                body_error = exc
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            if body_error is not None:
+                raise body_error
+        finally:
+            for task in pending:
+                self._detached_runs.add(task)
+                task.add_done_callback(self._detached_runs.discard)
+
+    async def _run_line(self, flow: FlowRoute, line: NdjsonLine, request_id: str) -> BulkLineOutcome:
+        db = SessionLocal()
+        try:
+            run = await self.run_flow(db, flow, line.payload, request_id, raise_on_failure=False)
+            return BulkLineOutcome(line.number, run.id, run.status, run.error_message)
+        except Exception as exc:
+            return BulkLineOutcome(line.number, None, "FAILED", str(exc))
+        finally:
+            db.close()
+
+    async def run_by_id_streamed(
+        self, db: Session, flow_id: str, chunks: AsyncIterable[bytes], request_id: str
+    ) -> Run:
+        flow = self._get_runnable_flow(db, flow_id)
+        return await self.run_flow_streamed(db, flow, chunks, request_id)
+
+    def _get_runnable_flow(self, db: Session, flow_id: str) -> Flow:
         flow = db.query(Flow).filter(Flow.id == flow_id, Flow.is_enabled.is_(True)).first()
         if not flow:
             raise ValueError(f"Flow '{flow_id}' not found or disabled")
         if not flow.source_endpoint.is_active or not flow.target_endpoint.is_active:
             raise ValueError(f"Flow '{flow_id}' has inactive endpoints")
+        return flow
 
-        return await self.run_flow(db, flow, source_payload, request_id)
+    async def run_flow(
+        self,
+        db: Session,
+        flow: Flow | FlowRoute,
+        source_payload: dict,
+        request_id: str,
+        raise_on_failure: bool = True,
+    ) -> Run:
+        started = _now()
+        run = self._start_run(db, flow, source_payload, request_id, started)
+        return await self._execute_run(db, flow, run, source_payload, request_id, started, raise_on_failure)
+
+    async def _execute_run(
+        self,
+        db: Session,
+        flow: Flow | FlowRoute,
+        run: Run,
+        source_payload: dict,
+        request_id: str,
+        started: datetime,
+        raise_on_failure: bool,
+    ) -> Run:
+        mapped_payload: dict | None = None
 
-    async def run_flow(self, db: Session, flow: Flow, source_payload: dict, request_id: str) -> Run:
+        try:
+            _reject_if_circuit_open(flow)
+            mapped_payload = mapping_result_cache.map(flow.mapping, source_payload)
+            run.mapped_payload = mapped_payload
+            db.commit()
+
+            result = await self._deliver(flow, request_id, payload=mapped_payload)
+        except asyncio.CancelledError:
+            # Cancelled mid-delivery (shutdown, a caller giving up): never leave the Run RUNNING.
+            cancelled = RuntimeError("Run was cancelled before it finished")
+            self._fail_run(db, flow, run, started, cancelled, source_payload, mapped_payload)
+            raise
+        except Exception as exc:
+            self._fail_run(db, flow, run, started, exc, source_payload, mapped_payload)
+            if raise_on_failure:
+                raise
+            return run
+
+        return self._succeed_run(db, run, started, result)
+
+    async def run_flow_streamed(
+        self, db: Session, flow: Flow | FlowRoute, chunks: AsyncIterable[bytes], request_id: str
+    ) -> Run:
+        # The source and mapped bodies are spooled, never held whole; the Run only keeps their sizes.
         started = _now()
+        source_summary = {STREAMED_SOURCE_MARKER: True}
+        run = self._start_run(db, flow, source_summary, request_id, started)
+        mapped = None
+
+        try:
+            _reject_if_circuit_open(flow)
+            mapped = await amap_json_stream(chunks, get_compiled_mapping(flow.mapping))
+            source_summary = {
+                STREAMED_SOURCE_MARKER: True,
+                "source_bytes": mapped.source_bytes,
+                "mapped_bytes": mapped.size,
+            }
+            run.source_payload = source_summary
+            db.commit()
+
+            result = await self._deliver(flow, request_id, content=mapped.iter_bytes)
+        except asyncio.CancelledError:
+            cancelled = RuntimeError("Run was cancelled before it finished")
+            self._fail_run(db, flow, run, started, cancelled, source_summary, None)
+            raise
+        except Exception as exc:
+            self._fail_run(db, flow, run, started, exc, source_summary, None)
+            raise
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+        return self._succeed_run(db, run, started, result)
+
+    def _start_run(
+        self,
+        db: Session,
+        flow: Flow | FlowRoute,
+        source_payload: dict,
+        request_id: str,
+        started: datetime,
+        run_id: str | None = None,
+    ) -> Run:
         run = Run(
+            id=run_id,
             flow_id=flow.id,
             status="RUNNING",
             request_id=request_id,
@@ -53,70 +495,97 @@ class FlowRunner:
         db.add(run)
         db.commit()
         db.refresh(run)
+        return run
 
-        mapped_payload: dict | None = None
+    async def _deliver(
+        self,
+        flow: Flow | FlowRoute,
+        request_id: str,
+        payload: dict | list | None = None,
+        content: Callable[[], AsyncIterator[bytes]] | None = None,
+    ) -> RestCallResult:
+        if isinstance(payload, dict) and (flow.batch_max_items or 1) > 1:
+            return await self.batcher.submit(flow, payload, request_id)
+        return await self._deliver_now(flow, request_id, payload, content)
 
-        try:
-            mapped_payload = apply_mapping(source_payload, flow.mapping.rules)
-            run.mapped_payload = mapped_payload
-            db.commit()
+    async def _deliver_now(
+        self,
+        flow: Flow | FlowRoute,
+        request_id: str,
+        payload: dict | list | None = None,
+        content: Callable[[], AsyncIterator[bytes]] | None = None,
+    ) -> RestCallResult:
+        headers = await _auth_manager.header_items(flow.credential)
+        retry_policy = RetryPolicy(
+            max_attempts=max(1, flow.retry_max_attempts),
+            base_delay_sec=max(0.01, flow.retry_base_delay_sec),
+            max_delay_sec=max(0.01, flow.retry_max_delay_sec),
+            jitter=flow.retry_jitter or "full",
+        )
 
-            headers = await _auth_manager.build_headers(flow.credential)
-            retry_policy = RetryPolicy(
-                max_attempts=max(1, flow.retry_max_attempts),
-                base_delay_sec=max(0.01, flow.retry_base_delay_sec),
-                max_delay_sec=max(0.01, flow.retry_max_delay_sec),
-            )
+        return await _rest_client.request(
+            endpoint=flow.target_endpoint,
+            base_url=flow.target_endpoint.connector.base_url or "",
+            payload=payload,
+            headers=headers,
+            retry_policy=retry_policy,
+            request_id=request_id,
+            content=content,
+            circuit_policy=_circuit_policy(flow),
+            signer=_auth_manager.request_signer(flow.credential),
+        )
 
-            result = await _rest_client.request(
-                endpoint=flow.target_endpoint,
-                base_url=flow.target_endpoint.connector.base_url or "",
-                payload=mapped_payload,
-                headers=headers,
-                retry_policy=retry_policy,
-                failure_threshold=max(1, flow.circuit_failure_threshold),
-                recovery_timeout_sec=max(0.1, flow.circuit_recovery_timeout_sec),
-                request_id=request_id,
-            )
+    def _succeed_run(self, db: Session, run: Run, started: datetime, result: RestCallResult) -> Run:
+        finished = _now()
+        run.status = "SUCCEEDED"
+        run.target_response = result.payload
+        run.http_status = result.status_code
+        run.attempt_count = result.attempt_count
+        run.hedge_won = result.hedge_won
+        run.finished_at = finished
+        run.duration_ms = int((finished - started).total_seconds() * 1000)
+        db.commit()
+        db.refresh(run)
+        return run
 
-            finished = _now()
-            run.status = "SUCCEEDED"
-            run.target_response = result.payload
-            run.http_status = result.status_code
-            run.attempt_count = result.attempt_count
-            run.finished_at = finished
-            run.duration_ms = int((finished - started).total_seconds() * 1000)
-            db.commit()
-            db.refresh(run)
-            return run
+    def _fail_run(
+        self,
+        db: Session,
+        flow: Flow | FlowRoute,
+        run: Run,
+        started: datetime,
+        exc: Exception,
+        source_payload: dict,
+        mapped_payload: dict | None,
+    ) -> None:
+        finished = _now()
+        run.status = "FAILED"
+        run.error_message = str(exc)
+        run.finished_at = finished
+        run.duration_ms = int((finished - started).total_seconds() * 1000)
+        db.commit()
+        db.refresh(run)
 
-        except Exception as exc:
-            finished = _now()
-            run.status = "FAILED"
-            run.error_message = str(exc)
-            run.finished_at = finished
-            run.duration_ms = int((finished - started).total_seconds() * 1000)
-            db.commit()
-            db.refresh(run)
-
-            dlq_entry = DeadLetter(
-                flow_id=flow.id,
-                run_id=run.id,
-                source_payload=source_payload,
-                mapped_payload=mapped_payload,
-                error_message=str(exc),
-                status="PENDING",
-            )
-            db.add(dlq_entry)
-            db.commit()
-            raise
+        dlq_entry = DeadLetter(
+            flow_id=flow.id,
+            run_id=run.id,
+            source_payload=source_payload,
+            mapped_payload=mapped_payload,
+            error_message=str(exc),
+            status="PENDING",
+        )
+        db.add(dlq_entry)
+        db.commit()
 
     async def replay_dead_letter(self, db: Session, dead_letter: DeadLetter, request_id: str) -> Run:
         flow = db.query(Flow).filter(Flow.id == dead_letter.flow_id).first()
         if not flow:
             raise ValueError("Flow not found for dead letter")
+        source_payload = dead_letter.source_payload
+        if isinstance(source_payload, dict) and source_payload.get(STREAMED_SOURCE_MARKER):
+            raise ValueError("Streamed runs do not keep their payload and cannot be replayed")
 
-        run = await self.run_flow(db, flow, dead_letter.source_payload, request_id)
+        run = await self.run_flow(db, flow, source_payload, request_id)
         dead_letter.status = "REPLAYED"
         dead_letter.replay_count += 1
         dead_letter.last_replayed_at = _now()
@@ -0,0 +1,283 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+logger = logging.getLogger("synapseops.ingest_log")
+
+# length, crc32 (of type + seq + body), record type, sequence number
+_HEADER = struct.Struct("<IIBQ")
+_ENTRY = 1
+_COMMIT = 2
+_SEGMENT_GLOB = "ingest-*.log"
+_RUN_NAMESPACE = uuid.UUID("5f1c8e2a-4b7d-4c0e-9a61-2f3b8d7e6c10")
+
+
+@dataclass
+class IngestEntry:
+    seq: int
+    epoch: str
+    kind: str  # "flow" | "event"
+    target: str  # flow id or event name
+    payload: dict = field(repr=False)
+    request_id: str = ""
+    run_key: str = ""  # random per entry; older records without one fall back to epoch:seq
+
+    def run_id(self, flow_id: str) -> str:
+        """Deterministic Run id, so replaying an entry finds the Run it already created.
+
+        Derived from a random key stored in the entry rather than its sequence number, which
+        restarts once every segment has been committed and deleted.
+        """
+        run_key = self.run_key or f"{self.epoch}:{self.seq}"
+        return str(uuid.uuid5(_RUN_NAMESPACE, f"{run_key}:{flow_id}"))
+
+
+def _encode(record_type: int, seq: int, body: bytes) -> bytes:
+    crc = zlib.crc32(body, zlib.crc32(struct.pack("<BQ", record_type, seq)))
+    return _HEADER.pack(len(body), crc, record_type, seq) + body
+
+
+def _read_records(path: Path) -> tuple[list[tuple[int, int, bytes]], int]:
+    """Return the valid records of a segment and the offset where they end (a torn tail stops the scan)."""
+    data = path.read_bytes()
+    records = []
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, crc, record_type, seq = _HEADER.unpack_from(data, offset)
+        body = data[offset + _HEADER.size : offset + _HEADER.size + length]
+        if len(body) != length or zlib.crc32(body, zlib.crc32(struct.pack("<BQ", record_type, seq))) != crc:
+            logger.warning("Ingest log %s is corrupt or truncated at offset %s", path.name, offset)
+            break
+        records.append((record_type, seq, body))
+        offset += _HEADER.size + length
+    return records, offset
+
+
+class IngestLog:
+    """Append-only, segment-rotated write-ahead log of accepted webhooks.
+
+    ``append`` returns once the record is fsynced; concurrent appends share one fsync
+    (group commit). ``commit`` marks an entry processed without waiting for disk, so a
+    crash can replay an entry whose run already finished (delivery is at-least-once).
+    Segments are deleted once every entry in them is committed.
+
+    A log directory belongs to one process at a time, held with ``flock``. The first process
+    uses ``directory`` itself and each further worker the first free ``worker-<n>`` slot below
+    it, so every worker has its own segments and restarting with the same worker count replays
+    every slot.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_interval_sec: float = 0.002,
+        fsync: bool = True,
+    ) -> None:
+        self.root = Path(directory)
+        self.directory = self.root
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval_sec = fsync_interval_sec
+        self.fsync = fsync
+        self.epoch = ""
+        self._file: BinaryIO | None = None
+        self._lock_file: BinaryIO | None = None
+        self._segment: Path | None = None
+        self._next_seq = 1
+        self._entry_segments: dict[int, Path] = {}
+        self._outstanding: dict[Path, int] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._flush_task: asyncio.Task | None = None
+        self.appended = 0
+        self.committed = 0
+        self.fsyncs = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> list[IngestEntry]:
+        """Open the log and return the entries that were never committed, oldest first."""
+        self._claim_directory()
+        epoch_file = self.directory / "EPOCH"
+        if not epoch_file.exists():
+            epoch_file.write_text(uuid.uuid4().hex)
+        self.epoch = epoch_file.read_text().strip()
+
+        entries: dict[int, tuple[IngestEntry, Path]] = {}
+        max_seq = 0
+        segments = sorted(self.directory.glob(_SEGMENT_GLOB))
+        for segment in segments:
+            records, _ = _read_records(segment)
+            for record_type, seq, body in records:
+                max_seq = max(max_seq, seq)
+                if record_type == _ENTRY:
+                    data = json.loads(body)
+                    entries[seq] = (IngestEntry(seq=seq, epoch=self.epoch, **data), segment)
+                elif record_type == _COMMIT:
+                    entries.pop(seq, None)
+
+        self._next_seq = max_seq + 1
+        self._entry_segments = {seq: segment for seq, (_, segment) in entries.items()}
+        self._outstanding = {segment: 0 for segment in segments}
+        for segment in self._entry_segments.values():
+            self._outstanding[segment] += 1
+        for segment, count in list(self._outstanding.items()):
+            if count == 0:
+                self._remove_segment(segment)
+
+        self._open_segment()
+        return [entry for _, (entry, _) in sorted(entries.items())]
+
+    def _claim_directory(self) -> None:
+        if self._lock_file is not None:
+            return
+        slot = 0
+        while True:
+            directory = self.root if slot == 0 else self.root / f"worker-{slot}"
+            directory.mkdir(parents=True, exist_ok=True)
+            lock_file = open(directory / "LOCK", "ab")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+                continue
+            self.directory = directory
+            self._lock_file = lock_file
+            return
+
+    def _open_segment(self) -> None:
+        self._segment = self.directory / f"ingest-{self._next_seq:020d}.log"
+        self._file = open(self._segment, "ab")
+        self._outstanding.setdefault(self._segment, 0)
+        self._fsync_directory()
+
+    def _fsync_directory(self) -> None:
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _remove_segment(self, segment: Path) -> None:
+        self._outstanding.pop(segment, None)
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def append(self, kind: str, target: str, payload: dict, request_id: str) -> IngestEntry:
+        if self._file is None:
+            raise RuntimeError("Ingest log is not open")
+        seq = self._next_seq
+        self._next_seq += 1
+        run_key = uuid.uuid4().hex
+        record = {
+            "kind": kind,
+            "target": target,
+            "payload": payload,
+            "request_id": request_id,
+            "run_key": run_key,
+        }
+        body = json.dumps(record, separators=(",", ":")).encode()
+        self._file.write(_encode(_ENTRY, seq, body))
+        self._entry_segments[seq] = self._segment
+        self._outstanding[self._segment] += 1
+        self.appended += 1
+
+        await self._sync()
+        return IngestEntry(
+            seq=seq,
+            epoch=self.epoch,
+            kind=kind,
+            target=target,
+            payload=payload,
+            request_id=request_id,
+            run_key=run_key,
+        )
+
+    def commit(self, seq: int) -> None:
+        segment = self._entry_segments.pop(seq, None)
+        if segment is None or self._file is None:
+            return
+        self._file.write(_encode(_COMMIT, seq, b""))
+        self.committed += 1
+        self._outstanding[segment] -= 1
+        if self._outstanding[segment] == 0 and segment != self._segment:
+            self._remove_segment(segment)
+
+    async def _sync(self) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_loop())
+        await waiter
+
+    async def _flush_loop(self) -> None:
+        while self._waiters:
+            # Give concurrent appends a moment to join this batch before paying for the fsync.
+            await asyncio.sleep(self.fsync_interval_sec)
+            waiters, self._waiters = self._waiters, []
+            try:
+                file = self._file
+                file.flush()
+                if self.fsync:
+                    await asyncio.to_thread(os.fsync, file.fileno())
+                self.fsyncs += 1
+                if file is self._file and file.tell() >= self.segment_max_bytes:
+                    self._rotate()
+            except Exception as exc:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(exc)
+                continue
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def _rotate(self) -> None:
+        # Records appended during the threaded fsync still sit in the old segment: sync them before switching.
+        old_segment = self._segment
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._open_segment()
+        if self._outstanding.get(old_segment) == 0:
+            self._remove_segment(old_segment)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the flock
+            self._lock_file = None
+
+    def stats(self) -> dict:
+        return {
+            "open": self.is_open,
+            "directory": str(self.directory),
+            "segments": len(self._outstanding),
+            "pending": len(self._entry_segments),
+            "appended": self.appended,
+            "committed": self.committed,
+            "fsyncs": self.fsyncs,
+        }
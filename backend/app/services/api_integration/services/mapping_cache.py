@@ -0,0 +1,131 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from app.config import MAPPING_RESULT_CACHE_SIZE, MAPPING_RESULT_CACHE_TTL_SEC
+from app.services.api_integration.services.mapping_engine import (
+    _structural_copy,
+    get_compiled_mapping,
+)
+from app.services.api_integration.services.transforms import transforms_generation
+
+
+def payload_hash(payload: Any) -> bytes:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+class MappingResultCache:
+    """Bounded LRU/TTL cache of mapped payloads for repeated source payloads.
+
+    Entries are keyed by (mapping id, rules fingerprint, transforms generation, payload hash),
+    so edited rules or reloaded lookup tables never serve a stale result. Every caller gets its
+    own structural copy of the cached result, so mutating it cannot leak into later runs.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._versions: dict[str, str | None] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def map(self, mapping: Any, source_payload: Any) -> dict:
+        compiled = get_compiled_mapping(mapping)
+        if not self.enabled:
+            return compiled.apply(source_payload)
+
+        try:
+            digest = payload_hash(source_payload)
+        except (TypeError, ValueError):
+            return compiled.apply(source_payload)
+
+        with self._lock:
+            if self._versions.get(mapping.id, compiled.version) != compiled.version:
+                self._invalidate_locked(mapping.id)
+            self._versions[mapping.id] = compiled.version
+
+        key = (mapping.id, compiled.version, transforms_generation(), digest)
+        cached = self.get(key)
+        if cached is not None:
+            return _structural_copy(cached)
+
+        mapped_payload = compiled.apply(source_payload)
+        self.put(key, mapped_payload)
+        return _structural_copy(mapped_payload)
+
+    def get(self, key: tuple) -> dict | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: dict) -> None:
+        expires_at = self._clock() + self.ttl_sec
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, mapping_id: str | None = None) -> int:
+        with self._lock:
+            return self._invalidate_locked(mapping_id)
+
+    def _invalidate_locked(self, mapping_id: str | None) -> int:
+        if mapping_id is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._versions.clear()
+        else:
+            stale = [key for key in self._entries if key[0] == mapping_id]
+            for key in stale:
+                del self._entries[key]
+            removed = len(stale)
+            self._versions.pop(mapping_id, None)
+        self.invalidations += removed
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+mapping_result_cache = MappingResultCache(MAPPING_RESULT_CACHE_SIZE, MAPPING_RESULT_CACHE_TTL_SEC)
@@ -0,0 +1,209 @@
+import math
+from collections.abc import Callable
+from typing import Any
+
+from app.services.api_integration.services.mapping_engine import (
+    _MISSING,
+    PathSegments,
+    _build_skeleton,
+    _compile_path,
+    _default_copier,
+    _split_path,
+)
+from app.services.api_integration.services.transforms import (
+    _lower,
+    _to_float,
+    _to_int,
+    _to_str,
+    _upper,
+    get_transform,
+)
+
+# Inline expressions for the built-in transforms; "{v}" is the value variable.
+# Any other registered transform is called through _TRANSFORMS.
+TRANSFORM_EXPRESSIONS: dict[Callable[[Any], Any], str] = {
+    _to_float: "None if {v} is None else float({v})",
+    _to_int: "None if {v} is None else int({v})",
+    _to_str: "None if {v} is None else str({v})",
+    _upper: "None if {v} is None else str({v}).upper()",
+    _lower: "None if {v} is None else str({v}).lower()",
+}
+
+
+class UnsupportedMappingRuleError(Exception):
+    pass
+
+
+def _is_literal(value: Any) -> bool:
+    if value is None or isinstance(value, (bool, int, str)):
+        return True
+    return isinstance(value, float) and math.isfinite(value)
+
+
+class _MappingSourceWriter:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.constants: list[Any] = []
+        self.copiers: list[Callable[[Any], Any] | None] = []
+        self.transforms: list[Callable[[Any], Any]] = []
+        self._counter = 0
+
+    def _var(self, prefix: str) -> str:
+        self._counter += 1
+        return f"_{prefix}{self._counter}"
+
+    def _emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def _default_expr(self, value: Any) -> str:
+        if _is_literal(value):
+            return repr(value)
+        index = len(self.constants)
+        self.constants.append(value)
+        self.copiers.append(_default_copier(value))
+        if self.copiers[index] is None:
+            return f"_CONSTANTS[{index}]"
+        return f"_COPIERS[{index}](_CONSTANTS[{index}])"
+
+    def _transform_expr(self, transform_name: Any) -> str:
+        transform = get_transform(transform_name)
+        if transform is None:
+            raise UnsupportedMappingRuleError(f"transform {transform_name!r}")
+        if transform in TRANSFORM_EXPRESSIONS:
+            return TRANSFORM_EXPRESSIONS[transform]
+        self.transforms.append(transform)
+        return f"_TRANSFORMS[{len(self.transforms) - 1}]({{v}})"
+
+    def _emit_lookup(self, indent: int, var: str, src: str, segments: PathSegments | None) -> None:
+        if segments is None:
+            self._emit(indent, f"{var} = {src}")
+            return
+
+        current = src
+        for key, index in segments:
+            dict_get = f"{current}.get({key!r}, _MISSING) if isinstance({current}, dict) else "
+            if index is None:
+                self._emit(indent, f"{var} = {dict_get}_MISSING")
+            else:
+                list_get = (
+                    f"{current}[{index}] if isinstance({current}, list) "
+                    f"and {index} < len({current}) else _MISSING"
+                )
+                self._emit(indent, f"{var} = {dict_get}({list_get})")
+            current = var
+
+    def _emit_copy(self, indent: int, rule: dict, src: str) -> str:
+        transform_name = rule.get("transform")
+        if transform_name is None or transform_name == "identity":
+            expression = None
+        else:
+            expression = self._transform_expr(transform_name)
+
+        var = self._var("v")
+        self._emit_lookup(indent, var, src, _compile_path(str(rule.get("source", "."))))
+
+        if "default" not in rule:
+            if expression is None:
+                self._emit(indent, f"{var} = None if {var} is _MISSING else {var}")
+            else:
+                value = expression.format(v=var)
+                self._emit(indent, f"{var} = None if {var} is _MISSING else {value}")
+            return var
+
+        default = self._default_expr(rule["default"])
+        self._emit(indent, f"if {var} is _MISSING or {var} is None:")
+        self._emit(indent + 1, f"{var} = {default}")
+        if expression is not None:
+            self._emit(indent, "try:")
+            self._emit(indent + 1, f"{var} = {expression.format(v=var)}")
+            self._emit(indent, "except (TypeError, ValueError):")
+            fallback = self._var("f")
+            self._emit(indent + 1, f"{fallback} = {default}")
+            self._emit(indent + 1, f"{var} = {expression.format(v=fallback)}")
+        return var
+
+    def _emit_map_array(self, indent: int, rule: dict, src: str) -> str:
+        item_rules = rule.get("item_rules", [])
+        if not isinstance(item_rules, list):
+            raise UnsupportedMappingRuleError("item_rules must be a list")
+
+        source_var = self._var("a")
+        self._emit_lookup(indent, source_var, src, _compile_path(str(rule.get("source", "."))))
+        if "default" in rule:
+            self._emit(indent, f"if {source_var} is _MISSING or {source_var} is None:")
+            self._emit(indent + 1, f"{source_var} = {self._default_expr(rule['default'])}")
+
+        var = self._var("l")
+        item_var = self._var("s")
+        self._emit(indent, f"{var} = []")
+        self._emit(indent, f"if isinstance({source_var}, list):")
+        self._emit(indent + 1, f"for {item_var} in {source_var}:")
+        item_expression = self.emit_rules(indent + 2, item_rules, item_var)
+        self._emit(indent + 2, f"{var}.append({item_expression})")
+        return var
+
+    def emit_rules(self, indent: int, rules: list[dict], src: str) -> str:
+        targets: list[PathSegments | None] = []
+        variables: list[str] = []
+        for rule in rules:
+            if not isinstance(rule, dict):
+                raise UnsupportedMappingRuleError("rule must be an object")
+            target_path = rule.get("target")
+            if not target_path or not isinstance(target_path, str):
+                raise UnsupportedMappingRuleError("rule must include a target path")
+
+            operation = rule.get("op", "copy")
+            if operation == "map_array":
+                variables.append(self._emit_map_array(indent, rule, src))
+            elif operation == "copy":
+                variables.append(self._emit_copy(indent, rule, src))
+            else:
+                raise UnsupportedMappingRuleError(f"operation {operation!r}")
+            targets.append(_split_path(target_path))
+
+        template = _build_skeleton(targets)
+        if template is None:
+            raise UnsupportedMappingRuleError("target paths need list indexes or overlap")
+        return _dict_literal(template, variables)
+
+
+def _dict_literal(template: dict, variables: list[str]) -> str:
+    items = [
+        f"{key!r}: {variables[node] if isinstance(node, int) else _dict_literal(node, variables)}"
+        for key, node in template.items()
+    ]
+    return "{" + ", ".join(items) + "}"
+
+
+def generate_mapping_source(
+    rules: list[dict], function_name: str = "map_payload"
+) -> tuple[str, list[Any], list[Callable[[Any], Any] | None], list[Callable[[Any], Any]]] | None:
+    writer = _MappingSourceWriter()
+    try:
+        result_expression = writer.emit_rules(1, rules, "source_payload")
+    except UnsupportedMappingRuleError:
+        return None
+
+    lines = [f"def {function_name}(source_payload):"]
+    lines.extend(writer.lines)
+    lines.append(f"    return {result_expression}")
+    lines.append("")
+    return "\n".join(lines), writer.constants, writer.copiers, writer.transforms
+
+
+def compile_mapping_function(rules: list[dict]) -> Callable[[Any], dict] | None:
+    generated = generate_mapping_source(rules)
+    if generated is None:
+        return None
+
+    source, constants, copiers, transforms = generated
+    namespace: dict[str, Any] = {
+        "_MISSING": _MISSING,
+        "_CONSTANTS": tuple(constants),
+        "_COPIERS": tuple(copiers),
+        "_TRANSFORMS": tuple(transforms),
+    }
+    exec(compile(source, "<generated mapping>", "exec"), namespace)  # noqa: S102
+    function = namespace["map_payload"]
+    function.__source__ = source
+    return function
@@ -1,6 +1,86 @@
 import copy
+import hashlib
+import json
+import logging
+import multiprocessing
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from typing import Any
 
+from app.config import MAPPING_CODEGEN
+from app.services.api_integration.services.transforms import (
+    LookupTransform,
+    _lower,
+    _to_float,
+    _to_int,
+    _to_str,
+    _upper,
+    get_transform,
+    install_registry,
+    registry_snapshot,
+    transforms_generation,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+logger = logging.getLogger("synapseops.mapping_engine")
+
+_MISSING = object()
+
+# map_array switches to column-at-a-time execution from this many items on.
+COLUMNAR_MIN_ITEMS = 64
+
+_SCALAR_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+def _is_immutable(value: Any) -> bool:
+    value_type = type(value)
+    if value_type in _SCALAR_TYPES:
+        return True
+    if value_type is tuple or value_type is frozenset:
+        return all(_is_immutable(item) for item in value)
+    return False
+
+
+def _structural_copy(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is dict:
+        return {
+            key: item if type(item) in _SCALAR_TYPES else _structural_copy(item)
+            for key, item in value.items()
+        }
+    if value_type is list:
+        return [item if type(item) in _SCALAR_TYPES else _structural_copy(item) for item in value]
+    if _is_immutable(value):
+        return value
+    return copy.deepcopy(value)
+
+
+def _default_copier(default: Any) -> Callable[[Any], Any] | None:
+    """Pick how a rule default is copied per use: None means it is immutable and shared."""
+    if _is_immutable(default):
+        return None
+    if type(default) is dict and all(type(item) in _SCALAR_TYPES for item in default.values()):
+        return dict.copy
+    if type(default) is list and all(type(item) in _SCALAR_TYPES for item in default):
+        return list.copy
+    return _structural_copy
+
+
+def _copy_default(default: Any) -> Any:
+    copier = _default_copier(default)
+    return default if copier is None else copier(default)
+
 
 def _get_path(data: Any, path: str) -> tuple[Any, bool]:
     if path in {"", "."}:
@@ -74,17 +154,10 @@ def _set_path(data: dict, path: str, value: Any) -> None:
 def _transform(value: Any, transform_name: str | None) -> Any:
     if transform_name is None or transform_name == "identity":
         return value
-    if transform_name in {"to_float", "float"}:
-        return None if value is None else float(value)
-    if transform_name in {"to_int", "int"}:
-        return None if value is None else int(value)
-    if transform_name == "to_str":
-        return None if value is None else str(value)
-    if transform_name == "upper":
-        return None if value is None else str(value).upper()
-    if transform_name == "lower":
-        return None if value is None else str(value).lower()
-    raise ValueError(f"Unsupported transform: {transform_name}")
+    transform = get_transform(transform_name)
+    if transform is None:
+        raise ValueError(f"Unsupported transform: {transform_name}")
+    return transform(value)
 
 
 def _resolve_rule_value(source_payload: Any, rule: dict) -> Any:
@@ -92,7 +165,7 @@ def _resolve_rule_value(source_payload: Any, rule: dict) -> Any:
     raw_value, found = _get_path(source_payload, source_path)
 
     if (not found or raw_value is None) and "default" in rule:
-        raw_value = copy.deepcopy(rule["default"])
+        raw_value = _copy_default(rule["default"])
         found = True
 
     if not found:
@@ -103,7 +176,7 @@ def _resolve_rule_value(source_payload: Any, rule: dict) -> Any:
     except (TypeError, ValueError):
         if "default" not in rule:
             raise
-        fallback = copy.deepcopy(rule["default"])
+        fallback = _copy_default(rule["default"])
         return _transform(fallback, rule.get("transform"))
 
 
@@ -121,7 +194,7 @@ def _apply_rules(source_payload: Any, rules: list[dict]) -> dict:
             source_items, found = _get_path(source_payload, source_path)
 
             if (not found or source_items is None) and "default" in rule:
-                source_items = copy.deepcopy(rule["default"])
+                source_items = _copy_default(rule["default"])
 
             if not isinstance(source_items, list):
                 source_items = []
@@ -140,5 +213,576 @@ def _apply_rules(source_payload: Any, rules: list[dict]) -> dict:
     return result
 
 
+# _apply_rules above is the reference interpreter. Everything below compiles rules into
+# a plan that must produce identical output and raise identical errors.
+PathSegments = tuple[tuple[str, int | None], ...]
+
+
+def _split_path(path: str) -> PathSegments:
+    return tuple((part, int(part) if part.isdigit() else None) for part in path.split("."))
+
+
+def _compile_path(path: str) -> PathSegments | None:
+    if path in {"", "."}:
+        return None
+    return _split_path(path)
+
+
+def _make_getter(segments: PathSegments | None) -> Callable[[Any], Any]:
+    if segments is None:
+        return lambda data: data
+
+    if len(segments) == 1 and segments[0][1] is None:
+        key = segments[0][0]
+
+        def get_key(data: Any) -> Any:
+            if isinstance(data, dict):
+                return data.get(key, _MISSING)
+            return _MISSING
+
+        return get_key
+
+    def get_path(data: Any) -> Any:
+        current = data
+        for key, index in segments:
+            if isinstance(current, dict):
+                if key not in current:
+                    return _MISSING
+                current = current[key]
+            elif isinstance(current, list):
+                if index is None or index >= len(current):
+                    return _MISSING
+                current = current[index]
+            else:
+                return _MISSING
+        return current
+
+    return get_path
+
+
+def _resolve_transform(transform_name: Any) -> Callable[[Any], Any] | None:
+    if transform_name is None or transform_name == "identity":
+        return None
+    transform = get_transform(transform_name)
+    if transform is None:
+        # Unknown names keep failing lazily, exactly where the interpreter would.
+        return partial(_transform, transform_name=transform_name)
+    return transform
+
+
+def _raise_step(message: str) -> Callable[[Any], Any]:
+    def step(source_payload: Any) -> Any:
+        raise ValueError(message)
+
+    return step
+
+
+def _compile_copy(rule: dict) -> Callable[[Any], Any]:
+    getter = _make_getter(_compile_path(str(rule.get("source", "."))))
+    transform = _resolve_transform(rule.get("transform"))
+    has_default = "default" in rule
+    default = rule.get("default")
+    copy_default = _default_copier(default)
+
+    def copy_step(source_payload: Any) -> Any:
+        value = getter(source_payload)
+        if has_default and (value is _MISSING or value is None):
+            value = default if copy_default is None else copy_default(default)
+        elif value is _MISSING:
+            return None
+
+        if transform is None:
+            return value
+        try:
+            return transform(value)
+        except (TypeError, ValueError):
+            if not has_default:
+                raise
+            return transform(default if copy_default is None else copy_default(default))
+
+    return copy_step
+
+
+def _compile_map_array(rule: dict) -> Callable[[Any], Any]:
+    getter = _make_getter(_compile_path(str(rule.get("source", "."))))
+    has_default = "default" in rule
+    default = rule.get("default")
+    copy_default = _default_copier(default)
+    item_rules = rule.get("item_rules", [])
+    map_columns = None
+    if isinstance(item_rules, list):
+        item_mapping = compile_mapping(item_rules)
+        map_item = item_mapping.apply
+        map_columns = _compile_columnar(item_mapping)
+    else:
+        map_item = partial(_apply_rules, rules=item_rules)
+
+    def map_array_step(source_payload: Any) -> Any:
+        source_items = getter(source_payload)
+        if has_default and (source_items is _MISSING or source_items is None):
+            source_items = default if copy_default is None else copy_default(default)
+        if not isinstance(source_items, list):
+            return []
+        if map_columns is not None and len(source_items) >= COLUMNAR_MIN_ITEMS:
+            try:
+                return map_columns(source_items)
+            except (TypeError, ValueError, OverflowError) as exc:
+                # Bad data: re-run row by row so the first failing item raises exactly as before.
+                logger.debug("Columnar map_array fell back to rows: %s", exc)
+        return [map_item(item) for item in source_items]
+
+    return map_array_step
+
+
+# Largest magnitude below which every int survives a round trip through float64.
+_FLOAT_EXACT_INT = 2**53
+
+
+def _numeric_column(transform: Callable[[Any], Any], values: list) -> list | None:
+    types = set(map(type, values))
+    if not types or not types <= {int, float}:
+        return None
+    if transform is _to_int and types == {int}:
+        return list(values)
+    if int in types and any(type(v) is int and abs(v) > _FLOAT_EXACT_INT for v in values):
+        # float64 would round these; the scalar path keeps them exact.
+        return None
+
+    array = np.asarray(values, dtype=np.float64)
+    if transform is _to_float:
+        return array.tolist()
+    if not np.isfinite(array).all() or np.abs(array).max() >= 2**63:
+        return None
+    return np.trunc(array).astype(np.int64).tolist()
+
+
+_COLUMN_TRANSFORMS: dict[Callable[[Any], Any], Callable[[list], list]] = {
+    _to_float: lambda values: [None if v is None else float(v) for v in values],
+    _to_int: lambda values: [None if v is None else int(v) for v in values],
+    _to_str: lambda values: [None if v is None else str(v) for v in values],
+    _upper: lambda values: [None if v is None else str(v).upper() for v in values],
+    _lower: lambda values: [None if v is None else str(v).lower() for v in values],
+}
+
+
+def _column_transform(transform: Callable[[Any], Any] | None) -> Callable[[list], list] | None:
+    if transform is None:
+        return None
+    if transform in _COLUMN_TRANSFORMS:
+        return _COLUMN_TRANSFORMS[transform]
+    if isinstance(transform, LookupTransform):
+        return transform.column
+    return lambda values: [transform(v) for v in values]
+
+
+def _column_values(items: list, segments: PathSegments | None) -> list:
+    if segments is None:
+        return list(items)
+    if len(segments) == 1 and segments[0][1] is None:
+        key = segments[0][0]
+        return [item.get(key, _MISSING) if isinstance(item, dict) else _MISSING for item in items]
+    getter = _make_getter(segments)
+    return [getter(item) for item in items]
+
+
+def _compile_copy_column(rule: dict) -> Callable[[list], list]:
+    segments = _compile_path(str(rule.get("source", ".")))
+    transform = _resolve_transform(rule.get("transform"))
+    transform_column = _column_transform(transform)
+    has_default = "default" in rule
+    default = rule.get("default")
+    copy_default = _default_copier(default)
+
+    def copy_column(items: list) -> list:
+        values = _column_values(items, segments)
+        if has_default and copy_default is None:
+            values = [default if v is _MISSING or v is None else v for v in values]
+        elif has_default:
+            values = [copy_default(default) if v is _MISSING or v is None else v for v in values]
+        else:
+            values = [None if v is _MISSING else v for v in values]
+        if transform is None:
+            return values
+
+        if np is not None and transform in (_to_float, _to_int):
+            converted = _numeric_column(transform, values)
+            if converted is not None:
+                return converted
+        try:
+            return transform_column(values)
+        except (TypeError, ValueError):
+            if not has_default:
+                raise
+
+        column = []
+        for value in values:
+            try:
+                column.append(transform(value))
+            except (TypeError, ValueError):
+                column.append(transform(default if copy_default is None else copy_default(default)))
+        return column
+
+    return copy_column
+
+
+def _compile_columnar(item_mapping: "CompiledMapping") -> Callable[[list], list] | None:
+    """Column-at-a-time executor for item rules that write distinct top-level keys."""
+    keys = []
+    columns = []
+    for rule, step, (target_path, segments) in zip(item_mapping.rules, item_mapping._steps, item_mapping._targets):
+        if segments is None or len(segments) != 1 or segments[0][1] is not None or target_path in keys:
+            return None
+        if rule.get("op", "copy") == "map_array":
+            columns.append(partial(map, step))
+        else:
+            columns.append(_compile_copy_column(rule))
+        keys.append(target_path)
+
+    if not keys:
+        return None
+
+    def map_columns(items: list) -> list:
+        return [dict(zip(keys, row)) for row in zip(*[column(items) for column in columns])]
+
+    return map_columns
+
+
+def _compile_step(rule: dict) -> tuple[Callable[[Any], Any], str | None, PathSegments | None]:
+    operation = rule.get("op", "copy")
+    target_path = rule.get("target")
+    if not target_path:
+        return _raise_step("Mapping rule must include a target path"), None, None
+
+    target = _split_path(target_path)
+    if operation == "map_array":
+        return _compile_map_array(rule), target_path, target
+    if operation != "copy":
+        return _raise_step(f"Unsupported mapping operation: {operation}"), None, None
+    return _compile_copy(rule), target_path, target
+
+
+def _build_skeleton(targets: list[PathSegments | None]) -> dict | None:
+    """Return a key-ordered template of the target dict, or None when targets need _set_path."""
+    real_targets = [(slot, target) for slot, target in enumerate(targets) if target is not None]
+    keys = {tuple(key for key, _ in target) for _, target in real_targets}
+
+    template: dict = {}
+    for slot, target in real_targets:
+        if any(index is not None for _, index in target):
+            return None
+        path = tuple(key for key, _ in target)
+        if any(path[:depth] in keys for depth in range(1, len(path))):
+            return None
+
+        node = template
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = slot
+    return template
+
+
+def _make_builder(template: dict) -> Callable[[list], dict]:
+    keys = tuple(template)
+    slots = tuple(template.values())
+    if all(isinstance(slot, int) for slot in slots):
+        if slots == tuple(range(len(slots))):
+            return lambda values: dict(zip(keys, values))
+        return lambda values: {key: values[slot] for key, slot in zip(keys, slots)}
+
+    children = tuple(
+        slot if isinstance(slot, int) else _make_builder(slot) for slot in slots
+    )
+
+    def build(values: list) -> dict:
+        return {
+            key: values[child] if isinstance(child, int) else child(values)
+            for key, child in zip(keys, children)
+        }
+
+    return build
+
+
+def _set_segments(data: dict, path: str, segments: PathSegments, value: Any) -> None:
+    current: Any = data
+    last = len(segments) - 1
+    for i in range(last):
+        part, index = segments[i]
+        next_is_list = segments[i + 1][1] is not None
+
+        if isinstance(current, dict):
+            if part not in current or not isinstance(current[part], (dict, list)):
+                current[part] = [] if next_is_list else {}
+            current = current[part]
+            continue
+
+        if isinstance(current, list):
+            if index is None:
+                raise ValueError(f"Cannot set path '{path}' on list with key '{part}'")
+            while len(current) <= index:
+                current.append(None)
+            if current[index] is None or not isinstance(current[index], (dict, list)):
+                current[index] = [] if next_is_list else {}
+            current = current[index]
+            continue
+
+        raise ValueError(f"Cannot set path '{path}' on non-container value")
+
+    final_part, index = segments[last]
+    if isinstance(current, dict):
+        current[final_part] = value
+        return
+
+    if isinstance(current, list):
+        if index is None:
+            raise ValueError(f"Cannot set list path '{path}' with key '{final_part}'")
+        while len(current) <= index:
+            current.append(None)
+        current[index] = value
+        return
+
+    raise ValueError(f"Cannot set path '{path}' on non-container value")
+
+
+class CompiledMapping:
+    """Pre-parsed executable plan for a list of mapping rules.
+
+    Paths are split once, transforms are resolved to callables once and, when the
+    target paths allow it, the output dict is built from a pre-computed skeleton
+    instead of walking ``_set_path`` for every field.
+    """
+
+    __slots__ = ("rules", "apply", "mode", "version", "_steps", "_targets", "_build")
+
+    def __init__(self, rules: list[dict], codegen: bool = False) -> None:
+        self.rules = rules
+        self.version: str | None = None
+        compiled = [_compile_step(rule) for rule in rules]
+        self._steps = tuple(step for step, _, _ in compiled)
+        self._targets = tuple((path, segments) for _, path, segments in compiled)
+
+        template = _build_skeleton([segments for _, segments in self._targets])
+        if template is not None:
+            self._build = _make_builder(template)
+            self.mode = "skeleton"
+            self.apply = self._make_skeleton_apply()
+        else:
+            self._build = None
+            self.mode = "set_path"
+            self.apply = self._apply_with_set_path
+
+        if codegen:
+            from app.services.api_integration.services.mapping_codegen import (
+                compile_mapping_function,
+            )
+
+            function = compile_mapping_function(rules)
+            if function is not None:
+                self.mode = "codegen"
+                self.apply = function
+
+    def _make_skeleton_apply(self) -> Callable[[Any], dict]:
+        steps = self._steps
+        build = self._build
+
+        def apply(source_payload: Any) -> dict:
+            return build([step(source_payload) for step in steps])
+
+        return apply
+
+    def assemble(self, values: list) -> dict:
+        """Build the target dict from one already-computed value per rule."""
+        if self._build is not None:
+            return self._build(values)
+        result: dict[str, Any] = {}
+        for value, (path, segments) in zip(values, self._targets):
+            if segments is not None:
+                _set_segments(result, path, segments, value)
+        return result
+
+    def _apply_with_set_path(self, source_payload: Any) -> dict:
+        result: dict[str, Any] = {}
+        for step, (path, segments) in zip(self._steps, self._targets):
+            value = step(source_payload)
+            if segments is not None:
+                _set_segments(result, path, segments, value)
+        return result
+
+
+def compile_mapping(rules: list[dict], codegen: bool = False) -> CompiledMapping:
+    return CompiledMapping(rules, codegen=codegen)
+
+
+@dataclass
+class _CacheEntry:
+    version: datetime | None
+    compiled: CompiledMapping
+
+
+_compiled_cache: dict[str, _CacheEntry] = {}
+
+
+def rules_fingerprint(rules: Any) -> str:
+    canonical = json.dumps(rules, sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_compiled_mapping(mapping: Any) -> CompiledMapping:
+    """Return the cached plan for a ``Mapping`` row, recompiling when its rules change."""
+    entry = _compiled_cache.get(mapping.id)
+    if entry is not None and entry.version == mapping.created_at and entry.compiled.rules == mapping.rules:
+        return entry.compiled
+
+    compiled = compile_mapping(copy.deepcopy(mapping.rules), codegen=MAPPING_CODEGEN)
+    compiled.version = rules_fingerprint(compiled.rules)
+    _compiled_cache[mapping.id] = _CacheEntry(version=mapping.created_at, compiled=compiled)
+    return compiled
+
+
+def invalidate_compiled_mapping(mapping_id: str | None = None) -> None:
+    if mapping_id is None:
+        _compiled_cache.clear()
+        with _plans_lock:
+            _plans_by_fingerprint.clear()
+            _plans_by_id.clear()
+    else:
+        _compiled_cache.pop(mapping_id, None)
+
+
+# Plans for ad-hoc ``apply_mapping`` calls. A caller passing the same rules list again hits
+# ``_plans_by_id`` (one equality check against the plan's private copy of the rules); equal
+# rules built afresh for every call fall through to ``_plans_by_fingerprint``.
+APPLY_MAPPING_CACHE_SIZE = 64
+_plans_lock = threading.Lock()
+_plans_by_fingerprint: OrderedDict[str, CompiledMapping] = OrderedDict()
+_plans_by_id: OrderedDict[int, tuple[list[dict], CompiledMapping]] = OrderedDict()
+
+
+def _plan_for(rules: list[dict]) -> CompiledMapping:
+    entry = _plans_by_id.get(id(rules))
+    if entry is not None and entry[0] == rules:
+        return entry[1]
+
+    fingerprint = rules_fingerprint(rules)
+    with _plans_lock:
+        compiled = _plans_by_fingerprint.get(fingerprint)
+        if compiled is None:
+            compiled = compile_mapping(copy.deepcopy(rules))
+            compiled.version = fingerprint
+            _plans_by_fingerprint[fingerprint] = compiled
+        _plans_by_fingerprint.move_to_end(fingerprint)
+        _plans_by_id[id(rules)] = (compiled.rules, compiled)
+        _plans_by_id.move_to_end(id(rules))
+        for plans in (_plans_by_fingerprint, _plans_by_id):
+            while len(plans) > APPLY_MAPPING_CACHE_SIZE:
+                plans.popitem(last=False)
+    return compiled
+
+
 def apply_mapping(source_payload: dict, rules: list[dict]) -> dict:
-    return _apply_rules(source_payload, rules)
+    return _plan_for(rules).apply(source_payload)
+
+
+def _map_records(compiled: CompiledMapping, payloads: Iterable[Any], return_exceptions: bool) -> list:
+    apply = compiled.apply
+    if not return_exceptions:
+        return [apply(payload) for payload in payloads]
+
+    results: list = []
+    for payload in payloads:
+        try:
+            results.append(apply(payload))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+def _map_chunk(rules: list[dict], payloads: list[Any], codegen: bool, return_exceptions: bool) -> list:
+    return _map_records(compile_mapping(rules, codegen=codegen), payloads, return_exceptions)
+
+
+def apply_mapping_batch(
+    payloads: list[dict],
+    rules: list[dict],
+    processes: int = 0,
+    chunk_size: int = 1000,
+    return_exceptions: bool = False,
+    codegen: bool = False,
+) -> list:
+    """Map many payloads with one compiled plan.
+
+    With ``processes`` > 1 the payloads are split into ``chunk_size`` chunks and mapped
+    on a process pool; each worker compiles the rules once for its chunk. Workers start
+    with a copy of this process's registered transforms and lookup tables, and the pool
+    is restarted when those change. With ``return_exceptions`` a failing record yields
+    its exception instead of aborting the batch.
+    """
+    pool = None if processes <= 1 or len(payloads) <= chunk_size else _batch_pool(processes)
+    if pool is None:
+        return _map_records(compile_mapping(rules, codegen=codegen), payloads, return_exceptions)
+
+    chunks = [payloads[start : start + chunk_size] for start in range(0, len(payloads), chunk_size)]
+    try:
+        mapped_chunks = list(
+            pool.map(
+                _map_chunk,
+                [rules] * len(chunks),
+                chunks,
+                [codegen] * len(chunks),
+                [return_exceptions] * len(chunks),
+            )
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool on the next call.
+        shutdown_batch_pool(wait=False)
+        raise
+    return [record for chunk in mapped_chunks for record in chunk]
+
+
+_pool_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_generation = -1
+_unshareable_generation = -1
+
+
+def _batch_pool(processes: int) -> ProcessPoolExecutor | None:
+    """The process pool shared by every batch, started on first use so spawn cost is paid once.
+
+    Returns None when the transform registry cannot be sent to workers (a lambda registered as
+    a transform, say); the caller then maps in this process.
+    """
+    global _pool, _pool_workers, _pool_generation, _unshareable_generation
+    with _pool_lock:
+        generation = transforms_generation()
+        if _pool is not None and _pool_workers >= processes and _pool_generation == generation:
+            return _pool
+        if _unshareable_generation == generation:
+            return None
+        snapshot = registry_snapshot()
+        try:
+            pickle.dumps(snapshot)
+        except (pickle.PicklingError, AttributeError, TypeError) as exc:
+            logger.debug("Mapping in-process: transforms cannot be sent to workers (%s)", exc)
+            _unshareable_generation = generation
+            return None
+        if _pool is not None:
+            # Chunks already submitted to the old pool still finish.
+            _pool.shutdown(wait=False)
+        context = multiprocessing.get_context("spawn")
+        _pool = ProcessPoolExecutor(
+            max_workers=max(processes, _pool_workers),
+            mp_context=context,
+            initializer=install_registry,
+            initargs=(snapshot,),
+        )
+        _pool_workers = max(processes, _pool_workers)
+        _pool_generation = generation
+        return _pool
+
+
+def shutdown_batch_pool(wait: bool = True) -> None:
+    global _pool, _pool_workers, _pool_generation
+    with _pool_lock:
+        pool, _pool, _pool_workers, _pool_generation = _pool, None, 0, -1
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,458 @@
+import codecs
+import json
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from functools import partial
+from json.decoder import JSONDecodeError, scanstring
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO
+
+from app.services.api_integration.services.mapping_engine import (
+    CompiledMapping,
+    _apply_rules,
+    _compile_path,
+    compile_mapping,
+)
+
+# Mapped map_array items and the mapped body stay in memory up to this size, then spill to disk.
+SPOOL_MEMORY_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_SCALAR_START = frozenset('"-0123456789tfnNI')
+_decoder = json.JSONDecoder()
+
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _AFTER_VALUE, _DONE = range(7)
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class JsonEventParser:
+    """Incremental JSON parser: feed() byte chunks, get ijson-style (event, value) tuples back."""
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self._containers: list[str] = []
+        self._state = _VALUE
+        self.bytes_read = 0
+
+    def feed(self, data: bytes) -> list[tuple[str, Any]]:
+        self.bytes_read += len(data)
+        self._text += self._decode(data)
+        return self._parse(final=False)
+
+    def close(self) -> list[tuple[str, Any]]:
+        self._text += self._decode(b"", final=True)
+        events = self._parse(final=True)
+        if self._state != _DONE:
+            raise JsonStreamError("Unexpected end of JSON input")
+        return events
+
+    def _scalar(self, text: str, pos: int, final: bool) -> tuple[Any, int] | None:
+        char = text[pos]
+        if char not in _SCALAR_START:
+            raise JsonStreamError(f"Unexpected character {char!r} in JSON input")
+        if char in "-0123456789" and not final and _NUMBER_TAIL.fullmatch(text, pos):
+            return None
+        try:
+            if char == '"':
+                return scanstring(text, pos + 1)
+            return _decoder.raw_decode(text, pos)
+        except JSONDecodeError as exc:
+            if final:
+                raise JsonStreamError(str(exc)) from exc
+            return None
+
+    def _parse(self, final: bool) -> list[tuple[str, Any]]:
+        text = self._text
+        length = len(text)
+        containers = self._containers
+        state = self._state
+        events: list[tuple[str, Any]] = []
+        pos = 0
+
+        while True:
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos >= length:
+                break
+            char = text[pos]
+
+            if state == _VALUE or state == _VALUE_OR_END:
+                if char == "]" and state == _VALUE_OR_END:
+                    containers.pop()
+                    events.append(("end_array", None))
+                    pos += 1
+                elif char == "{":
+                    containers.append("{")
+                    events.append(("start_map", None))
+                    pos += 1
+                    state = _KEY_OR_END
+                    continue
+                elif char == "[":
+                    containers.append("[")
+                    events.append(("start_array", None))
+                    pos += 1
+                    state = _VALUE_OR_END
+                    continue
+                else:
+                    scalar = self._scalar(text, pos, final)
+                    if scalar is None:
+                        break
+                    value, pos = scalar
+                    events.append(("value", value))
+                state = _AFTER_VALUE if containers else _DONE
+
+            elif state == _KEY_OR_END or state == _KEY:
+                if char == "}" and state == _KEY_OR_END:
+                    containers.pop()
+                    events.append(("end_map", None))
+                    pos += 1
+                    state = _AFTER_VALUE if containers else _DONE
+                elif char == '"':
+                    try:
+                        key, pos = scanstring(text, pos + 1)
+                    except JSONDecodeError as exc:
+                        if final:
+                            raise JsonStreamError(str(exc)) from exc
+                        break
+                    events.append(("map_key", key))
+                    state = _COLON
+                else:
+                    raise JsonStreamError(f"Expected object key, got {char!r}")
+
+            elif state == _COLON:
+                if char != ":":
+                    raise JsonStreamError(f"Expected ':', got {char!r}")
+                pos += 1
+                state = _VALUE
+
+            elif state == _AFTER_VALUE:
+                top = containers[-1]
+                if char == ",":
+                    state = _KEY if top == "{" else _VALUE
+                    pos += 1
+                elif (char == "}" and top == "{") or (char == "]" and top == "["):
+                    containers.pop()
+                    events.append(("end_map" if top == "{" else "end_array", None))
+                    pos += 1
+                    state = _AFTER_VALUE if containers else _DONE
+                else:
+                    raise JsonStreamError(f"Unexpected character {char!r} after value")
+
+            else:
+                raise JsonStreamError("Extra data after JSON document")
+
+        self._text = text[pos:]
+        self._state = state
+        return events
+
+
+class _PathNode:
+    __slots__ = ("keys", "indexes", "max_index", "capture", "stream_rules")
+
+    def __init__(self) -> None:
+        self.keys: dict[str, _PathNode] = {}
+        self.indexes: dict[int, _PathNode] = {}
+        self.max_index = -1
+        self.capture = False
+        self.stream_rules: list[int] = []
+
+    def child(self, key: str, index: int | None) -> "_PathNode":
+        node = self.keys.get(key)
+        if node is None:
+            node = self.keys[key] = _PathNode()
+            if index is not None:
+                self.indexes[index] = node
+                self.max_index = max(self.max_index, index)
+        return node
+
+
+def _build_path_tree(compiled: CompiledMapping) -> _PathNode:
+    # Spooled arrays are opaque placeholders, so only skeleton-built targets can hold them.
+    can_stream = compiled._build is not None
+    root = _PathNode()
+    for rule_index, (rule, (_, target)) in enumerate(zip(compiled.rules, compiled._targets)):
+        if target is None:
+            continue
+        segments = _compile_path(str(rule.get("source", ".")))
+        node = root
+        for key, index in segments or ():
+            node = node.child(key, index)
+        if can_stream and rule.get("op", "copy") == "map_array" and segments is not None:
+            node.stream_rules.append(rule_index)
+        else:
+            node.capture = True
+
+    # An array can only be streamed when nothing else reads inside or around it.
+    pending = [(root, False)]
+    while pending:
+        node, under_capture = pending.pop()
+        if node.stream_rules and (under_capture or node.capture or node.keys):
+            node.capture = True
+            node.stream_rules = []
+        for child in node.keys.values():
+            pending.append((child, under_capture or node.capture))
+    return root
+
+
+class _SpooledArray:
+    """JSON array of already-serialized mapped items, kept in a spooled temp file."""
+
+    def __init__(self) -> None:
+        self.file: BinaryIO = SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        self.count = 0
+
+    def append(self, item: Any) -> None:
+        if self.count:
+            self.file.write(b",")
+        self.file.write(_dumps(item))
+        self.count += 1
+
+    def reset(self) -> None:
+        self.file.seek(0)
+        self.file.truncate()
+        self.count = 0
+
+    def write_to(self, out: BinaryIO) -> None:
+        self.file.seek(0)
+        out.write(b"[")
+        while chunk := self.file.read(READ_CHUNK_BYTES):
+            out.write(chunk)
+        out.write(b"]")
+        self.file.close()
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _write_json(value: Any, out: BinaryIO) -> None:
+    if isinstance(value, _SpooledArray):
+        value.write_to(out)
+    elif type(value) is dict:
+        out.write(b"{")
+        for position, (key, item) in enumerate(value.items()):
+            if position:
+                out.write(b",")
+            out.write(_dumps(key))
+            out.write(b":")
+            _write_json(item, out)
+        out.write(b"}")
+    elif type(value) is list:
+        out.write(b"[")
+        for position, item in enumerate(value):
+            if position:
+                out.write(b",")
+            _write_json(item, out)
+        out.write(b"]")
+    else:
+        out.write(_dumps(value))
+
+
+class StreamedMapping:
+    def __init__(self, body: BinaryIO, size: int, source_bytes: int) -> None:
+        self.body = body
+        self.size = size
+        self.source_bytes = source_bytes
+
+    def read(self) -> bytes:
+        self.body.seek(0)
+        return self.body.read()
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        self.body.seek(0)
+        while chunk := self.body.read(READ_CHUNK_BYTES):
+            yield chunk
+
+    def close(self) -> None:
+        self.body.close()
+
+
+def _item_mapper(rule: dict) -> Any:
+    item_rules = rule.get("item_rules", [])
+    if isinstance(item_rules, list):
+        return compile_mapping(item_rules).apply
+    return lambda item: _apply_rules(item, item_rules)
+
+
+class _Frame:
+    __slots__ = ("node", "container", "key", "index", "streams")
+
+    def __init__(self, node: _PathNode, container: Any, streams: list[tuple[Any, _SpooledArray]] | None = None):
+        self.node = node
+        self.container = container
+        self.key: str | None = None
+        self.index = 0
+        self.streams = streams
+
+
+class StreamingMapper:
+    """Map a JSON document fed in chunks without materializing it.
+
+    Only the source paths referenced by the compiled rules are kept (as a pruned copy of
+    the document). Arrays read by top-level ``map_array`` rules are mapped one item at a
+    time and the mapped items are spooled, so memory stays bounded by the largest single
+    item rather than by the payload size.
+    """
+
+    def __init__(self, compiled: CompiledMapping) -> None:
+        self._compiled = compiled
+        self._parser = JsonEventParser()
+        self._root_node = _build_path_tree(compiled)
+        self._item_mappers: dict[int, Any] = {}
+        self._streams: dict[int, _SpooledArray] = {}
+        self._frames: list[_Frame] = []
+        self._root: Any = None
+        self._skip_depth = 0
+        self._builder: list[list] | None = None
+        self._on_built: Any = None
+
+    def feed(self, data: bytes) -> None:
+        self._handle(self._parser.feed(data))
+
+    def finish(self) -> StreamedMapping:
+        self._handle(self._parser.close())
+
+        if self._streams:
+            values = []
+            for rule_index, step in enumerate(self._compiled._steps):
+                stream = self._streams.get(rule_index)
+                values.append(stream if stream is not None else step(self._root))
+            result = self._compiled.assemble(values)
+        else:
+            result = self._compiled.apply(self._root)
+
+        body = SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        _write_json(result, body)
+        size = body.tell()
+        body.seek(0)
+        return StreamedMapping(body, size, self._parser.bytes_read)
+
+    def _handle(self, events: list[tuple[str, Any]]) -> None:
+        for event, value in events:
+            if self._skip_depth:
+                if event == "start_map" or event == "start_array":
+                    self._skip_depth += 1
+                elif event == "end_map" or event == "end_array":
+                    self._skip_depth -= 1
+            elif self._builder is not None:
+                self._build(event, value)
+            elif event == "map_key":
+                self._frames[-1].key = value
+            elif event == "end_map" or event == "end_array":
+                self._frames.pop()
+            else:
+                self._start_value(event, value)
+
+    def _build(self, event: str, value: Any) -> None:
+        builder = self._builder
+        if event == "map_key":
+            builder[-1][1] = value
+            return
+        if event == "start_map":
+            builder.append([{}, None])
+            return
+        if event == "start_array":
+            builder.append([[], None])
+            return
+        if event == "end_map" or event == "end_array":
+            value = builder.pop()[0]
+
+        if builder:
+            container, key = builder[-1]
+            if key is None and type(container) is list:
+                container.append(value)
+            else:
+                container[key] = value
+            return
+
+        self._builder = None
+        self._on_built(value)
+
+    def _materialize(self, event: str, value: Any, on_built: Any) -> None:
+        if event == "value":
+            on_built(value)
+            return
+        self._builder = [[{} if event == "start_map" else [], None]]
+        self._on_built = on_built
+
+    def _start_value(self, event: str, value: Any) -> None:
+        if not self._frames:
+            node, place = self._root_node, self._set_root
+        else:
+            frame = self._frames[-1]
+            if frame.streams is not None:
+                self._materialize(event, value, partial(_append_item, frame.streams))
+                return
+            node, place = self._locate(frame)
+
+        if node is None:
+            if event != "value":
+                self._skip_depth = 1
+            return
+
+        if node.stream_rules:
+            # A repeated key replaces the earlier value, exactly like json.loads.
+            streams = [self._streams.pop(rule_index, None) for rule_index in node.stream_rules]
+            if event == "start_array":
+                targets = []
+                for rule_index, stream in zip(node.stream_rules, streams):
+                    if stream is None:
+                        stream = _SpooledArray()
+                    stream.reset()
+                    self._streams[rule_index] = stream
+                    if rule_index not in self._item_mappers:
+                        self._item_mappers[rule_index] = _item_mapper(self._compiled.rules[rule_index])
+                    targets.append((self._item_mappers[rule_index], stream))
+                self._frames.append(_Frame(node, None, targets))
+                return
+            # Not an array: keep the value so the rule's own default/empty handling applies.
+            self._materialize(event, value, place)
+            return
+
+        if node.capture or event == "value":
+            self._materialize(event, value, place)
+            return
+
+        container: Any = {} if event == "start_map" else []
+        place(container)
+        self._frames.append(_Frame(node, container))
+
+    def _locate(self, frame: _Frame) -> tuple[_PathNode | None, Any]:
+        container = frame.container
+        if type(container) is dict:
+            key = frame.key
+            return frame.node.keys.get(key), lambda value: container.__setitem__(key, value)
+
+        index = frame.index
+        frame.index += 1
+        if index <= frame.node.max_index:
+            container.append(None)
+        node = frame.node.indexes.get(index)
+        return node, lambda value: container.__setitem__(index, value)
+
+    def _set_root(self, value: Any) -> None:
+        self._root = value
+
+
+def _append_item(streams: list[tuple[Any, _SpooledArray]], item: Any) -> None:
+    for map_item, stream in streams:
+        stream.append(map_item(item))
+
+
+def map_json_stream(chunks: Iterable[bytes], compiled: CompiledMapping) -> StreamedMapping:
+    mapper = StreamingMapper(compiled)
+    for chunk in chunks:
+        mapper.feed(chunk)
+    return mapper.finish()
+
+
+async def amap_json_stream(chunks: AsyncIterable[bytes], compiled: CompiledMapping) -> StreamedMapping:
+    mapper = StreamingMapper(compiled)
+    async for chunk in chunks:
+        mapper.feed(chunk)
+    return mapper.finish()
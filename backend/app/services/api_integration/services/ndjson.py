@@ -0,0 +1,98 @@
+import json
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+from dataclasses import dataclass, field
+from tempfile import SpooledTemporaryFile
+
+from app.services.api_integration.services.mapping_stream import READ_CHUNK_BYTES, SPOOL_MEMORY_BYTES
+
+# Cap on the bytes inflated from a single gzip chunk, so a small compressed body cannot balloon in memory.
+_INFLATE_STEP = 1024 * 1024
+
+
+class NdjsonError(ValueError):
+    """The body as a whole is unreadable (bad gzip stream, oversized line); individual bad lines are not errors."""
+
+
+@dataclass
+class NdjsonLine:
+    number: int
+    payload: dict | None = field(default=None, repr=False)
+    error: str | None = None
+
+
+async def _inflate(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        async for chunk in chunks:
+            data = decompressor.decompress(chunk, _INFLATE_STEP)
+            while data:
+                yield data
+                data = decompressor.decompress(decompressor.unconsumed_tail, _INFLATE_STEP)
+        tail = decompressor.flush()
+    except zlib.error as exc:
+        raise NdjsonError(f"Invalid gzip body: {exc}") from exc
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise NdjsonError("Truncated gzip body")
+
+
+def _parse_line(number: int, raw: bytes) -> NdjsonLine:
+    try:
+        payload = json.loads(raw)
+    except ValueError as exc:
+        return NdjsonLine(number, error=f"Invalid JSON: {exc}")
+    if not isinstance(payload, dict):
+        return NdjsonLine(number, error="Line must be a JSON object")
+    return NdjsonLine(number, payload)
+
+
+async def aiter_ndjson(
+    chunks: AsyncIterable[bytes], gzip: bool = False, max_line_bytes: int = 1024 * 1024
+) -> AsyncIterator[NdjsonLine]:
+    """Yield one ``NdjsonLine`` per non-blank line, numbered from 1, without buffering more than one line."""
+    source = _inflate(chunks) if gzip else chunks
+    buffer = bytearray()
+    number = 0
+    async for chunk in source:
+        buffer.extend(chunk)
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            number += 1
+            raw = bytes(buffer[start:end]).strip()
+            start = end + 1
+            if raw:
+                yield _parse_line(number, raw)
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise NdjsonError(f"Line {number + 1} exceeds {max_line_bytes} bytes")
+
+    raw = bytes(buffer).strip()
+    if raw:
+        yield _parse_line(number + 1, raw)
+
+
+async def _replay(file) -> AsyncIterator[bytes]:
+    try:
+        while chunk := file.read(READ_CHUNK_BYTES):
+            yield chunk
+    finally:
+        file.close()
+
+
+async def spool_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Read the whole body into a spooled temp file first, then replay it.
+
+    Needed when results are streamed back: once a streaming response starts, the server stops
+    handing the request body to the application.
+    """
+    file = SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in chunks:
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return _replay(file)
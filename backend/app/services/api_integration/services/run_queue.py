@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger("synapseops.run_queue")
+
+
+class RunQueueFullError(Exception):
+    def __init__(self, retry_after_sec: float) -> None:
+        super().__init__("Run queue is full")
+        self.retry_after_sec = retry_after_sec
+
+
+class RunQueue:
+    """Bounded in-process queue of work items (run ids or ingest entries) drained by a pool of asyncio workers.
+
+    Workers start lazily on the first submit (or via ``start``) and are bound to the running
+    event loop; a queue created under another loop is discarded and rebuilt.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        maxsize: int,
+        workers: int,
+        retry_after_sec: float = 1.0,
+    ) -> None:
+        self._handler = handler
+        self.maxsize = max(1, maxsize)
+        self.workers = max(1, workers)
+        self.retry_after_sec = retry_after_sec
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [loop.create_task(self._worker(), name=f"run-queue-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self, drain_timeout_sec: float = 0.0) -> None:
+        if self._queue is not None and drain_timeout_sec > 0:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout_sec)
+            except asyncio.TimeoutError:
+                logger.warning("Run queue stopped with %s runs still queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def free_slots(self) -> int:
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return self.maxsize
+        return self.maxsize - self._queue.qsize()
+
+    def reserve(self, count: int = 1) -> None:
+        """Raise RunQueueFullError unless ``count`` runs can be submitted right now."""
+        if self.free_slots() < count:
+            self.rejected += count
+            raise RunQueueFullError(self.retry_after_sec)
+
+    def submit(self, item: Any) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise RunQueueFullError(self.retry_after_sec) from None
+
+    async def put(self, item: Any) -> None:
+        """Wait for room instead of rejecting; used for replaying work that was already accepted."""
+        self.start()
+        await self._queue.put(item)
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            try:
+                await self._handler(item)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Queued item %r failed", item)
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict:
+        running = self._queue is not None
+        return {
+            "running": running,
+            "workers": self.workers,
+            "size": self._queue.qsize() if running else 0,
+            "maxsize": self.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,147 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.services.api_integration.connectors.rest_client import RestCallResult
+
+# Keys under which a bulk endpoint may return its per-item results when it wraps them in an object.
+_RESULT_LIST_KEYS = ("results", "items", "data")
+
+
+class BatchItemError(Exception):
+    """The batch call succeeded but the target rejected this particular item."""
+
+
+@dataclass
+class _Batch:
+    flow: Any
+    request_id: str
+    payloads: list[dict] = field(default_factory=list)
+    futures: list[asyncio.Future] = field(default_factory=list)
+    size_bytes: int = 0
+    timer: asyncio.TimerHandle | None = None
+
+
+def _batch_key(flow: Any) -> tuple[str, str, str | None]:
+    credential = flow.credential
+    endpoint = flow.target_endpoint
+    return endpoint.id, endpoint.connector.base_url or "", credential.id if credential else None
+
+
+def _item_results(payload: Any, count: int) -> list[Any] | None:
+    if isinstance(payload, dict):
+        payload = next((payload[key] for key in _RESULT_LIST_KEYS if isinstance(payload.get(key), list)), None)
+    if isinstance(payload, list) and len(payload) == count:
+        return payload
+    return None
+
+
+class TargetBatcher:
+    """Coalesces mapped payloads bound for a flow's target into one array request per batch.
+
+    A batch is sent when it reaches the flow's ``batch_max_items`` or ``batch_max_bytes``, or
+    ``batch_linger_ms`` after its first item arrived. If the target answers with a list of the
+    same length (bare, or under ``results``/``items``/``data``), item ``i`` of it becomes the
+    response of payload ``i``; an item carrying an ``error`` fails only its own run. Any other
+    response body is shared by every item, and a failed call fails every item in the batch.
+
+    Batches are keyed on the target endpoint, its connector's base URL and the credential, so
+    flows that deliver to the same endpoint the same way share one call. The flow that opened a
+    batch supplies its retry and circuit-breaker settings for the call.
+    """
+
+    def __init__(self, send: Callable[[Any, str, list[dict]], Awaitable[RestCallResult]]) -> None:
+        self._send = send
+        self._batches: dict[tuple[str, str, str | None], _Batch] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.items_sent = 0
+
+    async def submit(self, flow: Any, payload: dict, request_id: str) -> RestCallResult:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Batches (and their futures) from another event loop can never complete here.
+            self._batches = {}
+            self._tasks = set()
+            self._loop = loop
+
+        size = len(json.dumps(payload, separators=(",", ":")).encode())
+        max_bytes = flow.batch_max_bytes or 0
+        key = _batch_key(flow)
+        batch = self._batches.get(key)
+        if batch is not None and max_bytes and batch.payloads and batch.size_bytes + size > max_bytes:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = self._batches[key] = _Batch(flow=flow, request_id=request_id)
+            batch.timer = self._start_linger(loop, flow)
+
+        future = loop.create_future()
+        batch.payloads.append(payload)
+        batch.futures.append(future)
+        batch.size_bytes += size
+        if len(batch.payloads) >= flow.batch_max_items or (max_bytes and batch.size_bytes >= max_bytes):
+            self._flush(key)
+        return await future
+
+    def _start_linger(self, loop: asyncio.AbstractEventLoop, flow: Any) -> asyncio.TimerHandle:
+        linger_sec = max(0, flow.batch_linger_ms or 0) / 1000
+        return loop.call_later(linger_sec, self._flush, _batch_key(flow))
+
+    def _flush(self, key: tuple[str, str, str | None]) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._send_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch: _Batch) -> None:
+        self.batches_sent += 1
+        self.items_sent += len(batch.payloads)
+        try:
+            result = await self._send(batch.flow, batch.request_id, batch.payloads)
+        except Exception as exc:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        items = _item_results(result.payload, len(batch.payloads))
+        for index, future in enumerate(batch.futures):
+            if future.done():
+                continue
+            item = result.payload if items is None else items[index]
+            if isinstance(item, dict) and item.get("error"):
+                future.set_exception(BatchItemError(str(item["error"])))
+            else:
+                future.set_result(
+                    RestCallResult(
+                        status_code=result.status_code,
+                        payload=item,
+                        attempt_count=result.attempt_count,
+                        hedge_won=result.hedge_won,
+                    )
+                )
+
+    async def flush_all(self) -> None:
+        """Send every open batch now and wait for the in-flight ones; used at shutdown."""
+        for key in list(self._batches):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "open_batches": len(self._batches),
+            "pending_items": sum(len(batch.payloads) for batch in self._batches.values()),
+            "in_flight_batches": len(self._tasks),
+            "batches_sent": self.batches_sent,
+            "items_sent": self.items_sent,
+            "avg_batch_size": round(self.items_sent / self.batches_sent, 2) if self.batches_sent else 0.0,
+        }
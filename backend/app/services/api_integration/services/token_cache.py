@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+TOKEN_CACHE_BACKENDS = ("", "file", "redis")
+
+
+class TokenCache(ABC):
+    """Encrypted store for OAuth2 tokens shared by every worker process and surviving restarts.
+
+    Entries are Fernet-encrypted JSON. Storage keys are an HMAC of the cache key, so neither file
+    names nor Redis keys reveal credential ids, and an entry written under a different secret is
+    treated as a miss. Values carry their own ``expires_at`` (epoch seconds); expired ones read as None.
+    """
+
+    name = "base"
+
+    def __init__(self, secret: str) -> None:
+        try:
+            from cryptography.fernet import Fernet, InvalidToken
+        except ImportError as exc:
+            raise RuntimeError("The OAuth2 token cache needs the cryptography package installed") from exc
+        self._secret = secret.encode()
+        self._fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(b"token-cache:" + self._secret).digest()))
+        self._invalid_token = InvalidToken
+
+    def storage_key(self, key: str) -> str:
+        return hmac.new(self._secret, key.encode(), hashlib.sha256).hexdigest()
+
+    def _seal(self, value: dict) -> bytes:
+        return self._fernet.encrypt(json.dumps(value, separators=(",", ":")).encode())
+
+    def _unseal(self, blob: bytes) -> dict | None:
+        try:
+            value = json.loads(self._fernet.decrypt(blob))
+        except (self._invalid_token, ValueError):
+            return None
+        if not isinstance(value, dict) or value.get("expires_at", 0) <= time.time():
+            return None
+        return value
+
+    @abstractmethod
+    def get(self, key: str) -> dict | None: ...
+
+    @abstractmethod
+    def put(self, key: str, value: dict) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+
+class FileTokenCache(TokenCache):
+    """One encrypted file per token in ``directory``, replaced atomically so readers never see half a write.
+
+    Files of credentials that were edited or deleted are never read again, so at most once per
+    ``sweep_interval_sec`` a ``put`` also removes every expired or unreadable token file.
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str, secret: str, sweep_interval_sec: float = 3600.0) -> None:
+        super().__init__(secret)
+        self.directory = directory
+        self.sweep_interval_sec = sweep_interval_sec
+        self._swept_at: float | None = None
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{self.storage_key(key)}.token")
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                blob = handle.read()
+        except FileNotFoundError:
+            return None
+        value = self._unseal(blob)
+        if value is None:
+            self._unlink(path)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(self._seal(value))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._unlink(tmp_path)
+            raise
+        now = time.monotonic()
+        if self._swept_at is None or now - self._swept_at >= self.sweep_interval_sec:
+            self._swept_at = now
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Delete every expired or unreadable ``.token`` file; returns how many were removed."""
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".token"):
+                continue
+            try:
+                with open(entry.path, "rb") as handle:
+                    blob = handle.read()
+            except FileNotFoundError:
+                continue
+            if self._unseal(blob) is None:
+                self._unlink(entry.path)
+                removed += 1
+        return removed
+
+    def delete(self, key: str) -> None:
+        self._unlink(self._path(key))
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class RedisTokenCache(TokenCache):
+    """Tokens in a Redis-compatible store (GET/SET/DELETE), expiring there together with the token."""
+
+    name = "redis"
+
+    def __init__(self, client: Any, secret: str, prefix: str = "synapseops:token:") -> None:
+        super().__init__(secret)
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, key: str) -> dict | None:
+        blob = self._client.get(self._prefix + self.storage_key(key))
+        return self._unseal(blob) if blob else None
+
+    def put(self, key: str, value: dict) -> None:
+        ttl_ms = int((value["expires_at"] - time.time()) * 1000)
+        if ttl_ms > 0:
+            self._client.set(self._prefix + self.storage_key(key), self._seal(value), px=ttl_ms)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + self.storage_key(key))
+
+
+def build_token_cache(kind: str, directory: str = "", secret: str = "", redis_url: str = "") -> TokenCache | None:
+    """Cache named by ``TOKEN_CACHE_BACKEND``; None (the default) keeps tokens in process memory only."""
+    if not kind:
+        return None
+    if not secret:
+        raise RuntimeError(f"TOKEN_CACHE_BACKEND={kind} needs TOKEN_CACHE_SECRET set explicitly")
+    if kind == "file":
+        return FileTokenCache(directory, secret)
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("TOKEN_CACHE_BACKEND=redis needs the redis package installed") from exc
+        return RedisTokenCache(redis.Redis.from_url(redis_url), secret)
+    raise ValueError(f"Unsupported token cache backend: {kind}")
@@ -0,0 +1,236 @@
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+TransformFunc = Callable[[Any], Any]
+
+LOOKUP_PREFIX = "lookup:"
+LOOKUP_ON_MISSING = ("error", "passthrough", "null")
+
+
+def _to_float(value: Any) -> Any:
+    return None if value is None else float(value)
+
+
+def _to_int(value: Any) -> Any:
+    return None if value is None else int(value)
+
+
+def _to_str(value: Any) -> Any:
+    return None if value is None else str(value)
+
+
+def _upper(value: Any) -> Any:
+    return None if value is None else str(value).upper()
+
+
+def _lower(value: Any) -> Any:
+    return None if value is None else str(value).lower()
+
+
+BUILTIN_TRANSFORMS: dict[str, TransformFunc] = {
+    "to_float": _to_float,
+    "float": _to_float,
+    "to_int": _to_int,
+    "int": _to_int,
+    "to_str": _to_str,
+    "upper": _upper,
+    "lower": _lower,
+}
+
+_MISS = object()
+
+
+class LookupTransform:
+    """Hash-table transform shared by every mapping that names ``lookup:<table>``.
+
+    Compiled mappings hold on to this object, so ``load`` swaps the entries in for all
+    of them at once without recompiling. JSON tables only have string keys, so non-string
+    values that miss are retried as ``str(value)``.
+    """
+
+    __slots__ = ("name", "version", "on_missing", "_entries")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.version = 0
+        self.on_missing = "error"
+        self._entries: dict | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._entries is not None
+
+    def __len__(self) -> int:
+        return len(self._entries or ())
+
+    def load(self, entries: Mapping[Any, Any], on_missing: str = "error") -> None:
+        if on_missing not in LOOKUP_ON_MISSING:
+            raise ValueError(f"Unsupported on_missing policy: {on_missing}")
+        self.on_missing = on_missing
+        self._entries = dict(entries)
+        self.version += 1
+        _bump_generation()
+
+    def unload(self) -> None:
+        self._entries = None
+        self.version += 1
+        _bump_generation()
+
+    def _missing(self, value: Any) -> Any:
+        if self.on_missing == "passthrough":
+            return value
+        if self.on_missing == "null":
+            return None
+        raise ValueError(f"No entry for {value!r} in lookup table '{self.name}'")
+
+    def _entries_or_raise(self) -> dict:
+        entries = self._entries
+        if entries is None:
+            raise ValueError(f"Lookup table '{self.name}' is not loaded")
+        return entries
+
+    def __call__(self, value: Any) -> Any:
+        if value is None:
+            return None
+        entries = self._entries_or_raise()
+        try:
+            result = entries.get(value, _MISS)
+        except TypeError:
+            result = _MISS
+        if result is _MISS and type(value) is not str:
+            result = entries.get(str(value), _MISS)
+        return self._missing(value) if result is _MISS else result
+
+    def column(self, values: Iterable[Any]) -> list:
+        entries = self._entries_or_raise()
+        get = entries.get
+        column = []
+        for value in values:
+            if value is None:
+                column.append(None)
+                continue
+            try:
+                result = get(value, _MISS)
+            except TypeError:
+                result = _MISS
+            if result is _MISS and type(value) is not str:
+                result = get(str(value), _MISS)
+            column.append(self._missing(value) if result is _MISS else result)
+        return column
+
+
+_lock = threading.Lock()
+_custom_transforms: dict[str, TransformFunc] = {}
+_lookup_tables: dict[str, LookupTransform] = {}
+_generation = 0
+
+
+def transforms_generation() -> int:
+    """Counter bumped whenever a registered transform or lookup table changes."""
+    return _generation
+
+
+def _bump_generation() -> None:
+    global _generation
+    _generation += 1
+
+
+def register_transform(name: str, func: TransformFunc, replace: bool = False) -> None:
+    if not name or name == "identity" or name.startswith(LOOKUP_PREFIX):
+        raise ValueError(f"Reserved transform name: {name!r}")
+    with _lock:
+        exists = name in _custom_transforms or name in BUILTIN_TRANSFORMS
+        if exists and not replace:
+            raise ValueError(f"Transform '{name}' is already registered")
+        _custom_transforms[name] = func
+    _bump_generation()
+
+    if exists:
+        # Compiled plans resolved the previous callable; make them pick up the new one.
+        from app.services.api_integration.services.mapping_engine import invalidate_compiled_mapping
+
+        invalidate_compiled_mapping()
+
+
+def unregister_transform(name: str) -> None:
+    with _lock:
+        removed = _custom_transforms.pop(name, None)
+    if removed is not None:
+        _bump_generation()
+        from app.services.api_integration.services.mapping_engine import invalidate_compiled_mapping
+
+        invalidate_compiled_mapping()
+
+
+def lookup_table(name: str) -> LookupTransform:
+    table = _lookup_tables.get(name)
+    if table is None:
+        with _lock:
+            table = _lookup_tables.setdefault(name, LookupTransform(name))
+    return table
+
+
+def load_lookup_table(name: str, entries: Mapping[Any, Any], on_missing: str = "error") -> LookupTransform:
+    table = lookup_table(name)
+    table.load(entries, on_missing)
+    return table
+
+
+def lookup_tables() -> list[LookupTransform]:
+    return [table for table in _lookup_tables.values() if table.loaded]
+
+
+def load_lookup_tables(records: Iterable[Any]) -> int:
+    """(Re)load every stored lookup table into this process; tables missing from ``records`` are unloaded.
+
+    ``records`` are the stored tables (anything with ``name``, ``entries`` and ``on_missing``, such as
+    ``LookupTable`` rows), so this module stays free of the ORM.
+    """
+    records = list(records)
+    for record in records:
+        load_lookup_table(record.name, record.entries, record.on_missing)
+    stored = {record.name for record in records}
+    for table in lookup_tables():
+        if table.name not in stored:
+            table.unload()
+    return len(records)
+
+
+def registry_snapshot() -> dict:
+    """Registered transforms and loaded lookup tables, for seeding another process's registry."""
+    with _lock:
+        return {
+            "transforms": dict(_custom_transforms),
+            "lookup_tables": [
+                (table.name, table._entries, table.on_missing)
+                for table in _lookup_tables.values()
+                if table.loaded
+            ],
+        }
+
+
+def install_registry(snapshot: dict) -> None:
+    """Register everything in a ``registry_snapshot``; the mapping process pool's initializer."""
+    for name, func in snapshot["transforms"].items():
+        register_transform(name, func, replace=True)
+    for name, entries, on_missing in snapshot["lookup_tables"]:
+        load_lookup_table(name, entries, on_missing)
+
+
+def get_transform(transform_name: Any) -> TransformFunc | None:
+    """Resolve a rule's transform name to a callable, or None when nothing is registered.
+
+    ``lookup:<table>`` names a table that must be loaded already, so a typo fails when the
+    mapping is compiled instead of sending every value to the rule's default.
+    """
+    if not isinstance(transform_name, str):
+        return None
+    transform = _custom_transforms.get(transform_name) or BUILTIN_TRANSFORMS.get(transform_name)
+    if transform is None and transform_name.startswith(LOOKUP_PREFIX):
+        table_name = transform_name[len(LOOKUP_PREFIX):]
+        if table_name:
+            transform = _lookup_tables.get(table_name)
+            if transform is None or not transform.loaded:
+                raise ValueError(f"Unknown lookup table '{table_name}'")
+    return transform
@@ -1,6 +1,23 @@
 import pytest
 import httpx
 from app.main import app
+from app.database import SessionLocal
+from app.services.api_integration.seed import seed_local_demo_flow
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def seeded_db():
+    # ASGITransport does not run the startup hook that seeds the demo flow.
+    db = SessionLocal()
+    try:
+        seed_local_demo_flow(db)
+    finally:
+        db.close()
 
 
 @pytest.fixture
@@ -9,6 +26,6 @@ def asgi_transport():
 
 
 @pytest.fixture
-async def async_client(asgi_transport):
+async def async_client(asgi_transport, seeded_db):
     async with httpx.AsyncClient(transport=asgi_transport, base_url="http://testserver") as client:
         yield client
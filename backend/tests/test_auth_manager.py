@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.policy import RetryPolicy
+from app.services.api_integration.services.auth_manager import AuthManager
+from app.services.api_integration.services.event_router import ConnectorRoute, CredentialRoute, EndpointRoute
+from app.services.api_integration.services.request_signing import HmacSigner
+from app.services.api_integration.services.token_cache import (
+    FileTokenCache,
+    RedisTokenCache,
+    TokenCache,
+    build_token_cache,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _credential(**overrides) -> CredentialRoute:
+    return CredentialRoute(
+        id="erp-oauth",
+        connector_id="erp",
+        name="ERP OAuth",
+        auth_type="oauth2_client_credentials",
+        auth_config={"token_url": "http://idp.test/token", "client_id": "synapse", "client_secret": "s3cret", **overrides},
+        is_active=True,
+    )
+
+
+def _token_endpoint(monkeypatch, delay: float = 0.02, status_code: int = 200) -> list[str]:
+    issued: list[str] = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        issued.append(f"token-{len(issued) + 1}")
+        token = issued[-1]
+        await asyncio.sleep(delay)
+        return httpx.Response(
+            status_code=status_code,
+            json={"access_token": token, "expires_in": 130},
+            request=httpx.Request(method, str(url)),
+        )
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    return issued
+
+
+@pytest.mark.anyio
+async def test_concurrent_runs_share_one_token_request(monkeypatch):
+    issued = _token_endpoint(monkeypatch)
+    pool = HttpClientPool()
+    auth = AuthManager(http_pool=pool)
+
+    headers = await asyncio.gather(*(auth.build_headers(_credential()) for _ in range(25)))
+
+    assert issued == ["token-1"]
+    assert {h["Authorization"] for h in headers} == {"Bearer token-1"}
+    assert auth.stats()["coalesced"] == 24
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_token_is_refreshed_in_the_background_before_it_expires(monkeypatch):
+    issued = _token_endpoint(monkeypatch)
+    clock = FakeClock()
+    pool = HttpClientPool()
+    auth = AuthManager(http_pool=pool, refresh_ahead_ratio=0.8, clock=clock)
+
+    assert await auth.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+
+    # 100s lifetime after the safety margin; at 85s the old token is still handed out without waiting.
+    clock.now += timedelta(seconds=85)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await auth.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+    assert loop.time() - started < 0.01
+    await asyncio.sleep(0)
+    assert len(issued) == 2
+
+    await asyncio.sleep(0.05)
+    assert await auth.build_headers(_credential()) == {"Authorization": "Bearer token-2"}
+    assert auth.stats()["background_refreshes"] == 1
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_failed_fetch_reaches_every_waiter_and_is_retried(monkeypatch):
+    issued = _token_endpoint(monkeypatch, status_code=503)
+    pool = HttpClientPool()
+    auth = AuthManager(http_pool=pool)
+
+    results = await asyncio.gather(*(auth.build_headers(_credential()) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(issued) == 1
+
+    _token_endpoint(monkeypatch)
+    assert await auth.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_the_shared_fetch(monkeypatch):
+    issued = _token_endpoint(monkeypatch, delay=0.05)
+    pool = HttpClientPool()
+    auth = AuthManager(http_pool=pool)
+
+    first = asyncio.ensure_future(auth.build_headers(_credential()))
+    second = asyncio.ensure_future(auth.build_headers(_credential()))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == {"Authorization": "Bearer token-1"}
+    assert issued == ["token-1"]
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_token_cache_is_shared_across_workers_and_encrypted(monkeypatch, tmp_path):
+    issued = _token_endpoint(monkeypatch)
+    pool = HttpClientPool()
+    worker_a = AuthManager(http_pool=pool, shared_cache=FileTokenCache(str(tmp_path), "secret"))
+    worker_b = AuthManager(http_pool=pool, shared_cache=FileTokenCache(str(tmp_path), "secret"))
+
+    assert await worker_a.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+    assert await worker_b.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+
+    assert issued == ["token-1"]
+    assert worker_b.stats()["shared_hits"] == 1
+    [stored] = list(tmp_path.iterdir())
+    assert b"token-1" not in stored.read_bytes()
+    assert "erp-oauth" not in stored.name
+
+    restarted_with_new_secret = AuthManager(http_pool=pool, shared_cache=FileTokenCache(str(tmp_path), "rotated"))
+    assert await restarted_with_new_secret.build_headers(_credential()) == {"Authorization": "Bearer token-2"}
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_changed_auth_config_invalidates_the_cached_token(monkeypatch, tmp_path):
+    issued = _token_endpoint(monkeypatch)
+    pool = HttpClientPool()
+    cache = FileTokenCache(str(tmp_path), "secret")
+    auth = AuthManager(http_pool=pool, shared_cache=cache)
+
+    assert await auth.build_headers(_credential()) == {"Authorization": "Bearer token-1"}
+    assert await auth.build_headers(_credential(scope="orders:write")) == {"Authorization": "Bearer token-2"}
+
+    assert len(issued) == 2
+    assert len(list(tmp_path.iterdir())) == 1
+    assert list(auth.stats()["tokens"]) == ["erp-oauth"]
+    await pool.aclose()
+
+
+def test_file_token_cache_sweeps_expired_tokens(tmp_path):
+    cache = FileTokenCache(str(tmp_path), "secret", sweep_interval_sec=3600)
+    cache.put("old-credential:fingerprint", {"access_token": "a", "expires_at": time.time() + 60})
+    (tmp_path / "unrelated.txt").write_text("kept")
+    [stored] = list(tmp_path.glob("*.token"))
+    stored.write_bytes(cache._seal({"access_token": "a", "expires_at": time.time() - 1}))
+
+    cache.put("erp-oauth:fingerprint", {"access_token": "b", "expires_at": time.time() + 60})
+    assert len(list(tmp_path.glob("*.token"))) == 2  # the next sweep is an hour away
+
+    assert cache.sweep() == 1
+    assert cache.get("erp-oauth:fingerprint")["access_token"] == "b"
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".token", ".txt"]
+
+
+def test_token_cache_needs_an_explicit_secret(tmp_path):
+    with pytest.raises(RuntimeError, match="TOKEN_CACHE_SECRET"):
+        build_token_cache("file", directory=str(tmp_path), secret="")
+    assert build_token_cache("", secret="") is None
+    with pytest.raises(TypeError):
+        TokenCache("secret")
+
+
+@pytest.mark.anyio
+async def test_redis_token_cache_expires_with_the_token(monkeypatch):
+    class FakeRedis:
+        def __init__(self) -> None:
+            self.data: dict[str, tuple[bytes, int | None]] = {}
+
+        def get(self, name):
+            return self.data.get(name, (None, None))[0]
+
+        def set(self, name, value, px=None):
+            self.data[name] = (value, px)
+
+        def delete(self, name):
+            self.data.pop(name, None)
+
+    _token_endpoint(monkeypatch)
+    redis = FakeRedis()
+    pool = HttpClientPool()
+    auth = AuthManager(http_pool=pool, shared_cache=RedisTokenCache(redis, "secret"))
+
+    await auth.build_headers(_credential())
+
+    [(blob, px)] = redis.data.values()
+    assert b"token-1" not in blob
+    assert 95_000 < px <= 100_000
+    [key] = auth._token_cache
+    assert RedisTokenCache(redis, "secret").get(key)["access_token"] == "token-1"
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_static_headers_are_built_once_per_credential_version():
+    auth = AuthManager()
+    version = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def api_key(key: str, updated_at: datetime) -> CredentialRoute:
+        return CredentialRoute(
+            id="crm-key",
+            connector_id="crm",
+            name="CRM key",
+            auth_type="api_key",
+            auth_config={"api_key": key},
+            is_active=True,
+            updated_at=updated_at,
+        )
+
+    first = await auth.header_items(api_key("k1", version))
+    assert first == (("X-API-Key", "k1"),)
+    assert await auth.header_items(api_key("k1", version)) is first
+
+    # Same version, so the stored plan is trusted without re-reading auth_config.
+    assert await auth.header_items(api_key("k2", version)) is first
+    assert await auth.header_items(api_key("k2", version + timedelta(seconds=1))) == (("X-API-Key", "k2"),)
+    assert await auth.build_headers(api_key("k2", version + timedelta(seconds=1))) == {"X-API-Key": "k2"}
+    assert auth.stats()["credential_plans"] == 1
+
+
+@pytest.mark.anyio
+async def test_rest_client_sends_a_verifiable_hmac_signature(monkeypatch):
+    auth = AuthManager()
+    credential = CredentialRoute(
+        id="erp-hmac",
+        connector_id="erp",
+        name="ERP webhook",
+        auth_type="hmac_signature",
+        auth_config={"secret": "c2VjcmV0", "secret_encoding": "base64", "signature_prefix": "sha256=", "key_id": "k1"},
+        is_active=True,
+    )
+    signer = auth.request_signer(credential)
+    assert isinstance(signer, HmacSigner)
+    assert auth.request_signer(credential) is signer
+    assert await auth.header_items(credential) == ()
+
+    received: list[tuple[dict, bytes]] = []
+
+    async def patched_request(self, method, url, *args, headers=None, content=None, **kwargs):
+        received.append((dict(headers), content))
+        return httpx.Response(status_code=503 if len(received) == 1 else 200, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    pool = HttpClientPool()
+    client = RestClient(CircuitBreaker(), http_pool=pool)
+    endpoint = EndpointRoute(
+        id="erp-orders",
+        name="Create order",
+        method="post",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test/api"),
+    )
+
+    result = await client.request(
+        endpoint=endpoint,
+        base_url="http://erp.test/api",
+        payload={"id": 1, "name": "Zoë"},
+        headers=await auth.header_items(credential),
+        retry_policy=RetryPolicy(max_attempts=2, base_delay_sec=0.01, max_delay_sec=0.01),
+        request_id="req-signed",
+        signer=signer,
+    )
+
+    assert result.status_code == 200
+    assert len(received) == 2
+    for headers, body in received:
+        assert body == '{"id":1,"name":"Zoë"}'.encode()
+        signed = f"{headers['X-Signature-Timestamp']}\nPOST\n/api/orders\n".encode() + body
+        expected = "sha256=" + hmac.new(b"secret", signed, hashlib.sha256).hexdigest()
+        assert headers["X-Signature"] == expected
+        assert headers["X-Signature-Key-Id"] == "k1"
+        assert headers["Content-Type"] == "application/json"
+    await pool.aclose()
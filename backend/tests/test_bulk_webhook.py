@@ -0,0 +1,195 @@
+import asyncio
+import gzip
+import json
+import uuid
+
+import httpx
+import pytest
+
+from app.database import SessionLocal
+from app.services.api_integration.models import DeadLetter, Flow, Run
+from app.services.api_integration.services.event_router import flow_route
+from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.ndjson import NdjsonError, aiter_ndjson
+
+
+async def _demo_flow_id(async_client) -> str:
+    flows = (await async_client.get("/api/v1/api-integration/flows")).json()
+    return next(flow["id"] for flow in flows if flow["name"] == "Shopify -> ERP Order Sync")
+
+
+def _patch_target(monkeypatch, delay: float = 0.0) -> dict:
+    original_request = httpx.AsyncClient.request
+    state = {"calls": [], "in_flight": 0, "max_in_flight": 0}
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        if not str(url).startswith("http://127.0.0.1:8000"):
+            return await original_request(self, method, url, *args, **kwargs)
+        state["calls"].append(kwargs.get("json"))
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["in_flight"] -= 1
+        return httpx.Response(status_code=200, json={"result": "ok"}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    return state
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(chunks, **kwargs) -> list:
+    return [line async for line in aiter_ndjson(chunks, **kwargs)]
+
+
+@pytest.mark.anyio
+async def test_ndjson_lines_split_across_chunks():
+    lines = await _collect(_chunks(b'{"id": 1}\n\n{"id"', b': 2}\n[1]\nnot json\n{"id": 3}'))
+
+    assert [(line.number, line.payload) for line in lines if line.error is None] == [
+        (1, {"id": 1}),
+        (3, {"id": 2}),
+        (6, {"id": 3}),
+    ]
+    assert [(line.number, line.error) for line in lines if line.error is not None][0] == (
+        4,
+        "Line must be a JSON object",
+    )
+    assert lines[3].error.startswith("Invalid JSON")
+
+
+@pytest.mark.anyio
+async def test_ndjson_rejects_oversized_lines_and_truncated_gzip():
+    with pytest.raises(NdjsonError, match="exceeds"):
+        await _collect(_chunks(b'{"id": "' + b"x" * 100), max_line_bytes=64)
+
+    body = gzip.compress(b'{"id": 1}\n')
+    with pytest.raises(NdjsonError, match="Truncated"):
+        await _collect(_chunks(body[:-6]), gzip=True)
+    lines = await _collect(_chunks(body[:5], body[5:]), gzip=True)
+    assert [line.payload for line in lines] == [{"id": 1}]
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_returns_results_in_line_order(async_client, monkeypatch):
+    state = _patch_target(monkeypatch, delay=0.02)
+    flow_id = await _demo_flow_id(async_client)
+    body = "\n".join([*(json.dumps({"id": f"BULK-{n}"}) for n in range(12)), "{oops"]).encode()
+
+    response = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{flow_id}/bulk?concurrency=3",
+        content=gzip.compress(body),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["total"], summary["succeeded"], summary["invalid"]) == (13, 12, 1)
+    assert [result["line"] for result in summary["results"]] == list(range(1, 14))
+    assert summary["results"][-1]["status"] == "INVALID"
+    assert sorted(call["order_number"] for call in state["calls"]) == sorted(f"BULK-{n}" for n in range(12))
+    assert state["max_in_flight"] == 3
+
+    run = (await async_client.get(f"/api/v1/api-integration/ops/runs/{summary['results'][0]['run_id']}")).json()
+    assert run["status"] == "SUCCEEDED"
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_streams_ndjson_results(async_client, monkeypatch):
+    _patch_target(monkeypatch)
+    flow_id = await _demo_flow_id(async_client)
+    body = b'{"id": "S-1"}\n{"id": "S-2"}\n'
+
+    response = await async_client.post(f"/api/v1/api-integration/webhooks/{flow_id}/bulk?stream=true", content=body)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["line"] for line in lines[:-1]) == [1, 2]
+    assert lines[-1]["summary"]["succeeded"] == 2
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_unknown_flow_is_404(async_client):
+    response = await async_client.post("/api/v1/api-integration/webhooks/missing/bulk", content=b'{"id": 1}\n')
+
+    assert response.status_code == 404
+    assert response.json()["error"]["code"] == "flow_not_found"
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_reports_lines_that_ran_before_the_body_broke(async_client, monkeypatch):
+    state = _patch_target(monkeypatch)
+    flow_id = await _demo_flow_id(async_client)
+    truncated = gzip.compress(b'{"id": "B-1"}\n{"id": "B-2"}\n')[:-6]
+
+    response = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{flow_id}/bulk", content=truncated, headers={"Content-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["succeeded"] == 2
+    assert [result["line"] for result in summary["results"]] == [1, 2]
+    assert summary["error"]["code"] == "invalid_ndjson"
+    assert len(state["calls"]) == 2
+
+    broken = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{flow_id}/bulk", content=b"not gzip", headers={"Content-Encoding": "gzip"}
+    )
+    assert broken.status_code == 400
+
+
+def _demo_route():
+    db = SessionLocal()
+    try:
+        return flow_route(db.query(Flow).filter(Flow.name == "Shopify -> ERP Order Sync").first())
+    finally:
+        db.close()
+
+
+def _runs(request_id_prefix: str) -> list[Run]:
+    db = SessionLocal()
+    try:
+        return db.query(Run).filter(Run.request_id.startswith(request_id_prefix)).all()
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_runs_in_flight_finish_after_the_client_goes_away(seeded_db, monkeypatch):
+    _patch_target(monkeypatch, delay=0.05)
+    lines = aiter_ndjson(_chunks(b'{"id": "G-1"}\n{"id": "G-2"}\n{"id": "G-3"}\n'))
+    request_id = f"req-gone-{uuid.uuid4().hex}"
+    outcomes = flow_runner.run_bulk(_demo_route(), lines, request_id, concurrency=3)
+
+    await outcomes.__anext__()
+    await outcomes.aclose()
+    await asyncio.gather(*flow_runner._detached_runs)
+
+    assert sorted(run.status for run in _runs(f"{request_id}:")) == ["SUCCEEDED"] * 3
+
+
+@pytest.mark.anyio
+async def test_cancelled_run_is_failed_and_dead_lettered(seeded_db, monkeypatch):
+    _patch_target(monkeypatch, delay=5)
+    db = SessionLocal()
+    try:
+        request_id = f"req-cancelled-{uuid.uuid4().hex}"
+        task = asyncio.create_task(flow_runner.run_flow(db, _demo_route(), {"id": "C-1"}, request_id))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        [run] = _runs(request_id)
+        assert run.status == "FAILED"
+        assert "cancelled" in run.error_message
+        assert db.query(DeadLetter).filter(DeadLetter.run_id == run.id).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,176 @@
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.circuit import CircuitBreaker, CircuitOpenError, CircuitPolicy
+from app.services.api_integration.recovery.policy import RetryPolicy
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _state(breaker: CircuitBreaker, key: str = "erp") -> str:
+    return breaker.stats()["targets"][key]["state"]
+
+
+def test_failure_rate_opens_only_after_min_calls():
+    breaker = CircuitBreaker(clock=FakeClock())
+    policy = CircuitPolicy(mode="rate", window_size=10, min_calls=6, failure_rate_threshold=0.5)
+
+    for _ in range(4):
+        breaker.record_failure("erp", policy)
+    assert _state(breaker) == "CLOSED"
+
+    breaker.record_success("erp", policy)
+    breaker.record_failure("erp", policy)
+    assert _state(breaker) == "OPEN"
+    assert not breaker.allow_request("erp", policy)
+
+
+def test_count_window_forgets_the_oldest_calls():
+    breaker = CircuitBreaker(clock=FakeClock())
+    policy = CircuitPolicy(mode="rate", window_size=4, min_calls=4, failure_rate_threshold=0.75)
+
+    for _ in range(2):
+        breaker.record_failure("erp", policy)
+    for _ in range(6):
+        breaker.record_success("erp", policy)
+    breaker.record_failure("erp", policy)
+    breaker.record_failure("erp", policy)
+
+    stats = breaker.stats()["targets"]["erp"]
+    assert stats["state"] == "CLOSED"
+    assert stats["window_calls"] == 4
+    assert stats["failure_rate"] == 0.5
+
+
+def test_flows_with_different_windows_share_one_target_breaker():
+    breaker = CircuitBreaker(clock=FakeClock())
+    small = CircuitPolicy(mode="rate", window_size=10, min_calls=6, failure_rate_threshold=0.5)
+    large = CircuitPolicy(mode="rate", window_type="time", window_size=60, min_calls=6, failure_rate_threshold=0.5)
+
+    for _ in range(4):
+        breaker.record_failure("erp", small)
+        breaker.record_failure("erp", large)
+
+    # Alternating policies no longer rebuild the window, so failures from both flows add up.
+    assert _state(breaker) == "OPEN"
+    assert breaker.stats()["targets"]["erp"]["window_calls"] == 7
+
+
+def test_time_window_drops_failures_older_than_the_window():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock=clock)
+    policy = CircuitPolicy(mode="rate", window_type="time", window_size=10, min_calls=4, failure_rate_threshold=0.5)
+
+    for _ in range(3):
+        breaker.record_failure("erp", policy)
+    clock.now += 11
+    for _ in range(3):
+        breaker.record_success("erp", policy)
+    breaker.record_failure("erp", policy)
+
+    assert _state(breaker) == "CLOSED"
+    assert breaker.stats()["targets"]["erp"]["window_calls"] == 4
+
+
+def test_slow_call_rate_opens_the_circuit():
+    breaker = CircuitBreaker(clock=FakeClock())
+    policy = CircuitPolicy(
+        mode="rate", window_size=10, min_calls=4, slow_call_sec=0.5, slow_call_rate_threshold=0.75
+    )
+
+    breaker.record_success("erp", policy, duration_sec=0.1)
+    for _ in range(3):
+        breaker.record_success("erp", policy, duration_sec=0.9)
+
+    assert _state(breaker) == "OPEN"
+
+
+def test_half_open_admits_a_bounded_number_of_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock=clock)
+    policy = CircuitPolicy(failure_threshold=1, recovery_timeout_sec=5, half_open_probes=2)
+
+    breaker.record_failure("erp", policy)
+    assert breaker.is_open("erp", policy)
+    clock.now += 5
+
+    admitted = [breaker.allow_request("erp", policy) for _ in range(10)]
+    assert admitted.count(True) == 2
+    assert breaker.is_open("erp", policy)
+
+    breaker.record_success("erp", policy)
+    assert _state(breaker) == "HALF_OPEN"
+    breaker.record_success("erp", policy)
+    assert _state(breaker) == "CLOSED"
+    assert all(breaker.allow_request("erp", policy) for _ in range(10))
+
+
+def test_failed_probe_reopens_and_lost_probes_expire():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock=clock)
+    policy = CircuitPolicy(failure_threshold=1, recovery_timeout_sec=5, half_open_probes=1)
+
+    breaker.record_failure("erp", policy)
+    clock.now += 5
+    assert breaker.allow_request("erp", policy)
+    breaker.record_failure("erp", policy)
+    assert _state(breaker) == "OPEN"
+
+    clock.now += 5
+    assert breaker.allow_request("erp", policy)
+    # The probe never reports back (its run was cancelled); a new one is admitted after another timeout.
+    assert not breaker.allow_request("erp", policy)
+    clock.now += 5
+    assert breaker.allow_request("erp", policy)
+
+
+@pytest.mark.anyio
+async def test_open_circuit_fails_before_building_the_request(monkeypatch):
+    calls = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        calls.append(url)
+        return httpx.Response(status_code=500, request=httpx.Request(method, str(url)))
+
+    def content():
+        raise AssertionError("body must not be serialized while the circuit is open")
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    policy = CircuitPolicy(failure_threshold=1, recovery_timeout_sec=60)
+    breaker = CircuitBreaker()
+    breaker.record_failure("erp-orders", policy)
+    pool = HttpClientPool()
+    endpoint = EndpointRoute(
+        id="erp-orders",
+        name="Create order",
+        method="POST",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test"),
+    )
+
+    with pytest.raises(CircuitOpenError):
+        await RestClient(breaker, http_pool=pool).request(
+            endpoint=endpoint,
+            base_url="http://erp.test",
+            payload=None,
+            headers={},
+            retry_policy=RetryPolicy(max_attempts=3),
+            request_id="req-open",
+            content=content,
+            circuit_policy=policy,
+        )
+
+    assert calls == []
+    assert pool.stats()["clients_created"] == 0
+    await pool.aclose()
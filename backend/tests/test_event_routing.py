@@ -0,0 +1,176 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+
+from app.database import SessionLocal
+from app.services.api_integration.models import Connector, Endpoint, Flow, Mapping
+from app.services.api_integration.services.event_router import FlowRoute, event_routing_index
+
+
+def _demo_flow(db) -> Flow:
+    return (
+        db.query(Flow)
+        .join(Endpoint, Flow.source_endpoint_id == Endpoint.id)
+        .filter(Endpoint.event_name == "orders/create")
+        .order_by(Flow.created_at.asc())
+        .first()
+    )
+
+
+def test_routing_index_resolves_flows_without_queries(seeded_db, monkeypatch):
+    event_routing_index.rebuild()
+    builds = event_routing_index.builds
+
+    def no_db():
+        raise AssertionError("routing should not touch the database")
+
+    monkeypatch.setattr("app.services.api_integration.services.event_router.SessionLocal", no_db)
+    routes = event_routing_index.routes("orders/create")
+
+    assert routes and isinstance(routes[0], FlowRoute)
+    route = routes[0]
+    assert route.source_endpoint.event_name == "orders/create"
+    assert route.target_endpoint.connector.base_url
+    assert route.mapping.rules
+    assert event_routing_index.routes("orders/unknown") == ()
+    assert event_routing_index.builds == builds
+
+
+def test_routing_index_is_invalidated_when_a_flow_changes(seeded_db):
+    event_routing_index.rebuild()
+    db = SessionLocal()
+    try:
+        flow = _demo_flow(db)
+        flow.is_enabled = False
+        db.commit()
+        assert all(route.id != flow.id for route in event_routing_index.routes("orders/create"))
+
+        flow.is_enabled = True
+        db.commit()
+        assert any(route.id == flow.id for route in event_routing_index.routes("orders/create"))
+    finally:
+        db.close()
+
+
+def test_routing_index_ignores_rolled_back_changes(seeded_db):
+    event_routing_index.rebuild()
+    db = SessionLocal()
+    try:
+        flow = _demo_flow(db)
+        flow.name = "renamed"
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+
+    assert event_routing_index.stats()["built"]
+
+
+@pytest.mark.anyio
+async def test_routing_stats_are_exposed_in_ops(async_client):
+    response = await async_client.get("/api/v1/api-integration/ops/routing")
+    assert response.status_code == 200
+    assert {"built", "builds", "events", "flows"} <= set(response.json())
+
+
+def _fanout_flows(db, event_name: str, targets: list[str]) -> list[str]:
+    connector = db.query(Connector).filter(Connector.name == "ERP").first()
+    source = Endpoint(
+        connector_id=connector.id, name=event_name, direction="inbound", method="POST", path="/in", event_name=event_name
+    )
+    mapping = Mapping(name=f"{event_name} mapping", rules=[{"source": "id", "target": "order_number"}])
+    db.add_all([source, mapping])
+    db.flush()
+
+    flow_ids = []
+    for target_path in targets:
+        target = Endpoint(connector_id=connector.id, name=target_path, direction="outbound", method="POST", path=target_path)
+        db.add(target)
+        db.flush()
+        flow = Flow(
+            name=f"{event_name} -> {target_path}",
+            source_endpoint_id=source.id,
+            target_endpoint_id=target.id,
+            mapping_id=mapping.id,
+            retry_max_attempts=1,
+        )
+        db.add(flow)
+        db.flush()
+        flow_ids.append(flow.id)
+    db.commit()
+    return flow_ids
+
+
+def _delete_fanout_flows(db, event_name: str) -> None:
+    source = db.query(Endpoint).filter(Endpoint.event_name == event_name).first()
+    flows = db.query(Flow).filter(Flow.source_endpoint_id == source.id).all()
+    targets = [flow.target_endpoint for flow in flows]
+    mapping = flows[0].mapping
+    for row in [*flows, *targets, source, mapping]:
+        db.delete(row)
+        db.flush()
+    db.commit()
+
+
+@pytest.fixture
+def fanout_event(seeded_db):
+    event_name = f"orders/fanout-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        yield event_name, _fanout_flows(db, event_name, ["/erp", "/wms", "/crm"])
+        _delete_fanout_flows(db, event_name)
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_event_fans_out_to_every_flow_concurrently(async_client, fanout_event, monkeypatch):
+    event_name, flow_ids = fanout_event
+
+    original_request = httpx.AsyncClient.request
+    in_flight = 0
+    max_in_flight = 0
+    all_in_flight = asyncio.Event()
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        if not str(url).startswith("http://127.0.0.1:8000"):
+            return await original_request(self, method, url, *args, **kwargs)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        if in_flight == len(flow_ids):
+            all_in_flight.set()
+        try:
+            # Each delivery holds until all three overlap; sequential delivery would time out here.
+            await asyncio.wait_for(all_in_flight.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            in_flight -= 1
+        request = httpx.Request(method, str(url))
+        status_code = 400 if str(url).endswith("/crm") else 200
+        return httpx.Response(status_code=status_code, json={"target": str(url)}, request=request)
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+
+    started = time.perf_counter()
+    response = await async_client.post(
+        "/api/v1/api-integration/webhooks/shopify/orders-create",
+        json={"id": "SO-7"},
+        headers={"X-Shopify-Topic": event_name},
+    )
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "PARTIAL"
+    assert (body["total"], body["succeeded"], body["failed"]) == (3, 2, 1)
+    assert [run["flow_id"] for run in body["runs"]] == flow_ids
+    assert all(run["run_id"] for run in body["runs"])
+    assert body["runs"][2]["status"] == "FAILED"
+    assert max_in_flight == 3
+    # Sequential deliveries would each wait out the 0.5s timeout above.
+    assert elapsed < 1.0
@@ -0,0 +1,146 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.budget import RetryBudget
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.hedging import LatencyTracker, RequestHedger
+from app.services.api_integration.recovery.policy import RetryPolicy
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+def _endpoint(method: str = "GET", hedge_enabled: bool = True) -> EndpointRoute:
+    return EndpointRoute(
+        id="erp-orders",
+        name="Fetch order",
+        method=method,
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test"),
+        hedge_enabled=hedge_enabled,
+    )
+
+
+def _warm(hedger: RequestHedger, key: str = "erp-orders", seconds: float = 0.01, samples: int = 20) -> None:
+    for _ in range(samples):
+        hedger._tracker(key).record(seconds)
+
+
+def test_latency_tracker_percentile_uses_the_recent_window():
+    tracker = LatencyTracker(size=100)
+    assert tracker.percentile(0.95) is None
+    for ms in range(1, 201):
+        tracker.record(ms / 1000)
+    assert len(tracker) == 100
+    assert tracker.percentile(0.95) == 0.195
+
+
+@pytest.mark.anyio
+async def test_hedge_fires_at_p95_and_wins_against_a_slow_primary():
+    hedger = RequestHedger(RetryBudget(ratio=0.1, min_retries=5), min_samples=20)
+    _warm(hedger)
+    calls: list[int] = []
+
+    async def send():
+        calls.append(len(calls))
+        # The primary stalls; the hedge answers like a normal call.
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.005)
+        return f"response-{len(calls)}"
+
+    result, hedge_won = await asyncio.wait_for(hedger.call(_endpoint(), send), timeout=0.5)
+
+    assert hedge_won is True
+    assert result == "response-2"
+    assert hedger.stats()["targets"]["erp-orders"]["hedges_won"] == 1
+
+
+@pytest.mark.anyio
+async def test_fast_primary_sends_no_hedge():
+    hedger = RequestHedger(RetryBudget(ratio=0.1, min_retries=5), min_samples=20)
+    _warm(hedger, seconds=0.1)
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        return "ok"
+
+    assert await hedger.call(_endpoint(), send) == ("ok", None)
+    assert calls == 1
+
+
+@pytest.mark.anyio
+async def test_non_idempotent_or_cold_endpoints_are_not_hedged():
+    hedger = RequestHedger(RetryBudget(ratio=1.0, min_retries=5), min_samples=20)
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    _warm(hedger, samples=19)
+    assert await hedger.call(_endpoint(), send) == ("ok", None)
+
+    _warm(hedger)
+    assert await hedger.call(_endpoint(method="POST"), send) == ("ok", None)
+    assert await hedger.call(_endpoint(hedge_enabled=False), send) == ("ok", None)
+    assert calls == 3
+
+
+@pytest.mark.anyio
+async def test_hedge_budget_caps_extra_requests():
+    hedger = RequestHedger(RetryBudget(ratio=0.0, min_retries=2), min_samples=20)
+    _warm(hedger, seconds=0.001, samples=200)
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    for _ in range(5):
+        await hedger.call(_endpoint(), send)
+
+    stats = hedger.stats()["targets"]["erp-orders"]
+    assert stats["hedges"] == 2
+    assert stats["denied"] == 3
+    assert calls == 7
+
+
+@pytest.mark.anyio
+async def test_rest_client_reports_which_copy_won(monkeypatch):
+    hedger = RequestHedger(RetryBudget(ratio=0.1, min_retries=5), min_samples=20)
+    _warm(hedger)
+    calls: list[str] = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        calls.append(method)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.005)
+        return httpx.Response(status_code=200, json={"copy": len(calls)}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    pool = HttpClientPool()
+    client = RestClient(CircuitBreaker(), http_pool=pool, hedger=hedger)
+
+    result = await client.request(
+        endpoint=_endpoint(),
+        base_url="http://erp.test",
+        payload={"id": 1},
+        headers={},
+        retry_policy=RetryPolicy(max_attempts=1),
+        failure_threshold=10,
+        recovery_timeout_sec=1.0,
+        request_id="req-hedge",
+    )
+
+    assert result.hedge_won is True
+    assert result.payload == {"copy": 2}
+    assert calls == ["GET", "GET"]
+    await pool.aclose()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.policy import RetryExhaustedError, RetryPolicy
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+def _endpoint(connector_id: str = "erp") -> EndpointRoute:
+    return EndpointRoute(
+        id=f"{connector_id}-orders",
+        name="Create order",
+        method="POST",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id=connector_id, name=connector_id, base_url="http://erp.test"),
+    )
+
+
+@pytest.mark.anyio
+async def test_one_long_lived_client_per_connector():
+    pool = HttpClientPool(max_connections=5, max_keepalive_connections=2, keepalive_expiry_sec=1.5)
+    pool.open()
+
+    erp = pool.client("erp")
+    assert pool.client("erp") is erp
+    assert pool.client("crm") is not erp
+
+    stats = pool.stats()
+    assert stats["clients_created"] == 2
+    assert stats["max_connections"] == 5
+    assert stats["connectors"]["erp"]["requests"] == 2
+
+    await pool.aclose()
+    assert erp.is_closed
+    assert pool.stats()["connectors"] == {}
+
+
+@pytest.mark.anyio
+async def test_clients_from_another_loop_are_closed_there():
+    pool = HttpClientPool()
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        stale = asyncio.run_coroutine_threadsafe(_open_client(pool), other_loop).result(timeout=5)
+
+        fresh = pool.client("erp")
+        assert fresh is not stale
+        for _ in range(50):
+            if stale.is_closed:
+                break
+            await asyncio.sleep(0.01)
+        assert stale.is_closed
+        await pool.aclose()
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(timeout=5)
+        other_loop.close()
+
+
+async def _open_client(pool: HttpClientPool) -> httpx.AsyncClient:
+    return pool.client("erp")
+
+
+@pytest.mark.anyio
+async def test_retries_reuse_the_pooled_client(monkeypatch):
+    clients: list = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        clients.append(self)
+        return httpx.Response(status_code=503, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    pool = HttpClientPool()
+    client = RestClient(CircuitBreaker(), http_pool=pool)
+
+    with pytest.raises(RetryExhaustedError):
+        await client.request(
+            endpoint=_endpoint(),
+            base_url="http://erp.test",
+            payload={"id": 1},
+            headers={},
+            retry_policy=RetryPolicy(max_attempts=3, base_delay_sec=0.01, max_delay_sec=0.01),
+            failure_threshold=10,
+            recovery_timeout_sec=1.0,
+            request_id="req-pool",
+        )
+
+    assert len(clients) == 3
+    assert len({id(client) for client in clients}) == 1
+    assert not clients[0].is_closed
+    await pool.aclose()
@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.database import SessionLocal
+from app.services.api_integration.api.v1.endpoints import webhooks
+from app.services.api_integration.models import Run
+from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.ingest_log import IngestLog
+from app.services.api_integration.services.run_queue import RunQueue
+
+
+def _log(path, **kwargs) -> IngestLog:
+    kwargs.setdefault("fsync_interval_sec", 0.001)
+    return IngestLog(path, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_uncommitted_entries_are_replayed_in_order(tmp_path):
+    log = _log(tmp_path)
+    assert log.open() == []
+    first = await log.append("flow", "flow-1", {"id": 1}, "req-1")
+    second = await log.append("event", "orders/create", {"id": 2}, "req-2")
+    await log.append("flow", "flow-1", {"id": 3}, "req-3")
+    log.commit(second.seq)
+    await log.close()
+
+    reopened = _log(tmp_path)
+    pending = reopened.open()
+    assert [(entry.seq, entry.payload) for entry in pending] == [(1, {"id": 1}), (3, {"id": 3})]
+    assert pending[0].run_id("flow-1") == first.run_id("flow-1")
+    assert (await reopened.append("flow", "flow-1", {}, "req-4")).seq == 4
+    await reopened.close()
+
+
+@pytest.mark.anyio
+async def test_torn_or_corrupt_tail_is_ignored(tmp_path):
+    log = _log(tmp_path)
+    log.open()
+    await log.append("flow", "flow-1", {"id": 1}, "req-1")
+    await log.append("flow", "flow-1", {"id": 2}, "req-2")
+    await log.close()
+
+    segment = next(tmp_path.glob("ingest-*.log"))
+    data = bytearray(segment.read_bytes())
+    data[-3] ^= 0xFF
+    segment.write_bytes(bytes(data) + b"\x07\x00")
+
+    pending = _log(tmp_path).open()
+    assert [entry.payload for entry in pending] == [{"id": 1}]
+
+
+@pytest.mark.anyio
+async def test_segments_rotate_and_are_deleted_once_committed(tmp_path):
+    log = _log(tmp_path, segment_max_bytes=256)
+    log.open()
+    entries = [await log.append("flow", "flow-1", {"blob": "x" * 200, "n": n}, "req") for n in range(3)]
+    assert len(list(tmp_path.glob("ingest-*.log"))) == 4
+
+    for entry in entries:
+        log.commit(entry.seq)
+    # Only the active segment survives.
+    assert len(list(tmp_path.glob("ingest-*.log"))) == 1
+    await log.close()
+    assert _log(tmp_path).open() == []
+
+
+@pytest.mark.anyio
+async def test_run_ids_stay_unique_after_the_log_empties(tmp_path):
+    log = _log(tmp_path)
+    log.open()
+    first = await log.append("flow", "flow-1", {"id": 1}, "req-1")
+    log.commit(first.seq)
+    await log.close()
+    idle = _log(tmp_path)
+    idle.open()
+    await idle.close()
+
+    # An idle restart removed the last segment, so sequence numbers restart under the same EPOCH.
+    reopened = _log(tmp_path)
+    assert reopened.open() == []
+    again = await reopened.append("flow", "flow-1", {"id": 2}, "req-2")
+    assert again.seq == first.seq
+    assert again.run_id("flow-1") != first.run_id("flow-1")
+    await reopened.close()
+
+
+@pytest.mark.anyio
+async def test_each_process_gets_its_own_log_directory(tmp_path):
+    worker_a, worker_b = _log(tmp_path), _log(tmp_path)
+    worker_a.open()
+    worker_b.open()
+    assert worker_a.directory == tmp_path
+    assert worker_b.directory == tmp_path / "worker-1"
+
+    entry_a = await worker_a.append("flow", "flow-1", {"worker": "a"}, "req-a")
+    await worker_b.append("flow", "flow-1", {"worker": "b"}, "req-b")
+    worker_a.commit(entry_a.seq)
+    await worker_a.close()
+    await worker_b.close()
+
+    # After a restart each worker again takes a free slot and replays only that slot's entries.
+    restarted = [_log(tmp_path), _log(tmp_path)]
+    assert [[entry.payload for entry in log.open()] for log in restarted] == [[], [{"worker": "b"}]]
+    for log in restarted:
+        await log.close()
+
+
+@pytest.mark.anyio
+async def test_concurrent_appends_share_fsyncs(tmp_path):
+    log = _log(tmp_path, fsync_interval_sec=0.005)
+    log.open()
+    await asyncio.gather(*(log.append("flow", "flow-1", {"n": n}, "req") for n in range(50)))
+
+    stats = log.stats()
+    assert stats["appended"] == 50
+    assert stats["fsyncs"] < 5
+    await log.close()
+
+
+@pytest.mark.anyio
+async def test_wal_webhook_replays_unfinished_entries_once(async_client, tmp_path, monkeypatch):
+    original_request = httpx.AsyncClient.request
+    calls: list = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        if not str(url).startswith("http://127.0.0.1:8000"):
+            return await original_request(self, method, url, *args, **kwargs)
+        calls.append(kwargs.get("json"))
+        return httpx.Response(status_code=200, json={"result": "ok"}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    monkeypatch.setattr(webhooks, "WEBHOOK_INGEST_MODE", "wal")
+
+    async def crash(item) -> None:
+        raise RuntimeError("worker died before running the flow")
+
+    # First process: the webhook is acknowledged from the log, but the worker never finishes it.
+    monkeypatch.setattr(flow_runner, "ingest_log", _log(tmp_path))
+    monkeypatch.setattr(flow_runner, "queue", RunQueue(crash, maxsize=10, workers=1))
+    flow_runner.ingest_log.open()
+    flows = (await async_client.get("/api/v1/api-integration/flows")).json()
+    flow_id = next(flow["id"] for flow in flows if flow["name"] == "Shopify -> ERP Order Sync")
+
+    response = await async_client.post(f"/api/v1/api-integration/webhooks/{flow_id}", json={"id": "SO-WAL"})
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "ACCEPTED"
+    await flow_runner.queue.stop(drain_timeout_sec=5)
+    await flow_runner.ingest_log.close()
+    assert calls == []
+
+    # Next process: replay runs the entry under the run id promised in the response.
+    monkeypatch.setattr(flow_runner, "ingest_log", _log(tmp_path))
+    monkeypatch.setattr(flow_runner, "queue", RunQueue(flow_runner._process_queue_item, maxsize=10, workers=1))
+    assert flow_runner.replay_ingest_log() == 1
+    await flow_runner._replay_task
+    await flow_runner.queue.stop(drain_timeout_sec=5)
+    await flow_runner.ingest_log.close()
+
+    db = SessionLocal()
+    try:
+        run = db.query(Run).filter(Run.id == body["run_id"]).one()
+        assert run.status == "SUCCEEDED"
+        assert run.mapped_payload["order_number"] == "SO-WAL"
+    finally:
+        db.close()
+    assert len(calls) == 1
+    assert _log(tmp_path).open() == []
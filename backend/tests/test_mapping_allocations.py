@@ -0,0 +1,76 @@
+import copy
+import tracemalloc
+
+from app.services.api_integration.services import mapping_engine
+from app.services.api_integration.services.mapping_engine import compile_mapping
+
+# A sparse order: almost every field falls back to its default.
+SPARSE_RULES = [
+    {"source": "id", "target": "order_number"},
+    {"source": "currency", "target": "currency", "default": "USD"},
+    {"source": "status", "target": "status", "default": "pending", "transform": "upper"},
+    {"source": "total", "target": "total", "default": 0, "transform": "to_float"},
+    {"source": "tags", "target": "tags", "default": []},
+    {"source": "meta", "target": "meta", "default": {"source": "shopify", "flags": {"gift": False}}},
+    {"source": "shipping", "target": "shipping", "default": {"lines": [{"code": "STD", "price": "0.00"}]}},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku", "default": "UNKNOWN"},
+            {"source": "qty", "target": "qty", "default": 1, "transform": "to_int"},
+            {"source": "price", "target": "price", "default": "0.00", "transform": "to_float"},
+        ],
+    },
+]
+
+
+def _sparse_orders(count: int) -> list[dict]:
+    return [{"id": f"SO-{i}", "line_items": [{}, {}, {}]} for i in range(count)]
+
+
+def _count_blocks(compiled, payloads: list[dict]) -> int:
+    """Return how many memory blocks mapping payloads leaves allocated, results included."""
+    compiled.apply(payloads[0])
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        results = [compiled.apply(payload) for payload in payloads]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    assert len(results) == len(payloads)
+    return sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+
+def test_shared_defaults_allocate_less_than_deepcopy(monkeypatch):
+    payloads = _sparse_orders(200)
+    compiled = compile_mapping(SPARSE_RULES)
+    new_blocks = _count_blocks(compiled, payloads)
+
+    # deepcopy's memo and keep-alive list are freed on return; holding on to them makes the
+    # bookkeeping it allocates for every default show up in the snapshot block counts.
+    memos: list[dict] = []
+
+    def deepcopy_default(value):
+        memos.append({})
+        return copy.deepcopy(value, memos[-1])
+
+    monkeypatch.setattr(mapping_engine, "_default_copier", lambda default: deepcopy_default)
+    deepcopy_compiled = compile_mapping(SPARSE_RULES)
+    old_blocks = _count_blocks(deepcopy_compiled, payloads)
+
+    assert compiled.apply(payloads[0]) == deepcopy_compiled.apply(payloads[0])
+    assert new_blocks < old_blocks * 0.8, f"blocks for 200 orders: shared={new_blocks} deepcopy={old_blocks}"
+
+
+def test_mutable_defaults_are_not_shared_between_results():
+    compiled = compile_mapping(SPARSE_RULES)
+    first, second = compiled.apply({}), compiled.apply({})
+
+    first["tags"].append("x")
+    first["meta"]["flags"]["gift"] = True
+    assert second["tags"] == []
+    assert second["meta"] == {"source": "shopify", "flags": {"gift": False}}
+    assert SPARSE_RULES[5]["default"]["flags"]["gift"] is False
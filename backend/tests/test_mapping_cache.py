@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.api_integration.services import transforms
+from app.services.api_integration.services.mapping_cache import MappingResultCache
+from app.services.api_integration.services.mapping_engine import invalidate_compiled_mapping
+
+
+def _mapping(rules: list[dict], mapping_id: str = "m-cache") -> SimpleNamespace:
+    return SimpleNamespace(id=mapping_id, rules=rules, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _fresh_plans():
+    invalidate_compiled_mapping()
+    yield
+    invalidate_compiled_mapping()
+    transforms._lookup_tables.pop("test_cache_codes", None)
+
+
+def test_duplicate_payloads_hit_the_cache_regardless_of_key_order():
+    cache = MappingResultCache(max_entries=10, ttl_sec=60)
+    mapping = _mapping([{"source": "id", "target": "order_number"}, {"source": "total", "target": "total", "transform": "to_float"}])
+
+    first = cache.map(mapping, {"id": "SO-1", "total": "1.5"})
+    second = cache.map(mapping, {"total": "1.5", "id": "SO-1"})
+
+    assert first == second == {"order_number": "SO-1", "total": 1.5}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_callers_get_their_own_copy_of_a_cached_result():
+    cache = MappingResultCache(max_entries=10, ttl_sec=60)
+    mapping = _mapping([{"source": "order", "target": "order"}])
+    payload = {"order": {"id": "SO-1", "lines": [{"sku": "A"}]}}
+
+    first = cache.map(mapping, payload)
+    first["order"]["lines"].append({"sku": "B"})
+    first["order"]["id"] = "changed"
+
+    assert cache.map(mapping, payload) == {"order": {"id": "SO-1", "lines": [{"sku": "A"}]}}
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used_and_expires_entries():
+    clock = _Clock()
+    cache = MappingResultCache(max_entries=2, ttl_sec=10, clock=clock)
+    mapping = _mapping([{"source": "id", "target": "id"}])
+
+    cache.map(mapping, {"id": 1})
+    cache.map(mapping, {"id": 2})
+    cache.map(mapping, {"id": 1})
+    cache.map(mapping, {"id": 3})
+    assert cache.stats()["evictions"] == 1
+
+    cache.map(mapping, {"id": 1})
+    assert cache.stats()["hits"] == 2
+
+    clock.now = 11
+    cache.map(mapping, {"id": 1})
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_editing_rules_or_lookup_tables_invalidates_results():
+    cache = MappingResultCache(max_entries=10, ttl_sec=60)
+    mapping = _mapping([{"source": "id", "target": "id"}])
+    cache.map(mapping, {"id": 1, "code": "a"})
+
+    mapping.rules = [{"source": "id", "target": "order_id"}]
+    assert cache.map(mapping, {"id": 1, "code": "a"}) == {"order_id": 1}
+    assert cache.stats()["invalidations"] == 1
+
+    mapping.rules = [{"source": "code", "target": "code", "transform": "lookup:test_cache_codes"}]
+    transforms.load_lookup_table("test_cache_codes", {"a": "A"})
+    assert cache.map(mapping, {"id": 1, "code": "a"}) == {"code": "A"}
+    transforms.load_lookup_table("test_cache_codes", {"a": "B"})
+    assert cache.map(mapping, {"id": 1, "code": "a"}) == {"code": "B"}
+
+
+def test_disabled_cache_maps_without_storing():
+    cache = MappingResultCache(max_entries=0, ttl_sec=60)
+    mapping = _mapping([{"source": "id", "target": "id"}])
+
+    assert cache.map(mapping, {"id": 1}) == {"id": 1}
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["misses"] == 0
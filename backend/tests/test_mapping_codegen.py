@@ -0,0 +1,80 @@
+import pytest
+
+from app.services.api_integration.services.mapping_codegen import compile_mapping_function, generate_mapping_source
+from app.services.api_integration.services.mapping_engine import _apply_rules, compile_mapping
+
+ORDER_RULES = [
+    {"source": "id", "target": "order_number"},
+    {"source": "total_price", "target": "totals.amount", "transform": "to_float"},
+    {"source": "currency", "target": "totals.currency", "default": "USD", "transform": "upper"},
+    {"source": "tags.0", "target": "first_tag"},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku"},
+            {"source": "quantity", "target": "qty", "transform": "to_int", "default": 1},
+            {"source": "price", "target": "unit_price", "transform": "to_float", "default": 0},
+            {"source": "properties", "target": "properties", "default": {"gift": False}},
+            {
+                "source": "discounts",
+                "target": "discounts",
+                "op": "map_array",
+                "item_rules": [{"source": "code", "target": "code", "transform": "lower"}],
+            },
+        ],
+    },
+]
+
+
+def test_generated_mapping_matches_interpreter():
+    payload = {
+        "id": "SO-1",
+        "total_price": "10.50",
+        "tags": ["vip"],
+        "line_items": [
+            {"sku": "A", "quantity": "2", "price": "1.25", "discounts": [{"code": "SPRING"}]},
+            {"sku": "B", "quantity": "bad", "price": None},
+            {"sku": "C", "properties": {"gift": True}},
+        ],
+    }
+
+    compiled = compile_mapping(ORDER_RULES, codegen=True)
+    assert compiled.mode == "codegen"
+
+    mapped = compiled.apply(payload)
+    assert mapped == _apply_rules(payload, ORDER_RULES)
+    assert list(mapped) == ["order_number", "totals", "first_tag", "items"]
+
+    first, second = compiled.apply(payload), compiled.apply(payload)
+    assert first["items"][1]["properties"] is not second["items"][1]["properties"]
+
+
+def test_generated_mapping_source_is_straight_line():
+    source, constants, _, _ = generate_mapping_source(ORDER_RULES)
+    assert source.startswith("def map_payload(source_payload):")
+    assert "for _s" in source
+    assert "return {'order_number':" in source
+    assert constants == [{"gift": False}]
+
+
+def test_generated_mapping_propagates_transform_errors():
+    function = compile_mapping_function([{"source": "total", "target": "total", "transform": "to_float"}])
+    with pytest.raises(ValueError):
+        function({"total": "n/a"})
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        [{"source": "id", "target": "items.0"}],
+        [{"source": "id", "target": "order"}, {"source": "id", "target": "order.id"}],
+        [{"source": "id", "target": "order", "transform": "reverse"}],
+        [{"source": "id", "target": "order", "op": "merge"}],
+        [{"source": "id"}],
+    ],
+)
+def test_codegen_falls_back_to_interpreter_for_unsupported_rules(rules):
+    assert compile_mapping_function(rules) is None
+    assert compile_mapping(rules, codegen=True).mode in {"skeleton", "set_path"}
@@ -1,4 +1,18 @@
-from app.services.api_integration.services.mapping_engine import apply_mapping
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.api_integration.services import mapping_engine, transforms
+from app.services.api_integration.services.mapping_engine import (
+    _apply_rules,
+    apply_mapping,
+    apply_mapping_batch,
+    compile_mapping,
+    get_compiled_mapping,
+    invalidate_compiled_mapping,
+    shutdown_batch_pool,
+)
 
 
 def test_mapping_engine_supports_defaults_and_transform_aliases():
@@ -86,3 +100,234 @@ def test_mapping_engine_supports_nested_array_mapping():
             }
         ]
     }
+
+
+def test_compiled_mapping_matches_interpreter_for_edge_case_rules():
+    payload = {
+        "id": 7,
+        "meta": {"tags": ["a", "b"], "note": None},
+        "lines": [{"n": "1"}, {"n": "x"}, "not-a-dict"],
+    }
+    rule_sets = [
+        [{"source": "id", "target": "a"}, {"source": "meta.note", "target": "a.b", "default": "n/a"}],
+        [{"source": "meta.tags.1", "target": "tags.0"}, {"source": "meta.tags.0", "target": "tags.2"}],
+        [{"source": ".", "target": "copy"}, {"source": "id", "target": "copy", "transform": "to_str"}],
+        [{"source": "missing", "target": "x", "transform": "no_such_transform"}],
+        [
+            {"source": "lines", "target": "items", "op": "map_array", "item_rules": [
+                {"source": "n", "target": "n", "transform": "int", "default": -1},
+            ]},
+            {"source": "absent", "target": "empty", "op": "map_array", "item_rules": [{"target": None}]},
+        ],
+        [{"source": "id", "target": "first"}, {"source": "meta", "target": "meta"}, {"source": "id", "target": "first"}],
+    ]
+
+    for rules in rule_sets:
+        assert compile_mapping(rules).apply(payload) == _apply_rules(payload, rules)
+        assert list(apply_mapping(payload, rules)) == list(_apply_rules(payload, rules))
+
+
+def test_compiled_mapping_raises_interpreter_errors_lazily():
+    payload = {"value": "abc"}
+
+    with pytest.raises(ValueError, match="Mapping rule must include a target path"):
+        apply_mapping(payload, [{"source": "value"}])
+    with pytest.raises(ValueError, match="Unsupported mapping operation: merge"):
+        apply_mapping(payload, [{"source": "value", "target": "v", "op": "merge"}])
+    with pytest.raises(ValueError, match="Unsupported transform: reverse"):
+        apply_mapping(payload, [{"source": "value", "target": "v", "transform": "reverse"}])
+    with pytest.raises(ValueError):
+        apply_mapping(payload, [{"source": "value", "target": "v", "transform": "to_float"}])
+    with pytest.raises(ValueError, match="on list with key 'x'"):
+        apply_mapping(payload, [{"source": "value", "target": "v.0"}, {"source": "value", "target": "v.x.y"}])
+
+
+def test_get_compiled_mapping_caches_plan_until_rules_change():
+    invalidate_compiled_mapping()
+    mapping = SimpleNamespace(
+        id="mapping-1",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        rules=[{"source": "id", "target": "order_number"}],
+    )
+
+    compiled = get_compiled_mapping(mapping)
+    assert get_compiled_mapping(mapping) is compiled
+    assert compiled.apply({"id": "SO-1"}) == {"order_number": "SO-1"}
+
+    mapping.rules[0]["target"] = "number"
+    recompiled = get_compiled_mapping(mapping)
+    assert recompiled is not compiled
+    assert recompiled.apply({"id": "SO-1"}) == {"number": "SO-1"}
+
+
+def test_apply_mapping_reuses_plans_and_sees_rule_edits(monkeypatch):
+    compiled = []
+    original = mapping_engine.compile_mapping
+
+    def counting_compile(rules, codegen=False):
+        compiled.append(rules)
+        return original(rules, codegen=codegen)
+
+    monkeypatch.setattr(mapping_engine, "compile_mapping", counting_compile)
+    invalidate_compiled_mapping()
+    rules = [{"source": "id", "target": "number"}]
+
+    assert apply_mapping({"id": "SO-1"}, rules) == {"number": "SO-1"}
+    assert apply_mapping({"id": "SO-2"}, rules) == {"number": "SO-2"}
+    equal_rules = [{"source": "id", "target": "number"}]
+    assert apply_mapping({"id": "SO-3"}, equal_rules) == {"number": "SO-3"}
+    assert len(compiled) == 1
+
+    rules[0]["target"] = "order_number"
+    assert apply_mapping({"id": "SO-4"}, rules) == {"order_number": "SO-4"}
+    assert len(compiled) == 2
+
+
+BATCH_RULES = [
+    {"source": "id", "target": "order_number"},
+    {"source": "total", "target": "total_amount", "transform": "to_float"},
+]
+
+
+def test_apply_mapping_batch_matches_single_record_mapping():
+    payloads = [{"id": f"SO-{i}", "total": str(i)} for i in range(25)]
+    assert apply_mapping_batch(payloads, BATCH_RULES) == [apply_mapping(p, BATCH_RULES) for p in payloads]
+
+
+def test_apply_mapping_batch_can_return_per_record_errors():
+    payloads = [{"id": "SO-1", "total": "1.5"}, {"id": "SO-2", "total": "n/a"}]
+
+    with pytest.raises(ValueError):
+        apply_mapping_batch(payloads, BATCH_RULES)
+
+    results = apply_mapping_batch(payloads, BATCH_RULES, return_exceptions=True)
+    assert results[0] == {"order_number": "SO-1", "total_amount": 1.5}
+    assert isinstance(results[1], ValueError)
+
+
+def test_apply_mapping_batch_on_process_pool_preserves_order():
+    payloads = [{"id": f"SO-{i}", "total": "bad" if i == 7 else str(i)} for i in range(30)]
+
+    results = apply_mapping_batch(payloads, BATCH_RULES, processes=2, chunk_size=8, return_exceptions=True)
+    assert len(results) == 30
+    assert results[3] == {"order_number": "SO-3", "total_amount": 3.0}
+    assert isinstance(results[7], ValueError)
+    assert results[29] == {"order_number": "SO-29", "total_amount": 29.0}
+
+    pool = mapping_engine._pool
+    rerun = apply_mapping_batch(payloads, BATCH_RULES, processes=2, chunk_size=8, return_exceptions=True)
+    assert rerun[3] == results[3]
+    assert mapping_engine._pool is pool
+    shutdown_batch_pool()
+    assert mapping_engine._pool is None
+
+
+def test_process_pool_workers_see_lookup_tables_and_their_reloads():
+    rules = [{"source": "sku", "target": "erp_code", "transform": "lookup:test_pool_skus"}]
+    payloads = [{"sku": f"SKU-{i % 3}"} for i in range(30)]
+    transforms.load_lookup_table("test_pool_skus", {"SKU-0": "A", "SKU-1": "B", "SKU-2": "C"})
+    try:
+        results = apply_mapping_batch(payloads, rules, processes=2, chunk_size=8)
+        assert results == [apply_mapping(p, rules) for p in payloads]
+        assert mapping_engine._pool is not None
+
+        transforms.load_lookup_table("test_pool_skus", {"SKU-0": "Z", "SKU-1": "Y", "SKU-2": "X"})
+        results = apply_mapping_batch(payloads, rules, processes=2, chunk_size=8)
+        assert [r["erp_code"] for r in results[:3]] == ["Z", "Y", "X"]
+    finally:
+        transforms.lookup_table("test_pool_skus").unload()
+        shutdown_batch_pool()
+
+
+def test_unpicklable_transforms_map_in_process():
+    rules = [{"source": "id", "target": "id", "transform": "test_pool_shout"}]
+    payloads = [{"id": f"so-{i}"} for i in range(30)]
+    shutdown_batch_pool()
+    transforms.register_transform("test_pool_shout", lambda value: str(value).upper())
+    try:
+        results = apply_mapping_batch(payloads, rules, processes=2, chunk_size=8)
+        assert results[29] == {"id": "SO-29"}
+        assert mapping_engine._pool is None
+    finally:
+        transforms.unregister_transform("test_pool_shout")
+
+
+COLUMNAR_RULES = [
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku", "transform": "upper"},
+            {"source": "quantity", "target": "qty", "transform": "to_int", "default": 1},
+            {"source": "price", "target": "unit_price", "transform": "to_float", "default": 0},
+            {"source": "note", "target": "note", "transform": "lower"},
+            {"source": "tags", "target": "tags", "op": "map_array", "item_rules": [{"source": ".", "target": "t"}]},
+        ],
+    }
+]
+
+
+def _line_items(count: int) -> list:
+    items = []
+    for i in range(count):
+        item = {"sku": f"sku-{i}", "quantity": i if i % 2 else str(i), "tags": ["x"] * (i % 3)}
+        if i % 5:
+            item["price"] = "bad" if i % 7 == 0 else i * 1.25
+        if i % 4 == 0:
+            item["note"] = None
+        items.append(item)
+    items.append("not-an-object")
+    return items
+
+
+@pytest.mark.parametrize("numpy_enabled", [True, False])
+def test_columnar_map_array_matches_interpreter(monkeypatch, numpy_enabled):
+    if not numpy_enabled:
+        monkeypatch.setattr(mapping_engine, "np", None)
+    payload = {"line_items": _line_items(mapping_engine.COLUMNAR_MIN_ITEMS * 3)}
+
+    assert compile_mapping(COLUMNAR_RULES).apply(payload) == _apply_rules(payload, COLUMNAR_RULES)
+
+    numeric = {"line_items": [{"sku": "a", "quantity": 2.9, "price": 3} for _ in range(100)]}
+    assert compile_mapping(COLUMNAR_RULES).apply(numeric) == _apply_rules(numeric, COLUMNAR_RULES)
+
+    # Ints past 2**53 next to floats must not be rounded through float64.
+    big = [{"sku": "a", "quantity": 2**60 + 1 if i % 2 else 1.5} for i in range(100)]
+    mapped = compile_mapping(COLUMNAR_RULES).apply({"line_items": big})
+    assert mapped == _apply_rules({"line_items": big}, COLUMNAR_RULES)
+    assert mapped["items"][1]["qty"] == 2**60 + 1
+
+
+def test_columnar_map_array_surfaces_unexpected_errors(monkeypatch):
+    if mapping_engine.np is None:
+        pytest.skip("numpy is not installed")
+
+    def broken_numeric_column(transform, values):
+        raise RuntimeError("columnar bug")
+
+    monkeypatch.setattr(mapping_engine, "_numeric_column", broken_numeric_column)
+    payload = {"line_items": [{"sku": "a", "quantity": 2, "price": 3.5} for _ in range(100)]}
+
+    with pytest.raises(RuntimeError, match="columnar bug"):
+        compile_mapping(COLUMNAR_RULES).apply(payload)
+
+
+def test_columnar_map_array_raises_first_row_error():
+    rules = [
+        {
+            "source": "rows",
+            "target": "rows",
+            "op": "map_array",
+            "item_rules": [
+                {"source": "a", "target": "a", "transform": "to_int"},
+                {"source": "b", "target": "b", "transform": "to_float"},
+            ],
+        }
+    ]
+    rows = [{"a": "1", "b": "1"} for _ in range(100)]
+    rows[10]["b"] = "bad-b"
+    rows[20]["a"] = "bad-a"
+
+    with pytest.raises(ValueError, match="bad-b"):
+        compile_mapping(rules).apply({"rows": rows})
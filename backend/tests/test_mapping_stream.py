@@ -0,0 +1,87 @@
+import json
+import tracemalloc
+
+import pytest
+
+from app.services.api_integration.services.mapping_engine import apply_mapping, compile_mapping
+from app.services.api_integration.services.mapping_stream import JsonStreamError, map_json_stream
+
+ORDER_RULES = [
+    {"source": "id", "target": "order_number"},
+    {"source": "total_price", "target": "total_amount", "transform": "to_float"},
+    {"source": "currency", "target": "currency", "default": "USD"},
+    {"source": "shipping_address.city", "target": "ship.city"},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku"},
+            {"source": "quantity", "target": "qty", "transform": "to_int", "default": 1},
+            {"source": "price", "target": "unit_price", "transform": "to_float", "default": 0},
+        ],
+    },
+]
+
+
+def _order(item_count: int) -> dict:
+    return {
+        "id": "SO-1001",
+        "total_price": "123.45",
+        "note": "x" * 200,
+        "shipping_address": {"city": "Seattle", "lines": ["1 Main St", "Suite 2"]},
+        "line_items": [
+            {"sku": f"SKU-{i}", "quantity": str(i % 5), "price": "10.50", "description": "y" * 200}
+            for i in range(item_count)
+        ],
+    }
+
+
+def _chunks(data: bytes, size: int):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_stream_mapping_matches_apply_mapping(chunk_size):
+    payload = _order(20)
+    data = json.dumps(payload).encode()
+
+    mapped = map_json_stream(_chunks(data, chunk_size), compile_mapping(ORDER_RULES))
+
+    assert json.loads(mapped.read()) == apply_mapping(payload, ORDER_RULES)
+    assert mapped.source_bytes == len(data)
+    assert mapped.size == len(mapped.read())
+
+
+def test_stream_mapping_falls_back_for_set_path_targets():
+    rules = [
+        {"source": "line_items", "target": "items.0", "op": "map_array", "item_rules": [{"source": "sku", "target": "sku"}]},
+        {"source": "id", "target": "items.1"},
+    ]
+    payload = _order(3)
+
+    mapped = map_json_stream([json.dumps(payload).encode()], compile_mapping(rules))
+
+    assert json.loads(mapped.read()) == apply_mapping(payload, rules)
+
+
+@pytest.mark.parametrize("body", [b'{"id": 1', b'{"id": }', b'{"id": 1} x', b"[1, 2,]", b""])
+def test_stream_mapping_rejects_malformed_json(body):
+    with pytest.raises(JsonStreamError):
+        map_json_stream(_chunks(body, 3), compile_mapping(ORDER_RULES))
+
+
+def test_stream_mapping_memory_is_bounded_by_item_size():
+    data = json.dumps(_order(20000)).encode()
+    compiled = compile_mapping(ORDER_RULES)
+
+    tracemalloc.start()
+    try:
+        mapped = map_json_stream(_chunks(data, 64 * 1024), compiled)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(data) > 4 * 1024 * 1024
+    assert peak < len(data) / 2
+    assert len(json.loads(mapped.read())["items"]) == 20000
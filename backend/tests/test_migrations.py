@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.services.api_integration.models import Base, Connector, Endpoint, Flow
+from app.services.api_integration.models.migrations import ADDED_COLUMNS, upgrade_schema
+
+
+def _old_database(tmp_path):
+    """A database as an earlier release left it: every later-added column dropped again."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Connector(id="c-old", name="old", protocol="rest"))
+        db.add(Endpoint(id="e-old", connector_id="c-old", name="old", direction="outbound", method="POST", path="/"))
+        db.add(Flow(id="f-old", name="old", source_endpoint_id="e1", target_endpoint_id="e2", mapping_id="m1"))
+        db.commit()
+    with engine.begin() as connection:
+        for table, column in ADDED_COLUMNS:
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+    return engine
+
+
+def test_upgrade_adds_missing_columns_with_model_defaults(tmp_path):
+    engine = _old_database(tmp_path)
+
+    added = upgrade_schema(engine)
+
+    assert added == [f"{table}.{column}" for table, column in ADDED_COLUMNS]
+    inspector = inspect(engine)
+    for table, column in ADDED_COLUMNS:
+        assert column in {c["name"] for c in inspector.get_columns(table)}
+    with engine.connect() as connection:
+        for table, column in ADDED_COLUMNS:
+            model_column = Base.metadata.tables[table].columns[column]
+            expected = model_column.default.arg if model_column.default is not None else None
+            for (value,) in connection.execute(text(f"SELECT {column} FROM {table}")):
+                assert value == expected, f"{table}.{column}"
+
+    assert upgrade_schema(engine) == []
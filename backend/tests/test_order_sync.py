@@ -1,6 +1,10 @@
+import json
 import pytest
 import httpx
 
+from app.database import SessionLocal
+from app.services.api_integration.models import Flow
+
 
 async def _get_demo_flow_id(async_client) -> str:
     flows_response = await async_client.get("/api/v1/api-integration/flows")
@@ -92,7 +96,8 @@ async def test_dead_letter_and_replay(async_client, monkeypatch):
     monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
 
     flow_id = await _get_demo_flow_id(async_client)
-    payload = _shopify_order_payload()
+    # A plain top-level "streamed" key is user data, not the streamed-run marker.
+    payload = {**_shopify_order_payload(), "streamed": True}
 
     before_dlq_response = await async_client.get("/api/v1/api-integration/dead-letters")
     assert before_dlq_response.status_code == 200
@@ -123,3 +128,121 @@ async def test_dead_letter_and_replay(async_client, monkeypatch):
     updated_item = next(item for item in updated_dlq_response.json() if item["id"] == dead_letter_id)
     assert updated_item["status"] == "REPLAYED"
     assert updated_item["replay_count"] >= 1
+
+
+@pytest.mark.anyio
+async def test_dry_run_map_maps_batch_without_creating_runs(async_client):
+    flow_id = await _get_demo_flow_id(async_client)
+    runs_before = (await async_client.get(f"/api/v1/api-integration/flows/{flow_id}/runs")).json()
+
+    good_order = _shopify_order_payload()
+    bad_order = {**good_order, "total_price": "not-a-number"}
+    response = await async_client.post(
+        f"/api/v1/api-integration/flows/{flow_id}/dry-run-map",
+        json={"payloads": [good_order, bad_order]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert body["succeeded"] == 1
+    assert body["failed"] == 1
+    assert body["results"][0]["mapped_payload"]["total_amount"] == 123.45
+    assert body["results"][1]["error"]
+
+    runs_after = (await async_client.get(f"/api/v1/api-integration/flows/{flow_id}/runs")).json()
+    assert len(runs_after) == len(runs_before)
+
+
+@pytest.mark.anyio
+async def test_dry_run_map_reports_invalid_rules(async_client):
+    flow_id = await _get_demo_flow_id(async_client)
+    db = SessionLocal()
+    mapping = db.query(Flow).filter(Flow.id == flow_id).one().mapping
+    original_rules = mapping.rules
+    mapping.rules = [*original_rules, {"source": "id", "target": "erp_id", "transform": "lookup:no_such_table"}]
+    db.commit()
+    try:
+        response = await async_client.post(
+            f"/api/v1/api-integration/flows/{flow_id}/dry-run-map",
+            json={"payloads": [_shopify_order_payload()]},
+        )
+    finally:
+        mapping.rules = original_rules
+        db.commit()
+        db.close()
+
+    assert response.status_code == 422
+    assert response.json()["error"]["code"] == "invalid_mapping"
+    assert "no_such_table" in response.json()["error"]["message"]
+
+
+@pytest.mark.anyio
+async def test_order_sync_flow_via_streamed_webhook(async_client, monkeypatch):
+    original_request = httpx.AsyncClient.request
+    captured: dict = {}
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        url_str = str(url)
+        if url_str.startswith("http://127.0.0.1:8000"):
+            captured["body"] = b"".join([chunk async for chunk in kwargs["content"]])
+            captured["json"] = kwargs.get("json")
+            request = httpx.Request(method, url_str)
+            return httpx.Response(status_code=200, json={"result": "ok"}, request=request)
+        return await original_request(self, method, url, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+
+    flow_id = await _get_demo_flow_id(async_client)
+    response = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{flow_id}/stream",
+        json=_shopify_order_payload(),
+    )
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "SUCCEEDED"
+    assert captured["json"] is None
+    mapped = json.loads(captured["body"])
+    assert mapped["order_number"] == "SO-1001"
+    assert mapped["items"][0] == {"sku": "SKU-1", "qty": 2, "unit_price": 10.5}
+
+    invalid_response = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{flow_id}/stream",
+        content=b'{"id": ',
+    )
+    assert invalid_response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_order_sync_flow_via_shopify_event(async_client, monkeypatch):
+    original_request = httpx.AsyncClient.request
+    captured: dict = {}
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        url_str = str(url)
+        if url_str.startswith("http://127.0.0.1:8000"):
+            captured["json"] = kwargs.get("json")
+            captured["headers"] = kwargs.get("headers")
+            request = httpx.Request(method, url_str)
+            return httpx.Response(status_code=200, json={"result": "ok"}, request=request)
+        return await original_request(self, method, url, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+
+    response = await async_client.post(
+        "/api/v1/api-integration/webhooks/shopify/orders-create",
+        json=_shopify_order_payload(),
+        headers={"X-Shopify-Topic": "orders/create"},
+    )
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "SUCCEEDED"
+    assert captured["json"]["order_number"] == "SO-1001"
+    assert captured["headers"]["X-ERP-API-Key"] == "erp-demo-key"
+
+    missing = await async_client.post(
+        "/api/v1/api-integration/webhooks/shopify/orders-create",
+        json=_shopify_order_payload(),
+        headers={"X-Shopify-Topic": "orders/unknown"},
+    )
+    assert missing.status_code == 404
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.limiter import RateLimiterRegistry, TargetLimiter
+from app.services.api_integration.recovery.policy import RetryPolicy
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+@pytest.mark.anyio
+async def test_concurrency_cap_admits_waiters_in_arrival_order():
+    limiter = TargetLimiter(max_concurrency=2)
+    admitted: list[int] = []
+    state = {"in_flight": 0, "max": 0}
+
+    async def worker(n: int) -> None:
+        await limiter.acquire()
+        admitted.append(n)
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        limiter.release()
+
+    await asyncio.gather(*(worker(n) for n in range(8)))
+
+    assert admitted == list(range(8))
+    assert state["max"] == 2
+    assert limiter.stats()["queued"] == 6
+
+
+@pytest.mark.anyio
+async def test_token_bucket_spaces_out_requests():
+    limiter = TargetLimiter(rate_per_sec=50, burst=1)
+
+    async def call() -> float:
+        await limiter.acquire()
+        limiter.release()
+        return time.monotonic()
+
+    started = time.monotonic()
+    times = await asyncio.gather(*(call() for _ in range(6)))
+
+    # One token up front, then one every 20ms.
+    assert max(times) - started >= 0.09
+    assert times == sorted(times)
+
+
+@pytest.mark.anyio
+async def test_throttle_holds_back_new_callers():
+    limiter = TargetLimiter(max_concurrency=5)
+    limiter.throttle(0.05)
+
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.04
+    limiter.release()
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = TargetLimiter(max_concurrency=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    limiter.release()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(limiter.acquire(), timeout=0.5)
+    assert limiter.stats()["in_flight"] == 1
+
+
+@pytest.mark.anyio
+async def test_rest_client_honors_endpoint_concurrency(monkeypatch):
+    state = {"in_flight": 0, "max": 0}
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        return httpx.Response(status_code=200, json={}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    endpoint = EndpointRoute(
+        id="erp-orders",
+        name="Create order",
+        method="POST",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test", max_concurrency=3),
+        max_concurrency=2,
+    )
+    registry = RateLimiterRegistry()
+    pool = HttpClientPool()
+    client = RestClient(CircuitBreaker(), http_pool=pool, limiters=registry)
+
+    await asyncio.gather(
+        *(
+            client.request(
+                endpoint=endpoint,
+                base_url="http://erp.test",
+                payload={"id": n},
+                headers={},
+                retry_policy=RetryPolicy(max_attempts=1),
+                failure_threshold=10,
+                recovery_timeout_sec=1.0,
+                request_id=f"req-{n}",
+            )
+            for n in range(6)
+        )
+    )
+
+    assert state["max"] == 2
+    assert set(registry.stats()) == {"connector:erp", "endpoint:erp-orders"}
+    assert registry.stats()["endpoint:erp-orders"]["granted"] == 6
+    await pool.aclose()
@@ -0,0 +1,74 @@
+import httpx
+import pytest
+
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.budget import RetryBudget, RetryBudgetExhaustedError
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.policy import RetryPolicy
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_retries_are_capped_by_recent_first_attempts():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, window_sec=10, min_retries=2, clock=clock)
+    for _ in range(4):
+        budget.record_attempt("erp")
+
+    assert [budget.try_retry("erp") for _ in range(5)] == [True, True, True, True, False]
+    stats = budget.stats()["targets"]["erp"]
+    assert (stats["allowance"], stats["utilization"], stats["rejected_total"]) == (4.0, 1.0, 1)
+    assert budget.try_retry("crm")
+
+    # Once the window slides past those retries the budget refills.
+    clock.now += 11
+    assert budget.try_retry("erp")
+    assert budget.stats()["targets"]["erp"]["first_attempts"] == 0
+
+
+@pytest.mark.anyio
+async def test_exhausted_budget_stops_retrying(monkeypatch):
+    calls = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        calls.append(url)
+        return httpx.Response(status_code=503, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    pool = HttpClientPool()
+    budget = RetryBudget(ratio=0.0, min_retries=1)
+    client = RestClient(CircuitBreaker(), http_pool=pool, retry_budget=budget)
+    endpoint = EndpointRoute(
+        id="erp-orders",
+        name="Create order",
+        method="POST",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test"),
+    )
+
+    with pytest.raises(RetryBudgetExhaustedError, match="HTTP 503 \\(retry budget exhausted\\)"):
+        await client.request(
+            endpoint=endpoint,
+            base_url="http://erp.test",
+            payload={"id": 1},
+            headers={},
+            retry_policy=RetryPolicy(max_attempts=5, base_delay_sec=0.01, max_delay_sec=0.01),
+            failure_threshold=100,
+            recovery_timeout_sec=1.0,
+            request_id="req-budget",
+        )
+
+    # One first attempt plus the single retry the budget allowed.
+    assert len(calls) == 2
+    assert budget.stats()["targets"]["erp-orders"]["rejected_total"] == 1
+    await pool.aclose()
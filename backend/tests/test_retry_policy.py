@@ -0,0 +1,139 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.services.api_integration.connectors import rest_client as rest_client_module
+from app.services.api_integration.connectors.http_pool import HttpClientPool
+from app.services.api_integration.connectors.rest_client import RestClient
+from app.services.api_integration.recovery.circuit import CircuitBreaker
+from app.services.api_integration.recovery.policy import (
+    RetryExhaustedError,
+    RetryPolicy,
+    backoff_seconds,
+    retry_after_seconds,
+)
+from app.services.api_integration.services.event_router import ConnectorRoute, EndpointRoute
+
+
+def test_backoff_strategies_stay_within_bounds():
+    rng = random.Random(1)
+    none = RetryPolicy(base_delay_sec=0.1, max_delay_sec=1.0, jitter="none")
+    assert [backoff_seconds(none, attempt) for attempt in (1, 2, 3, 5)] == [0.1, 0.2, 0.4, 1.0]
+
+    full = RetryPolicy(base_delay_sec=0.1, max_delay_sec=1.0, jitter="full")
+    assert all(0 <= backoff_seconds(full, 3, rng=rng) <= 0.4 for _ in range(200))
+
+    decorrelated = RetryPolicy(base_delay_sec=0.1, max_delay_sec=1.0, jitter="decorrelated")
+    delay = None
+    for attempt in range(1, 20):
+        delay = backoff_seconds(decorrelated, attempt, delay, rng=rng)
+        assert 0.1 <= delay <= 1.0
+
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter="sometimes")
+
+
+def test_retry_after_parses_seconds_and_http_dates():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert retry_after_seconds("7") == 7.0
+    assert retry_after_seconds(format_datetime(now + timedelta(seconds=30), usegmt=True), now=now) == 30.0
+    assert retry_after_seconds(format_datetime(now - timedelta(seconds=30), usegmt=True), now=now) == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+def _peak_retries_per_window(jitter: str, clients: int = 1000, window_sec: float = 0.01) -> int:
+    """Every client fails at t=0 against a target that stays down; count retries landing in each window."""
+    rng = random.Random(42)
+    policy = RetryPolicy(max_attempts=4, base_delay_sec=0.2, max_delay_sec=2.0, jitter=jitter)
+    arrivals: Counter = Counter()
+    for _ in range(clients):
+        now, delay = 0.0, None
+        for attempt in range(1, policy.max_attempts):
+            delay = backoff_seconds(policy, attempt, delay, rng=rng)
+            now += delay
+            arrivals[int(now / window_sec)] += 1
+    return max(arrivals.values())
+
+
+def test_jitter_removes_synchronized_retry_spikes():
+    lockstep = _peak_retries_per_window("none")
+    assert lockstep == 1000
+
+    # Spread over a window of 10ms, 1000 retries should never arrive more than ~100 at a time.
+    assert _peak_retries_per_window("full") <= 120
+    assert _peak_retries_per_window("decorrelated") <= 60
+
+
+def _endpoint() -> EndpointRoute:
+    return EndpointRoute(
+        id="erp-orders",
+        name="Create order",
+        method="POST",
+        path="/orders",
+        event_name=None,
+        is_active=True,
+        connector=ConnectorRoute(id="erp", name="erp", base_url="http://erp.test"),
+    )
+
+
+async def _call(client: RestClient, policy: RetryPolicy):
+    return await client.request(
+        endpoint=_endpoint(),
+        base_url="http://erp.test",
+        payload={"id": 1},
+        headers={},
+        retry_policy=policy,
+        failure_threshold=10,
+        recovery_timeout_sec=1.0,
+        request_id="req-retry-after",
+    )
+
+
+@pytest.mark.anyio
+async def test_rest_client_waits_for_retry_after(monkeypatch):
+    responses = [(429, "3"), (503, "1"), (200, None)]
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        status_code, retry_after = responses.pop(0)
+        headers = {"Retry-After": retry_after} if retry_after else {}
+        return httpx.Response(status_code=status_code, headers=headers, json={}, request=httpx.Request(method, str(url)))
+
+    sleeps: list[float] = []
+    original_sleep = asyncio.sleep
+
+    async def recording_sleep(delay, *args, **kwargs):
+        sleeps.append(delay)
+        await original_sleep(0)
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    monkeypatch.setattr(rest_client_module.asyncio, "sleep", recording_sleep)
+    pool = HttpClientPool()
+
+    result = await _call(RestClient(CircuitBreaker(), http_pool=pool), RetryPolicy(base_delay_sec=0.01, jitter="none"))
+
+    assert result.attempt_count == 3
+    assert sleeps == [3.0, 1.0]
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_retry_after_beyond_the_cap_fails_fast(monkeypatch):
+    calls = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        calls.append(url)
+        return httpx.Response(status_code=429, headers={"Retry-After": "600"}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    pool = HttpClientPool()
+
+    with pytest.raises(RetryExhaustedError, match="Retry-After 600s"):
+        await _call(RestClient(CircuitBreaker(), http_pool=pool), RetryPolicy(max_retry_after_sec=30))
+    assert len(calls) == 1
+    await pool.aclose()
@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.database import SessionLocal
+from app.services.api_integration.api.v1.endpoints import webhooks
+from app.services.api_integration.models import Flow
+from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.run_queue import RunQueue, RunQueueFullError
+
+
+async def _demo_flow_id(async_client) -> str:
+    flows = (await async_client.get("/api/v1/api-integration/flows")).json()
+    return next(flow["id"] for flow in flows if flow["name"] == "Shopify -> ERP Order Sync")
+
+
+def _patch_target(monkeypatch, delay: float = 0.0, gate: asyncio.Event | None = None) -> list:
+    original_request = httpx.AsyncClient.request
+    calls: list = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        if not str(url).startswith("http://127.0.0.1:8000"):
+            return await original_request(self, method, url, *args, **kwargs)
+        calls.append(kwargs.get("json"))
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(delay)
+        return httpx.Response(status_code=200, json={"result": "ok"}, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    return calls
+
+
+async def _wait_for_status(async_client, run_id: str, status: str) -> dict:
+    for _ in range(100):
+        run = (await async_client.get(f"/api/v1/api-integration/ops/runs/{run_id}")).json()
+        if run["status"] == status:
+            return run
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"run {run_id} never reached {status}")
+
+
+@pytest.fixture
+def queue_mode(monkeypatch):
+    monkeypatch.setattr(webhooks, "WEBHOOK_INGEST_MODE", "queue")
+    queue = RunQueue(flow_runner._process_queued_run, maxsize=2, workers=1, retry_after_sec=2.5)
+    monkeypatch.setattr(flow_runner, "queue", queue)
+    return queue
+
+
+@pytest.mark.anyio
+async def test_webhook_is_acknowledged_before_the_target_call(async_client, queue_mode, monkeypatch):
+    gate = asyncio.Event()
+    calls = _patch_target(monkeypatch, gate=gate)
+    flow_id = await _demo_flow_id(async_client)
+
+    response = await async_client.post(f"/api/v1/api-integration/webhooks/{flow_id}", json={"id": "SO-9"})
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "QUEUED"
+
+    gate.set()
+    run = await _wait_for_status(async_client, body["run_id"], "SUCCEEDED")
+    assert run["mapped_payload"]["order_number"] == "SO-9"
+    assert calls == [run["mapped_payload"]]
+    await queue_mode.stop()
+
+
+@pytest.mark.anyio
+async def test_full_queue_rejects_with_retry_after(async_client, queue_mode, monkeypatch):
+    gate = asyncio.Event()
+    _patch_target(monkeypatch, gate=gate)
+    flow_id = await _demo_flow_id(async_client)
+    url = f"/api/v1/api-integration/webhooks/{flow_id}"
+
+    statuses = []
+    for index in range(4):
+        response = await async_client.post(url, json={"id": f"SO-{index}"})
+        statuses.append(response.status_code)
+        await asyncio.sleep(0.01)
+
+    # One run is held by the worker, two wait in the queue, the fourth is rejected.
+    assert statuses == [202, 202, 202, 429]
+    assert response.headers["Retry-After"] == "3"
+    assert queue_mode.stats()["rejected"] == 1
+
+    gate.set()
+    await queue_mode.stop(drain_timeout_sec=5)
+    assert queue_mode.stats()["processed"] == 3
+
+
+@pytest.mark.anyio
+async def test_requeue_pending_resubmits_queued_runs(seeded_db, queue_mode, monkeypatch):
+    _patch_target(monkeypatch)
+    db = SessionLocal()
+    try:
+        flow = db.query(Flow).filter(Flow.name == "Shopify -> ERP Order Sync").first()
+        # More pending runs than the queue holds: the tail is fed in as slots free up, not dropped.
+        runs = [flow_runner._queue_run(db, flow, {"id": f"SO-R{i}"}, "req-requeue") for i in range(5)]
+        assert flow_runner.requeue_pending(db) >= 5
+        await flow_runner._requeue_task
+        await queue_mode.stop(drain_timeout_sec=5)
+        for run in runs:
+            db.refresh(run)
+            assert run.status == "SUCCEEDED"
+    finally:
+        db.close()
+
+
+@pytest.mark.anyio
+async def test_run_queued_delivers_a_run_claimed_by_two_workers_once(seeded_db, monkeypatch):
+    calls = _patch_target(monkeypatch, delay=0.01)
+    sessions = [SessionLocal() for _ in range(3)]
+    try:
+        flow = sessions[0].query(Flow).filter(Flow.name == "Shopify -> ERP Order Sync").first()
+        run = flow_runner._queue_run(sessions[0], flow, {"id": "SO-CLAIM"}, "req-claim")
+
+        await asyncio.gather(*(flow_runner.run_queued(db, run.id) for db in sessions[1:]))
+
+        assert len(calls) == 1
+        sessions[0].refresh(run)
+        assert run.status == "SUCCEEDED"
+    finally:
+        for db in sessions:
+            db.close()
+
+
+@pytest.mark.anyio
+async def test_reserve_is_all_or_nothing():
+    async def handler(run_id: str) -> None:
+        await asyncio.sleep(1)
+
+    queue = RunQueue(handler, maxsize=2, workers=1)
+    queue.submit("a")
+    with pytest.raises(RunQueueFullError):
+        queue.reserve(2)
+    queue.reserve(1)
+    await queue.stop()
@@ -0,0 +1,224 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from app.services.api_integration.recovery.circuit import CircuitBreaker, CircuitPolicy
+from app.services.api_integration.recovery.limiter import TargetLimiter
+from app.services.api_integration.recovery.state import (
+    RedisStateBackend,
+    SharedMemoryStateBackend,
+    StateBackend,
+    build_state_backend,
+)
+
+
+class FakeRedis:
+    """Just the commands RedisStateBackend uses, with expiry on the wall clock."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[bytes, float | None]] = {}
+
+    def _live(self, name: str) -> bytes | None:
+        value, expires_at = self._data.get(name, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(name, None)
+            return None
+        return value
+
+    def get(self, name: str) -> bytes | None:
+        return self._live(name)
+
+    def set(self, name: str, value: str, px: int | None = None) -> bool:
+        self._data[name] = (str(value).encode(), time.time() + px / 1000 if px else None)
+        return True
+
+    def incr(self, name: str) -> int:
+        value = int(self._live(name) or 0) + 1
+        self._data[name] = (str(value).encode(), self._data.get(name, (None, None))[1])
+        return value
+
+    def expire(self, name: str, seconds: int) -> bool:
+        if name in self._data:
+            self._data[name] = (self._data[name][0], time.time() + seconds)
+        return True
+
+
+POLICY = CircuitPolicy(failure_threshold=2, recovery_timeout_sec=30)
+
+
+def _shm(tmp_path, name: str = "state") -> SharedMemoryStateBackend:
+    return SharedMemoryStateBackend(str(tmp_path / name), slots=64)
+
+
+def test_shm_circuit_opened_in_one_worker_is_seen_by_another(tmp_path):
+    worker_a = CircuitBreaker(backend=_shm(tmp_path), sync_interval_sec=0)
+    worker_b = CircuitBreaker(backend=_shm(tmp_path), sync_interval_sec=0)
+    assert worker_b.allow_request("erp", POLICY)
+
+    worker_a.record_failure("erp", POLICY)
+    worker_a.record_failure("erp", POLICY)
+
+    assert worker_b.is_open("erp", POLICY)
+    assert not worker_b.allow_request("erp", POLICY)
+    assert worker_b.stats()["backend"] == "shm"
+
+
+def test_shared_close_is_adopted_and_older_transitions_lose(tmp_path):
+    backend = _shm(tmp_path)
+    worker_a = CircuitBreaker(backend=backend, sync_interval_sec=0)
+    worker_b = CircuitBreaker(backend=_shm(tmp_path), sync_interval_sec=0)
+    policy = CircuitPolicy(failure_threshold=1, recovery_timeout_sec=0.1)
+
+    worker_a.record_failure("erp", policy)
+    assert worker_b.is_open("erp", policy)
+    time.sleep(0.1)
+    assert worker_a.allow_request("erp", policy)
+    worker_a.record_success("erp", policy)
+
+    assert not worker_b.is_open("erp", policy)
+    assert worker_b.stats()["targets"]["erp"]["state"] == "CLOSED"
+
+    backend.store_circuit("erp", "OPEN", 1.0)
+    assert backend.load_circuit("erp")[0] == "CLOSED"
+
+
+def test_sync_interval_keeps_reads_local(tmp_path):
+    worker_a = CircuitBreaker(backend=_shm(tmp_path), sync_interval_sec=60)
+    worker_b = CircuitBreaker(backend=_shm(tmp_path), sync_interval_sec=60)
+    assert not worker_b.is_open("erp", POLICY)
+
+    worker_a.record_failure("erp", POLICY)
+    worker_a.record_failure("erp", POLICY)
+
+    # worker_b read the shared slot a moment ago and will not look again until the interval passes.
+    assert not worker_b.is_open("erp", POLICY)
+
+
+def _reserve_many(path: str, results) -> None:
+    backend = SharedMemoryStateBackend(path, slots=64)
+    results.put(sum(1 for _ in range(20) if backend.reserve("endpoint:erp", 0.001, 10) == 0))
+
+
+def test_shm_token_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "state")
+    SharedMemoryStateBackend(path, slots=64).close()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_reserve_many, args=(path, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert sum(results.get(timeout=5) for _ in workers) == 10
+
+
+@pytest.mark.anyio
+async def test_limiters_in_different_workers_share_one_rate(tmp_path):
+    worker_a = TargetLimiter(rate_per_sec=20, burst=2, backend=_shm(tmp_path), key="endpoint:erp")
+    worker_b = TargetLimiter(rate_per_sec=20, burst=2, backend=_shm(tmp_path), key="endpoint:erp")
+
+    async def call(limiter: TargetLimiter) -> None:
+        await limiter.acquire()
+        limiter.release()
+
+    started = time.monotonic()
+    await asyncio.gather(call(worker_a), call(worker_b), call(worker_a), call(worker_b))
+
+    # Two tokens up front, then one every 50ms for the pair, not for each worker.
+    assert time.monotonic() - started >= 0.09
+    assert worker_a.stats()["shared"] is True
+
+
+def test_shm_throttle_blocks_every_worker(tmp_path):
+    backend_a, backend_b = _shm(tmp_path), _shm(tmp_path)
+    assert backend_b.reserve("endpoint:erp", 100, 5) == 0
+    backend_a.block("endpoint:erp", 2.0)
+    assert 1.5 < backend_b.reserve("endpoint:erp", 100, 5) <= 2.0
+
+
+def test_shm_rejects_foreign_files(tmp_path):
+    path = tmp_path / "not-state"
+    path.write_bytes(b"x" * 128)
+    with pytest.raises(ValueError):
+        SharedMemoryStateBackend(str(path))
+
+
+def test_redis_backend_shares_circuits_and_limits():
+    redis = FakeRedis()
+    worker_a = CircuitBreaker(backend=RedisStateBackend(redis), sync_interval_sec=0)
+    worker_b = CircuitBreaker(backend=RedisStateBackend(redis), sync_interval_sec=0)
+
+    worker_a.record_failure("erp", POLICY)
+    worker_a.record_failure("erp", POLICY)
+    assert worker_b.is_open("erp", POLICY)
+    assert worker_b.stats()["backend"] == "redis"
+
+    # A fixed clock keeps every reservation inside one rate window.
+    backend_a, backend_b = RedisStateBackend(redis, clock=lambda: 100.0), RedisStateBackend(redis, clock=lambda: 100.0)
+    granted = [backend.reserve("endpoint:erp", 1, 3) == 0 for backend in (backend_a, backend_b) * 3]
+    assert granted.count(True) == 3
+    assert 0 < backend_a.reserve("endpoint:erp", 1, 3) <= 3
+
+    backend_a.block("connector:erp", 5)
+    assert backend_b.reserve("connector:erp", 100, 10) == 5
+
+
+class ThreadRecordingRedis(FakeRedis):
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: set[int] = set()
+
+    def get(self, name: str) -> bytes | None:
+        self.threads.add(threading.get_ident())
+        return super().get(name)
+
+    def incr(self, name: str) -> int:
+        self.threads.add(threading.get_ident())
+        return super().incr(name)
+
+
+@pytest.mark.anyio
+async def test_redis_calls_stay_off_the_event_loop():
+    redis = ThreadRecordingRedis()
+    backend = RedisStateBackend(redis, clock=lambda: 100.0)
+    limiter = TargetLimiter(rate_per_sec=1, burst=2, backend=backend, key="endpoint:erp")
+
+    admitted = []
+
+    async def call(n: int) -> None:
+        await limiter.acquire()
+        admitted.append(n)
+        limiter.release()
+
+    await asyncio.gather(call(0), call(1))
+    assert admitted == [0, 1]
+    assert limiter.stats()["granted"] == 2
+
+    worker_a = CircuitBreaker(backend=RedisStateBackend(redis), sync_interval_sec=0)
+    worker_b = CircuitBreaker(backend=RedisStateBackend(redis), sync_interval_sec=0)
+    worker_a.record_failure("erp", POLICY)
+    worker_a.record_failure("erp", POLICY)
+    for _ in range(100):
+        # The read is adopted once it comes back from the worker thread.
+        if worker_b.is_open("erp", POLICY):
+            break
+        await asyncio.sleep(0.01)
+    assert worker_b.is_open("erp", POLICY)
+
+    assert redis.threads and threading.get_ident() not in redis.threads
+
+
+def test_state_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def test_build_state_backend(tmp_path):
+    assert build_state_backend("local") is None
+    assert build_state_backend("shm", shm_path=str(tmp_path / "state"), shm_slots=8).slots == 8
+    with pytest.raises(ValueError):
+        build_state_backend("zookeeper")
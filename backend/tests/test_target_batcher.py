@@ -0,0 +1,144 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.database import SessionLocal
+from app.services.api_integration.connectors.rest_client import RestCallResult
+from app.services.api_integration.models import Flow, Run
+from app.services.api_integration.services.flow_runner import flow_runner
+from app.services.api_integration.services.target_batcher import BatchItemError, TargetBatcher
+
+
+_ERP_ORDERS = SimpleNamespace(id="ep-1", connector=SimpleNamespace(base_url="http://erp.test"))
+
+
+def _flow(max_items=10, max_bytes=0, linger_ms=20, flow_id="flow-1", credential=None):
+    return SimpleNamespace(
+        id=flow_id,
+        target_endpoint=_ERP_ORDERS,
+        credential=credential,
+        batch_max_items=max_items,
+        batch_max_bytes=max_bytes,
+        batch_linger_ms=linger_ms,
+    )
+
+
+def _echo_sender(batches: list):
+    async def send(flow, request_id, payloads):
+        batches.append(list(payloads))
+        return RestCallResult(status_code=201, payload=[{"echo": p["n"]} for p in payloads], attempt_count=1)
+
+    return send
+
+
+@pytest.mark.anyio
+async def test_items_are_coalesced_by_count_and_linger():
+    batches: list = []
+    batcher = TargetBatcher(_echo_sender(batches))
+    flow = _flow(max_items=2)
+
+    results = await asyncio.gather(*(batcher.submit(flow, {"n": n}, f"req-{n}") for n in range(5)))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [result.payload for result in results] == [{"echo": n} for n in range(5)]
+    assert batcher.stats()["batches_sent"] == 3
+
+
+@pytest.mark.anyio
+async def test_flows_sharing_a_target_share_batches():
+    batches: list = []
+    batcher = TargetBatcher(_echo_sender(batches))
+    orders, refunds = _flow(max_items=4), _flow(max_items=4, flow_id="flow-2")
+    other_key = _flow(max_items=4, flow_id="flow-3", credential=SimpleNamespace(id="cred-2"))
+
+    await asyncio.gather(
+        *(batcher.submit(orders, {"n": n}, "req") for n in range(2)),
+        *(batcher.submit(refunds, {"n": n}, "req") for n in range(2, 4)),
+        batcher.submit(other_key, {"n": 4}, "req"),
+    )
+
+    assert sorted(batches, key=len) == [[{"n": 4}], [{"n": n} for n in range(4)]]
+
+
+@pytest.mark.anyio
+async def test_byte_limit_starts_a_new_batch():
+    batches: list = []
+    batcher = TargetBatcher(_echo_sender(batches))
+    item_bytes = len(json.dumps({"n": 0, "pad": "x" * 40}, separators=(",", ":")))
+    flow = _flow(max_bytes=item_bytes * 2 + 1)
+
+    await asyncio.gather(*(batcher.submit(flow, {"n": n, "pad": "x" * 40}, "req") for n in range(5)))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+@pytest.mark.anyio
+async def test_item_errors_and_batch_failures_are_fanned_out():
+    async def partial(flow, request_id, payloads):
+        return RestCallResult(
+            status_code=200,
+            payload={"results": [{"error": "duplicate order"} if p["n"] == 1 else {"ok": True} for p in payloads]},
+            attempt_count=1,
+        )
+
+    batcher = TargetBatcher(partial)
+    results = await asyncio.gather(*(batcher.submit(_flow(), {"n": n}, "req") for n in range(3)), return_exceptions=True)
+    assert isinstance(results[1], BatchItemError)
+    assert results[0].payload == results[2].payload == {"ok": True}
+
+    async def down(flow, request_id, payloads):
+        raise RuntimeError("ERP unavailable")
+
+    batcher = TargetBatcher(down)
+    results = await asyncio.gather(*(batcher.submit(_flow(), {"n": n}, "req") for n in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.fixture
+def batched_demo_flow(seeded_db):
+    db = SessionLocal()
+    flow = db.query(Flow).filter(Flow.name == "Shopify -> ERP Order Sync").first()
+    flow.batch_max_items, flow.batch_linger_ms = 3, 200
+    db.commit()
+    yield flow.id
+    flow.batch_max_items, flow.batch_linger_ms = 1, 0
+    db.commit()
+    db.close()
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_sends_one_target_call_per_batch(async_client, batched_demo_flow, monkeypatch):
+    # Batches close on batch_max_items alone here, however long the runs take to reach the batcher.
+    monkeypatch.setattr(flow_runner.batcher, "_start_linger", lambda loop, flow: None)
+    original_request = httpx.AsyncClient.request
+    calls: list = []
+
+    async def patched_request(self, method, url, *args, **kwargs):
+        if not str(url).startswith("http://127.0.0.1:8000"):
+            return await original_request(self, method, url, *args, **kwargs)
+        items = kwargs.get("json")
+        calls.append(items)
+        body = [{"erp_order_id": f"ERP-{item['order_number']}"} for item in items]
+        return httpx.Response(status_code=201, json=body, request=httpx.Request(method, str(url)))
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", patched_request)
+    body = "\n".join(json.dumps({"id": f"B-{n}"}) for n in range(6)).encode()
+
+    response = await async_client.post(
+        f"/api/v1/api-integration/webhooks/{batched_demo_flow}/bulk?concurrency=6", content=body
+    )
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 6
+    assert sorted(len(batch) for batch in calls) == [3, 3]
+
+    db = SessionLocal()
+    try:
+        for result in response.json()["results"]:
+            run = db.query(Run).filter(Run.id == result["run_id"]).one()
+            assert run.target_response == {"erp_order_id": f"ERP-{run.mapped_payload['order_number']}"}
+    finally:
+        db.close()
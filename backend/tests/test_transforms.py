@@ -0,0 +1,125 @@
+import pytest
+
+from app.services.api_integration.services import transforms
+from app.services.api_integration.services.mapping_engine import _apply_rules, compile_mapping
+from app.services.api_integration.services.transforms import load_lookup_table, register_transform
+
+SKU_RULES = [
+    {"source": "id", "target": "order_number"},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "erp_code", "transform": "lookup:test_sku_erp"},
+            {"source": "currency", "target": "currency", "transform": "iso_currency", "default": "usd"},
+        ],
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    yield
+    transforms._custom_transforms.pop("iso_currency", None)
+    transforms._lookup_tables.pop("test_sku_erp", None)
+
+
+def _order(item_count: int) -> dict:
+    return {"id": "SO-1", "line_items": [{"sku": f"SKU-{i % 3}", "currency": "eur"} for i in range(item_count)]}
+
+
+@pytest.mark.parametrize("item_count", [2, 200])
+@pytest.mark.parametrize("codegen", [False, True])
+def test_registered_and_lookup_transforms_match_interpreter(item_count, codegen):
+    register_transform("iso_currency", lambda value: str(value).upper()[:3])
+    load_lookup_table("test_sku_erp", {"SKU-0": "ERP-100", "SKU-1": "ERP-101", "SKU-2": "ERP-102"})
+    payload = _order(item_count)
+
+    compiled = compile_mapping(SKU_RULES, codegen=codegen)
+    mapped = compiled.apply(payload)
+
+    assert mapped == _apply_rules(payload, SKU_RULES)
+    assert mapped["items"][1] == {"erp_code": "ERP-101", "currency": "EUR"}
+    if codegen:
+        assert compiled.mode == "codegen"
+
+
+def test_reloaded_lookup_table_is_seen_by_compiled_mappings():
+    register_transform("iso_currency", str.upper)
+    load_lookup_table("test_sku_erp", {"SKU-0": "A", "SKU-1": "B", "SKU-2": "C"})
+    compiled = compile_mapping(SKU_RULES, codegen=True)
+    assert compiled.apply(_order(1))["items"][0]["erp_code"] == "A"
+
+    load_lookup_table("test_sku_erp", {"SKU-0": "Z"})
+    assert compiled.apply(_order(1))["items"][0]["erp_code"] == "Z"
+
+
+def test_unknown_lookup_table_fails_at_compile_time():
+    rules = [{"source": "sku", "target": "code", "transform": "lookup:test_sku_erp", "default": "x"}]
+    with pytest.raises(ValueError, match="Unknown lookup table 'test_sku_erp'"):
+        compile_mapping(rules)
+    with pytest.raises(ValueError, match="Unknown lookup table"):
+        compile_mapping(rules, codegen=True)
+    with pytest.raises(ValueError, match="Unknown lookup table"):
+        _apply_rules({"sku": "SKU-1"}, rules)
+    assert "test_sku_erp" not in transforms._lookup_tables
+
+    load_lookup_table("test_sku_erp", {"SKU-1": "ERP-1"})
+    compiled = compile_mapping(rules)
+    transforms.lookup_table("test_sku_erp").unload()
+    # Plans compiled before a table is dropped fail at run time instead.
+    with pytest.raises(ValueError, match="not loaded"):
+        compiled.apply({"sku": "SKU-1"})
+
+
+def test_lookup_misses_follow_table_policy_and_rule_default():
+    load_lookup_table("test_sku_erp", {"SKU-1": "ERP-1", "42": "ERP-42"})
+    compiled = compile_mapping([{"source": "sku", "target": "code", "transform": "lookup:test_sku_erp"}])
+    with pytest.raises(ValueError, match="No entry"):
+        compiled.apply({"sku": "SKU-9"})
+    assert compiled.apply({"sku": 42}) == {"code": "ERP-42"}
+
+    with_default = compile_mapping(
+        [{"source": "sku", "target": "code", "transform": "lookup:test_sku_erp", "default": "SKU-1"}]
+    )
+    assert with_default.apply({"sku": "SKU-9"}) == {"code": "ERP-1"}
+
+    load_lookup_table("test_sku_erp", {}, on_missing="passthrough")
+    assert compiled.apply({"sku": "SKU-9"}) == {"code": "SKU-9"}
+
+
+def test_register_transform_rejects_duplicates_and_reserved_names():
+    register_transform("iso_currency", str.upper)
+    with pytest.raises(ValueError):
+        register_transform("iso_currency", str.lower)
+    with pytest.raises(ValueError):
+        register_transform("upper", str.lower)
+    with pytest.raises(ValueError):
+        register_transform("lookup:skus", str.lower)
+
+    register_transform("iso_currency", str.lower, replace=True)
+    assert compile_mapping([{"source": "c", "target": "c", "transform": "iso_currency"}]).apply({"c": "EUR"}) == {
+        "c": "eur"
+    }
+
+
+@pytest.mark.anyio
+async def test_lookup_table_api_stores_and_reloads_tables(async_client):
+    response = await async_client.put(
+        "/api/v1/api-integration/lookup-tables/test_sku_erp",
+        json={"entries": {"SKU-1": "ERP-1"}, "on_missing": "null"},
+    )
+    assert response.status_code == 200
+    assert response.json()["entry_count"] == 1
+    assert transforms.lookup_table("test_sku_erp")("SKU-1") == "ERP-1"
+
+    transforms.lookup_table("test_sku_erp").unload()
+    reload_response = await async_client.post("/api/v1/api-integration/lookup-tables/reload")
+    assert reload_response.status_code == 200
+    assert transforms.lookup_table("test_sku_erp")("SKU-2") is None
+
+    invalid = await async_client.put(
+        "/api/v1/api-integration/lookup-tables/test_sku_erp", json={"entries": {}, "on_missing": "ignore"}
+    )
+    assert invalid.status_code == 422
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Compare the reference mapping interpreter with compiled and code-generated plans.
+
+Run from the repository root:
+
+    python scripts/bench_mapping.py --items 50 --iterations 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.services.api_integration.services.mapping_engine import _apply_rules, compile_mapping  # noqa: E402
+
+ORDER_RULES = [
+    {"source": "id", "target": "order_number"},
+    {"source": "total_price", "target": "total_amount", "transform": "to_float"},
+    {"source": "currency", "target": "currency", "default": "USD"},
+    {"source": "shipping_address.city", "target": "ship_city"},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku"},
+            {"source": "quantity", "target": "qty", "transform": "to_int", "default": 1},
+            {"source": "price", "target": "unit_price", "transform": "to_float", "default": 0},
+            {
+                "source": "discounts",
+                "target": "discounts",
+                "op": "map_array",
+                "item_rules": [
+                    {"source": "code", "target": "code", "transform": "upper"},
+                    {"source": "amount", "target": "amount", "transform": "to_float"},
+                ],
+            },
+        ],
+    },
+]
+
+
+def build_order(item_count: int) -> dict:
+    return {
+        "id": "SO-1001",
+        "total_price": "123.45",
+        "shipping_address": {"city": "Seattle"},
+        "line_items": [
+            {
+                "sku": f"SKU-{i}",
+                "quantity": str(i % 5 + 1),
+                "price": f"{i % 100}.50",
+                "discounts": [{"code": "promo", "amount": "1.00"}] if i % 3 == 0 else [],
+            }
+            for i in range(item_count)
+        ],
+    }
+
+
+def _time(label: str, func, payload: dict, iterations: int, baseline: float | None) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1_000_000
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"{label:<12} {per_call_us:10.1f} us/call{speedup}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = build_order(args.items)
+    plan = compile_mapping(ORDER_RULES)
+    generated = compile_mapping(ORDER_RULES, codegen=True)
+    assert generated.mode == "codegen"
+    assert plan.apply(payload) == generated.apply(payload) == _apply_rules(payload, ORDER_RULES)
+
+    print(f"{args.items} line items, {args.iterations} iterations")
+    baseline = _time("interpreter", lambda p: _apply_rules(p, ORDER_RULES), payload, args.iterations, None)
+    _time("plan", plan.apply, payload, args.iterations, baseline)
+    _time("codegen", generated.apply, payload, args.iterations, baseline)
+
+
+if __name__ == "__main__":
+    main()
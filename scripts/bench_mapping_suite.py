@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""Throughput, latency and memory benchmarks for the mapping engine on synthetic Shopify orders.
+
+Run from the repository root:
+
+    python scripts/bench_mapping_suite.py                  # print results
+    python scripts/bench_mapping_suite.py --save           # rewrite the baseline file
+    python scripts/bench_mapping_suite.py --compare        # diff against the baseline, exit 1 on regressions
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.services.api_integration.services.mapping_engine import apply_mapping, compile_mapping  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_mapping_baseline.json"
+
+ORDER_RULES = [
+    {"source": "id", "target": "order_number", "transform": "to_str"},
+    {"source": "name", "target": "reference"},
+    {"source": "email", "target": "customer.email", "transform": "lower"},
+    {"source": "customer.first_name", "target": "customer.first_name"},
+    {"source": "customer.last_name", "target": "customer.last_name"},
+    {"source": "total_price", "target": "totals.gross", "transform": "to_float"},
+    {"source": "subtotal_price", "target": "totals.net", "transform": "to_float"},
+    {"source": "total_tax", "target": "totals.tax", "transform": "to_float", "default": 0},
+    {"source": "currency", "target": "totals.currency", "transform": "upper", "default": "USD"},
+    {"source": "financial_status", "target": "status", "transform": "upper"},
+    {"source": "shipping_address.city", "target": "ship_to.city"},
+    {"source": "shipping_address.province_code", "target": "ship_to.region"},
+    {"source": "shipping_address.country_code", "target": "ship_to.country", "default": "US"},
+    {"source": "shipping_address.zip", "target": "ship_to.postal_code", "transform": "to_str"},
+    {"source": "tags", "target": "tags", "default": []},
+    {
+        "source": "line_items",
+        "target": "items",
+        "op": "map_array",
+        "item_rules": [
+            {"source": "sku", "target": "sku"},
+            {"source": "title", "target": "description"},
+            {"source": "quantity", "target": "qty", "transform": "to_int", "default": 1},
+            {"source": "price", "target": "unit_price", "transform": "to_float", "default": 0},
+            {"source": "vendor", "target": "vendor", "transform": "upper"},
+            {"source": "requires_shipping", "target": "ship", "default": True},
+            {
+                "source": "tax_lines",
+                "target": "taxes",
+                "op": "map_array",
+                "item_rules": [
+                    {"source": "title", "target": "code", "transform": "upper"},
+                    {"source": "rate", "target": "rate", "transform": "to_float"},
+                    {"source": "price", "target": "amount", "transform": "to_float"},
+                ],
+            },
+        ],
+    },
+]
+
+NESTING_DEPTH = 24
+
+
+def build_order(item_count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    items = []
+    for i in range(item_count):
+        price = rng.randint(100, 20000) / 100
+        items.append(
+            {
+                "id": 100000 + i,
+                "sku": f"SKU-{rng.randint(1, 99999):05d}",
+                "title": f"Product {i}",
+                "vendor": rng.choice(["acme", "globex", "initech"]),
+                "quantity": rng.randint(1, 5),
+                "price": f"{price:.2f}",
+                "requires_shipping": rng.random() > 0.1,
+                "tax_lines": [{"title": "state tax", "rate": 0.06, "price": f"{price * 0.06:.2f}"}],
+            }
+        )
+    return {
+        "id": 5001234567,
+        "name": "#1001",
+        "email": "Jane.Doe@Example.com",
+        "customer": {"id": 77, "first_name": "Jane", "last_name": "Doe"},
+        "total_price": "1234.50",
+        "subtotal_price": "1164.62",
+        "total_tax": "69.88",
+        "currency": "usd",
+        "financial_status": "paid",
+        "shipping_address": {"city": "Seattle", "province_code": "WA", "country_code": "US", "zip": 98101},
+        "tags": ["vip", "wholesale"],
+        "line_items": items,
+    }
+
+
+def build_deep_case(depth: int = NESTING_DEPTH) -> tuple[dict, list[dict]]:
+    """An order whose metafields sit ``depth`` levels down, plus nested map_array three levels deep."""
+    nested: dict[str, Any] = {"value": "42.5", "flag": "yes"}
+    for level in reversed(range(depth)):
+        nested = {f"n{level}": nested, f"noise{level}": level}
+    path = ".".join(f"n{level}" for level in range(depth))
+
+    payload = build_order(10)
+    payload["metafields"] = nested
+    for item in payload["line_items"]:
+        item["bundle"] = [{"sku": f"{item['sku']}-{j}", "parts": [{"code": "p", "qty": "1"}] * 3} for j in range(3)]
+
+    rules = [
+        *ORDER_RULES[:-1],
+        {"source": f"metafields.{path}.value", "target": "meta.score", "transform": "to_float"},
+        {"source": f"metafields.{path}.flag", "target": "meta.flag", "transform": "upper"},
+        {
+            "source": "line_items",
+            "target": "items",
+            "op": "map_array",
+            "item_rules": [
+                {"source": "sku", "target": "sku"},
+                {
+                    "source": "bundle",
+                    "target": "bundle",
+                    "op": "map_array",
+                    "item_rules": [
+                        {"source": "sku", "target": "sku"},
+                        {
+                            "source": "parts",
+                            "target": "parts",
+                            "op": "map_array",
+                            "item_rules": [
+                                {"source": "code", "target": "code", "transform": "upper"},
+                                {"source": "qty", "target": "qty", "transform": "to_int"},
+                            ],
+                        },
+                    ],
+                },
+            ],
+        },
+    ]
+    return payload, rules
+
+
+def corpora() -> dict[str, tuple[dict, list[dict]]]:
+    return {
+        "order_1_item": (build_order(1), ORDER_RULES),
+        "order_100_items": (build_order(100), ORDER_RULES),
+        "order_10k_items": (build_order(10_000), ORDER_RULES),
+        "order_deep_nesting": build_deep_case(),
+    }
+
+
+def engines(rules: list[dict]) -> dict[str, Callable[[dict], dict]]:
+    plan = compile_mapping(rules)
+    generated = compile_mapping(rules, codegen=True)
+    return {
+        "apply_mapping": lambda payload: apply_mapping(payload, rules),
+        "plan": plan.apply,
+        "codegen": generated.apply,
+    }
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _significant(value: float, digits: int = 3) -> float:
+    return float(f"{value:.{digits}g}")
+
+
+def measure(func: Callable[[dict], dict], payload: dict, min_time: float, min_samples: int) -> dict:
+    func(payload)
+    samples: list[float] = []
+    started = time.perf_counter()
+    while len(samples) < min_samples or time.perf_counter() - started < min_time:
+        call_started = time.perf_counter()
+        func(payload)
+        samples.append(time.perf_counter() - call_started)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "records_per_sec": _significant(len(samples) / sum(samples)),
+        "p50_us": _significant(statistics.median(samples) * 1e6),
+        "p99_us": _significant(_percentile(samples, 0.99) * 1e6),
+        "peak_memory_kb": _significant((peak - baseline) / 1024),
+    }
+
+
+def run_suite(min_time: float, min_samples: int, only: set[str] | None = None) -> dict:
+    results: dict[str, dict] = {}
+    for corpus_name, (payload, rules) in corpora().items():
+        if only and corpus_name not in only:
+            continue
+        funcs = engines(rules)
+        expected = funcs["apply_mapping"](payload)
+        for engine_name, func in funcs.items():
+            assert func(payload) == expected, f"{engine_name} disagrees on {corpus_name}"
+            results[f"{corpus_name}/{engine_name}"] = measure(func, payload, min_time, min_samples)
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "min_time_sec": min_time},
+        "results": results,
+    }
+
+
+def print_results(report: dict) -> None:
+    print(f"{'case':<38} {'records/s':>11} {'p50 us':>10} {'p99 us':>10} {'peak KiB':>10}")
+    for case, row in report["results"].items():
+        print(
+            f"{case:<38} {row['records_per_sec']:>11g} {row['p50_us']:>10g} "
+            f"{row['p99_us']:>10g} {row['peak_memory_kb']:>10g}"
+        )
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for case, row in report["results"].items():
+        previous = baseline["results"].get(case)
+        if previous is None:
+            continue
+        if row["records_per_sec"] < previous["records_per_sec"] * (1 - tolerance):
+            regressions.append(f"{case}: records/sec {previous['records_per_sec']:g} -> {row['records_per_sec']:g}")
+        if row["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + tolerance) + 1:
+            regressions.append(f"{case}: peak KiB {previous['peak_memory_kb']:g} -> {row['peak_memory_kb']:g}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each case")
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--corpus", action="append", help="only run the named corpus (repeatable)")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help="compare with the saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown for --compare")
+    args = parser.parse_args()
+
+    report = run_suite(args.min_time, args.min_samples, set(args.corpus) if args.corpus else None)
+    print_results(report)
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {BASELINE_PATH}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()